@@ -11,6 +11,7 @@ from app.models import book  # Importar nuevos modelos para autogenerate
 from app.models import loan  # Modelo de préstamos
 from app.models import group  # Modelo de grupos
 from app.models import invitation  # Modelo de invitaciones
+from app.models import catalog  # Catálogo local de OpenLibrary
 from app.config import settings
 
 # this is the Alembic Config object, which provides
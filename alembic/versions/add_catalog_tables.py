@@ -0,0 +1,47 @@
+"""Add local catalog tables (OpenLibrary editions and authors)
+
+Revision ID: add_catalog_tables_001
+Revises: add_cancelled_status
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_catalog_tables_001'
+down_revision = 'add_cancelled_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_editions',
+        sa.Column('isbn13', sa.String(13), primary_key=True),
+        sa.Column('edition_key', sa.String(32), nullable=False),
+        sa.Column('work_key', sa.String(32), nullable=True),
+        sa.Column('title', sa.String(500), nullable=False),
+        sa.Column('author_keys', sa.JSON(), nullable=True),
+        sa.Column('publisher', sa.String(255), nullable=True),
+        sa.Column('published_date', sa.String(50), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('language', sa.String(10), nullable=True),
+        sa.Column('cover_id', sa.Integer(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    # Para completar la descripción desde el volcado de obras
+    op.create_index('ix_catalog_editions_work_key', 'catalog_editions', ['work_key'])
+
+    op.create_table(
+        'catalog_authors',
+        sa.Column('key', sa.String(32), primary_key=True),
+        sa.Column('name', sa.String(255), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_authors')
+    op.drop_index('ix_catalog_editions_work_key', table_name='catalog_editions')
+    op.drop_table('catalog_editions')
@@ -0,0 +1,100 @@
+"""
+Módulo de portadas de libros
+
+Sirve las portadas de los libros desde la caché en disco (WebP redimensionado)
+en lugar de enlazar directamente las imágenes de OpenLibrary o Google Books.
+
+**Endpoints disponibles:**
+- GET /covers/{book_id}: Portada del libro en WebP, con ETag y Cache-Control
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from uuid import UUID
+import logging
+
+from app.dependencies import get_current_db
+from app.models.book import Book as BookModel
+from app.schemas.error import ErrorResponse
+from app.services.cover_cache import CoverUnavailableError, cover_headers, etag_matches, get_cover_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/covers",
+    tags=["covers"],
+    responses={
+        404: {"description": "Libro no encontrado o sin portada", "model": ErrorResponse},
+    }
+)
+
+
+@router.get(
+    "/{book_id}",
+    summary="Portada de un libro",
+    description="""
+    Devuelve la portada del libro en WebP, redimensionada al tamaño pedido.
+
+    La primera petición descarga la imagen original y guarda todas las variantes
+    en disco; las siguientes se sirven directamente desde ahí. La respuesta lleva
+    un ETag fuerte y `Cache-Control` largo, y responde `304 Not Modified` a
+    `If-None-Match`. Es pública para poder usarse en `<img src>`.
+
+    Si la portada no se puede descargar se redirige a la URL original, solo
+    cuando su host está en la lista de permitidos; si no, `404`.
+    """,
+    responses={
+        200: {"content": {"image/webp": {}}, "description": "Portada en WebP"},
+        304: {"description": "La copia del cliente sigue siendo válida"},
+        307: {"description": "Redirección a la portada original"},
+    },
+)
+async def get_cover(
+    book_id: UUID,
+    size: Literal["small", "medium", "large"] = Query("medium", description="Ancho: small (160px), medium (320px), large (640px)"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_current_db),
+):
+    """
+    Sirve la portada cacheada de un libro.
+
+    Args:
+        book_id: ID del libro
+        size: Variante de tamaño
+        if_none_match: Cabecera de validación condicional
+        db: Sesión de base de datos (inyectada automáticamente)
+
+    Raises:
+        HTTPException: 404 si el libro no existe, no tiene portada o su origen no está permitido
+    """
+    cover_url = db.query(BookModel.cover_url).filter(
+        and_(BookModel.id == book_id, BookModel.is_archived == False)
+    ).scalar()
+    if not cover_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"msg": "Libro no encontrado o sin portada", "type": "not_found"}
+        )
+
+    covers = get_cover_cache()
+    etag = covers.etag(cover_url, size)
+    headers = cover_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        path = await covers.get(cover_url, size)
+    except CoverUnavailableError as e:
+        logger.warning("Portada no disponible para el libro %s: %s", book_id, e)
+        # cover_url lo escribe el usuario: redirigir a cualquier host sería una redirección abierta
+        if covers.is_allowed(cover_url):
+            return RedirectResponse(cover_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"msg": "Portada no disponible", "type": "not_found"}
+        )
+
+    # FileResponse lee el fichero por bloques (o usa sendfile si el servidor lo soporta)
+    return FileResponse(path, media_type="image/webp", headers=headers)
@@ -19,6 +19,7 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.config import settings
 from app.schemas.error import ErrorResponse
+from app.services.book_search_service import PROVIDERS, get_book_search_service
 import logging
 import os
 
@@ -189,7 +190,8 @@ async def detailed_health_check(db: Session = Depends(get_db)) -> HealthCheckDet
     """
     Realiza una verificación detallada del estado de salud del servicio.
     
-    Verifica el estado de la base de datos, Redis (si está disponible) y los recursos del sistema.
+    Verifica el estado de la base de datos, Redis (si está disponible), los proveedores
+    de catálogo externos y los recursos del sistema.
     
     Args:
         db: Sesión de base de datos (inyectada automáticamente)
@@ -251,6 +253,43 @@ async def detailed_health_check(db: Session = Depends(get_db)) -> HealthCheckDet
                 "message": "Redis library not available"
             }
         
+        # Catalog search cache tiers (in-process LRU + Redis) and lookup coalescing
+        try:
+            search_service = get_book_search_service()
+            cache_stats = search_service.cache.stats() if hasattr(search_service.cache, "stats") else {}
+            health_status["checks"]["catalog_cache"] = {
+                "status": "healthy",
+                **cache_stats,
+                "single_flight": search_service.single_flight.stats(),
+                "local_catalog": search_service.catalog.stats(),
+            }
+        except Exception as e:
+            health_status["checks"]["catalog_cache"] = {
+                "status": "warning",
+                "message": f"Catalog cache stats unavailable: {str(e)}"
+            }
+            logger.warning(f"Catalog cache health check failed: {e}")
+        
+        # External catalog providers: circuit breaker state and adaptive timeouts
+        try:
+            search_service = get_book_search_service()
+            providers = {
+                name: getattr(search_service, name).breaker.snapshot() for name in PROVIDERS
+            }
+            degraded = [name for name, state in providers.items() if state["state"] != "closed"]
+            health_status["checks"]["catalog_providers"] = {
+                "status": "warning" if degraded else "healthy",
+                **providers,
+            }
+            if degraded and health_status["status"] == "healthy":
+                health_status["status"] = "warning"
+        except Exception as e:
+            health_status["checks"]["catalog_providers"] = {
+                "status": "warning",
+                "message": f"Catalog provider state unavailable: {str(e)}"
+            }
+            logger.warning(f"Catalog provider health check failed: {e}")
+        
         # System resources check (if available)
         if PSUTIL_AVAILABLE:
             try:
@@ -4,14 +4,19 @@ Módulo de escaneo de libros
 Este módulo proporciona endpoints para escanear libros utilizando códigos de barras y OCR,
 permitiendo a los usuarios identificar libros a partir de imágenes.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List, Optional
 import logging
 
-from app.services.book_scan_service import BookScanService
+from app.config import settings
+from app.services.scan_batch_service import stream_scan_batch
+from app.services.scan_executor import ScanQueueFullError, get_scan_executor
+from app.services.scan_job_service import get_scan_job_service, public_job_view
 from app.services.auth_service import get_current_user
 from app.models.user import User
 from app.schemas.error import ErrorResponse
+from app.utils.uploads import read_upload_capped
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +49,19 @@ error_response_example = {
 }
 
 
+def _scan_queue_full(exc: ScanQueueFullError) -> HTTPException:
+    logger.warning(f"Cola de escaneo llena, Retry-After={exc.retry_after}s")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={
+            "msg": "El servicio de escaneo está saturado, inténtalo de nuevo en unos segundos",
+            "type": "scan_queue_full",
+            "retry_after": exc.retry_after
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @router.post(
     "/book",
     response_model=Dict[str, Any],
@@ -81,7 +99,9 @@ error_response_example = {
             }
         },
         401: {"$ref": "#/components/responses/UnauthorizedError"},
-        500: {"$ref": "#/components/responses/InternalServerError"}
+        500: {"$ref": "#/components/responses/InternalServerError"},
+        413: {"description": "Archivo demasiado grande", "model": ErrorResponse},
+        503: {"description": "Cola de escaneo llena; reintentar tras Retry-After segundos"}
     }
 )
 async def scan_book(
@@ -91,42 +111,12 @@ async def scan_book(
     ),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    # Validar tipo de archivo
-    if not file.content_type or not file.content_type.startswith('image/'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "msg": "El archivo debe ser una imagen (JPG, PNG, JPEG)",
-                "type": "validation_error"
-            }
-        )
-    
-    # Validar tamaño (máximo 10MB)
-    max_size = 10 * 1024 * 1024  # 10MB
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "msg": f"El archivo es demasiado grande. Tamaño máximo permitido: {max_size/1024/1024}MB",
-                "type": "validation_error",
-                "max_size_mb": 10,
-                "actual_size_mb": round(file.size/1024/1024, 2)
-            }
-        )
+    # Validar tipo y tamaño y leer la imagen en un único buffer
+    image_data = await _read_image_upload(file)
     
     try:
-        # Leer datos de la imagen
-        image_data = await file.read()
-        
-        if len(image_data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo está vacío"
-            )
-        
-        # Escanear el libro
-        scan_service = BookScanService()
-        result = scan_service.scan_book(image_data)
+        # Escanear el libro (en el pool de escaneo, fuera del event loop)
+        result = await get_scan_executor().run("scan_book", image_data)
         
         # Añadir información del usuario
         result["scanned_by"] = {
@@ -140,6 +130,8 @@ async def scan_book(
         
     except HTTPException:
         raise
+    except ScanQueueFullError as e:
+        raise _scan_queue_full(e)
     except Exception as e:
         logger.error(f"Error escaneando libro: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -208,7 +200,9 @@ async def scan_book(
             }
         },
         401: {"$ref": "#/components/responses/UnauthorizedError"},
-        500: {"$ref": "#/components/responses/InternalServerError"}
+        500: {"$ref": "#/components/responses/InternalServerError"},
+        413: {"description": "Archivo demasiado grande", "model": ErrorResponse},
+        503: {"description": "Cola de escaneo llena; reintentar tras Retry-After segundos"}
     }
 )
 async def scan_book_multiple_methods(
@@ -218,42 +212,12 @@ async def scan_book_multiple_methods(
     ),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    # Validar tipo de archivo
-    if not file.content_type or not file.content_type.startswith('image/'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "msg": "El archivo debe ser una imagen (JPG, PNG, JPEG)",
-                "type": "validation_error"
-            }
-        )
-    
-    # Validar tamaño (máximo 10MB)
-    max_size = 10 * 1024 * 1024  # 10MB
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "msg": f"El archivo es demasiado grande. Tamaño máximo permitido: {max_size/1024/1024}MB",
-                "type": "validation_error",
-                "max_size_mb": 10,
-                "actual_size_mb": round(file.size/1024/1024, 2)
-            }
-        )
+    # Validar tipo y tamaño y leer la imagen en un único buffer
+    image_data = await _read_image_upload(file)
     
     try:
-        # Leer datos de la imagen
-        image_data = await file.read()
-        
-        if len(image_data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo está vacío"
-            )
-        
-        # Escanear el libro con todos los métodos
-        scan_service = BookScanService()
-        result = scan_service.scan_multiple_methods(image_data)
+        # Escanear el libro con todos los métodos (en el pool de escaneo, fuera del event loop)
+        result = await get_scan_executor().run("scan_multiple_methods", image_data)
         
         # Añadir información del usuario
         result["scanned_by"] = {
@@ -267,9 +231,276 @@ async def scan_book_multiple_methods(
         
     except HTTPException:
         raise
+    except ScanQueueFullError as e:
+        raise _scan_queue_full(e)
     except Exception as e:
         logger.error(f"Error escaneando libro (múltiples métodos): {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
         )
+
+
+_JOB_METHODS = {
+    "book": "scan_book",
+    "multiple": "scan_multiple_methods",
+    "shelf": "scan_shelf",
+}
+
+
+async def _read_image_upload(file: UploadFile) -> memoryview:
+    """
+    Valida tipo y tamaño de la imagen subida y devuelve su contenido.
+    
+    El archivo se lee por bloques y se corta con 413 en cuanto supera
+    SCAN_MAX_FILE_SIZE; el resultado es una vista sobre un único buffer que
+    se pasa tal cual al pipeline de escaneo, sin copias intermedias.
+    """
+    if not file.content_type or not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "msg": "El archivo debe ser una imagen (JPG, PNG, JPEG)",
+                "type": "validation_error"
+            }
+        )
+
+    image_data = await read_upload_capped(file, settings.SCAN_MAX_FILE_SIZE)
+    if len(image_data) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo está vacío"
+        )
+    return image_data
+
+
+@router.post(
+    "/jobs",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Crear un trabajo de escaneo asíncrono",
+    description="""
+    Sube la imagen y devuelve inmediatamente un identificador de trabajo.
+    
+    El escaneo se procesa en segundo plano; consulta `GET /scan/jobs/{job_id}`
+    hasta que el estado sea `completed` o `failed`. Los resultados se conservan
+    durante `SCAN_JOB_TTL_SECONDS`.
+    
+    **Métodos:** `book` (por defecto), `multiple` o `shelf`.
+    
+    **Autenticación requerida:** Sí
+    """,
+    responses={
+        202: {
+            "description": "Trabajo aceptado",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "job_id": "3f2b9c0e8d7a4b6c9e1f0a2b3c4d5e6f",
+                        "status": "queued",
+                        "method": "scan_book",
+                        "status_url": "/scan/jobs/3f2b9c0e8d7a4b6c9e1f0a2b3c4d5e6f"
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Error en la solicitud",
+            "content": {
+                "application/json": {
+                    "example": error_response_example
+                }
+            }
+        }
+    }
+)
+async def create_scan_job(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    file: UploadFile = File(..., description="Imagen del libro (portada o código de barras)"),
+    method: str = Query("book", pattern="^(book|multiple|shelf)$", description="Método de escaneo"),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    image_data = await _read_image_upload(file)
+
+    job_service = get_scan_job_service()
+    scan_method = _JOB_METHODS[method]
+    job = job_service.create_job(method=scan_method, user_id=str(current_user.id))
+    background_tasks.add_task(job_service.run_job, job, image_data)
+
+    response.headers["Location"] = f"/scan/jobs/{job['id']}"
+    return public_job_view(job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=Dict[str, Any],
+    summary="Consultar el estado de un trabajo de escaneo",
+    description="""
+    Devuelve el estado del trabajo (`queued`, `processing`, `completed`, `failed`)
+    y, cuando ha terminado, el mismo resultado que `POST /scan/book`.
+    
+    **Autenticación requerida:** Sí (solo el usuario que creó el trabajo puede consultarlo)
+    """,
+    responses={
+        404: {"description": "Trabajo no encontrado o expirado", "model": ErrorResponse}
+    }
+)
+async def get_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    job = get_scan_job_service().get_job(job_id, user_id=str(current_user.id))
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"msg": "Trabajo de escaneo no encontrado o expirado", "type": "not_found"}
+        )
+    return public_job_view(job)
+
+
+@router.post(
+    "/shelf",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Escanear una estantería o pila de libros",
+    description="""
+    Detecta todos los libros de una sola foto: cada código de barras y cada
+    región de texto de los lomos genera un candidato, y todas las búsquedas en
+    catálogo se resuelven en una única pasada.
+    
+    Para fotos grandes o conexiones inestables se recomienda `POST /scan/jobs?method=shelf`.
+    
+    **Autenticación requerida:** Sí
+    """,
+    responses={
+        200: {
+            "description": "Candidatos detectados en la imagen",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "candidates": [
+                            {
+                                "method": "barcode",
+                                "isbn": "9788490626464",
+                                "title": "El Principito",
+                                "author": "Antoine de Saint-Exupéry",
+                                "region": {"x": 120, "y": 40, "width": 310, "height": 160},
+                                "search_results": []
+                            }
+                        ],
+                        "count": 1,
+                        "success": True,
+                        "error": None
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Error en la solicitud",
+            "content": {
+                "application/json": {
+                    "example": error_response_example
+                }
+            }
+        },
+        413: {"description": "Archivo demasiado grande", "model": ErrorResponse},
+        503: {"description": "Cola de escaneo llena; reintentar tras Retry-After segundos"}
+    }
+)
+async def scan_shelf(
+    file: UploadFile = File(..., description="Foto de la estantería o pila de libros"),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    image_data = await _read_image_upload(file)
+
+    try:
+        result = await get_scan_executor().run("scan_shelf", image_data)
+    except ScanQueueFullError as e:
+        raise _scan_queue_full(e)
+    except Exception as e:
+        logger.error(f"Error escaneando estantería: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "msg": "Error interno del servidor al procesar la imagen",
+                "type": "server_error"
+            }
+        )
+
+    result["scanned_by"] = {
+        "user_id": str(current_user.id),
+        "username": current_user.username
+    }
+    logger.info(f"Estantería escaneada por usuario {current_user.username}: {result.get('count')} candidatos")
+    return result
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Escanear varias imágenes en una sola petición",
+    description="""
+    Recibe varias imágenes en un único multipart (campo `files` repetido) y las
+    escanea en paralelo en el pool de escaneo.
+    
+    La respuesta es NDJSON (`application/x-ndjson`): una línea por imagen, emitida
+    en cuanto termina su escaneo, por lo que **el orden no es el de entrada**.
+    Cada línea lleva el `index` de la imagen en la petición y, o bien `result`
+    (igual que `POST /scan/book`), o bien `error`.
+    
+    **Límite:** `SCAN_BATCH_MAX_FILES` imágenes por petición, 10MB cada una.
+    
+    **Autenticación requerida:** Sí
+    """,
+    responses={
+        200: {
+            "description": "Resultados en streaming, una línea JSON por imagen",
+            "content": {
+                "application/x-ndjson": {
+                    "example": (
+                        '{"index": 1, "filename": "b.jpg", "result": {"success": true, "isbn": "9788490626464"}}\n'
+                        '{"index": 0, "filename": "a.jpg", "error": {"msg": "El archivo está vacío", "type": "validation_error"}}\n'
+                    )
+                }
+            }
+        },
+        400: {
+            "description": "Demasiadas imágenes en el lote",
+            "content": {
+                "application/json": {
+                    "example": error_response_example
+                }
+            }
+        }
+    }
+)
+async def scan_batch(
+    files: List[UploadFile] = File(..., description="Imágenes de los libros"),
+    method: str = Query("book", pattern="^(book|multiple)$", description="Método de escaneo"),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    if len(files) > settings.SCAN_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "msg": f"Demasiadas imágenes en el lote. Máximo permitido: {settings.SCAN_BATCH_MAX_FILES}",
+                "type": "validation_error",
+                "max_files": settings.SCAN_BATCH_MAX_FILES
+            }
+        )
+
+    # Una imagen no válida no invalida el lote: su línea lleva el error
+    items = []
+    for index, file in enumerate(files):
+        try:
+            items.append((index, file.filename, await _read_image_upload(file), None))
+        except HTTPException as e:
+            error = e.detail if isinstance(e.detail, dict) else {"msg": e.detail, "type": "validation_error"}
+            items.append((index, file.filename, None, error))
+
+    logger.info(f"Escaneo por lotes de {len(files)} imágenes por usuario {current_user.username}")
+    return StreamingResponse(
+        stream_scan_batch(items, _JOB_METHODS[method]),
+        media_type="application/x-ndjson"
+    )
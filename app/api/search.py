@@ -9,8 +9,10 @@ from fastapi import APIRouter, Query, HTTPException, status, Depends
 import logging
 import os
 
-from app.services.book_search_service import BookSearchService
+from app.services.book_search_service import get_book_search_service
 from app.schemas.error import ErrorResponse
+from app.schemas.search import IsbnBatchRequest
+from app.utils.isbn import clean_isbn, is_valid_isbn
 from app.services.auth_service import get_current_user
 from app.models.user import User
 
@@ -125,7 +127,7 @@ async def search_books(
         HTTPException: 404 si no se encuentran resultados.
         HTTPException: 500 si hay un error en el servicio de búsqueda.
     """
-    service = BookSearchService()
+    service = get_book_search_service()
     
     # Limpiar el término de búsqueda
     cleaned = q.strip() if q else ""
@@ -151,9 +153,9 @@ async def search_books(
     
     try:
         if is_isbn and cleaned_isbn:  # Solo buscar por ISBN si hay un ISBN válido
-            results = service.search(isbn=cleaned_isbn, limit=limit)
+            results = await service.asearch(isbn=cleaned_isbn, limit=limit)
         elif cleaned:  # Si hay un término de búsqueda, buscar por título
-            results = service.search(title=cleaned, limit=limit)
+            results = await service.asearch(title=cleaned, limit=limit)
         else:  # Si no hay término de búsqueda, devolver lista vacía
             return []
         
@@ -191,3 +193,74 @@ async def search_books(
         )
 
 
+@router.post(
+    "/isbn/batch",
+    response_model=Dict[str, List[Dict[str, Any]]],
+    status_code=status.HTTP_200_OK,
+    summary="Buscar muchos libros por ISBN",
+    description="""
+    Resuelve de una vez una lista de ISBN (p. ej. al importar una biblioteca).
+
+    Devuelve un objeto con cada ISBN recibido como clave y, como valor, la misma
+    lista de resultados que daría `GET /search/books?q=<isbn>`. Los ISBN no válidos
+    o sin resultados se devuelven con una lista vacía.
+
+    Los aciertos de caché se leen en una sola operación y los fallos se consultan
+    a los proveedores por lotes, así que es mucho más rápido que una búsqueda por ISBN.
+    """,
+    responses={
+        200: {
+            "description": "Resultados por ISBN",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "978-84-01-35283-6": [{
+                            "title": "El nombre del viento",
+                            "authors": ["Patrick Rothfuss"],
+                            "isbn": "9788401352836",
+                            "source": "openlibrary"
+                        }],
+                        "0000000000": []
+                    }
+                }
+            }
+        },
+        422: {
+            "description": "Lista vacía o con más ISBN de los permitidos",
+            "model": ErrorResponse
+        }
+    }
+)
+async def search_isbn_batch(
+    payload: IsbnBatchRequest,
+    current_user: Optional[User] = Depends(current_user_dependency)
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Busca muchos libros por ISBN en una sola petición.
+
+    Args:
+        payload (IsbnBatchRequest): ISBN a buscar y límite de resultados por ISBN.
+        current_user (User): Usuario autenticado.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Resultados por cada ISBN recibido.
+
+    Raises:
+        HTTPException: 500 si hay un error en el servicio de búsqueda.
+    """
+    service = get_book_search_service()
+    cleaned = {raw: clean_isbn(raw) for raw in payload.isbns}
+    valid = [isbn for isbn in dict.fromkeys(cleaned.values()) if is_valid_isbn(isbn)]
+
+    logger.info("Búsqueda de libros por lotes: isbns=%d, válidos=%d", len(cleaned), len(valid))
+
+    try:
+        found = await service.asearch_isbns(valid, limit=payload.limit) if valid else {}
+    except Exception as e:
+        logger.error("Error en la búsqueda de libros por lotes: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"msg": "Error en el servicio de búsqueda", "type": "search_error"}
+        )
+
+    return {raw: found.get(isbn, []) for raw, isbn in cleaned.items()}
@@ -19,21 +19,84 @@ class Settings(BaseSettings):
     
     # APIs externas
     OPENLIBRARY_BASE_URL: str = "https://openlibrary.org"
+    OPENLIBRARY_EDITIONS_TIMEOUT_SECONDS: float = 3.0  # Petición única de ediciones de una página de resultados
+    OPENLIBRARY_BIBKEYS_BATCH_SIZE: int = 50  # ISBN por petición /api/books en las búsquedas por lotes
+    OPENLIBRARY_AUTHOR_TIMEOUT_SECONDS: float = 2.0
+    OPENLIBRARY_AUTHOR_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # Nombres de autor: 30 días
     GOOGLE_BOOKS_API_KEY: Optional[str] = None
     REDIS_URL: Optional[str] = "redis://localhost:6379/0"
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     CACHE_TTL_SECONDS: int = 6 * 60 * 60  # 6 horas
+    SEARCH_NEGATIVE_CACHE_TTL_SECONDS: int = 10 * 60  # Búsquedas sin resultados: 10 minutos
+    SEARCH_STALE_WHILE_REVALIDATE_SECONDS: int = 24 * 60 * 60  # Tras caducar, se sirve y se refresca en segundo plano
+    CATALOG_LOCAL_CACHE_MAX_ENTRIES: int = 2048  # LRU en memoria de cada proceso, delante de Redis
+    CATALOG_LOCAL_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    CATALOG_LOCAL_CACHE_TTL_SECONDS: int = 60  # Lo escrito por otros workers se ve pasado este tiempo
+    CATALOG_CACHE_COMPRESS_MIN_BYTES: int = 256  # Entradas de búsqueda en Redis comprimidas con zlib desde este tamaño
+    LOCAL_CATALOG_ENABLED: bool = True  # Buscar ISBN en el catálogo importado antes que en los proveedores
+    CATALOG_IMPORT_CHUNK_SIZE: int = 5000  # Registros por bloque (y checkpoint) al importar volcados
+    SEARCH_BATCH_CONCURRENCY: int = 8  # Búsquedas simultáneas en consultas por lotes
+    SEARCH_WARM_ENABLED: bool = True  # Calentar la caché de catálogo con una tarea programada
+    SEARCH_WARM_CRON_HOUR: int = 4  # Hora (del servidor) de la ventana valle en que se calienta
+    SEARCH_WARM_ON_STARTUP: bool = False  # Calentar también unos minutos después de arrancar (tras un despliegue)
+    SEARCH_WARM_MAX_SECONDS: int = 3600  # Duración máxima de un calentado
+    SEARCH_WARM_QUERIES_PER_SECOND: float = 1.0  # Consultas a proveedores por segundo al calentar
+    SEARCH_WARM_TOP_QUERIES: int = 500  # Búsquedas más frecuentes que se calientan
+    SEARCH_WARM_QUERY_DAYS: int = 7  # Días de historial de búsquedas que se consideran
+    SEARCH_POPULAR_FLUSH_SECONDS: int = 30  # Cada cuánto vuelca cada proceso sus recuentos a Redis
+    SEARCH_ISBN_BATCH_MAX_ITEMS: int = 500  # ISBN por petición a POST /search/isbn/batch
+    SEARCH_PROVIDER_STRATEGY: str = "fallback"  # "fallback" (OpenLibrary y luego Google Books) o "parallel"
+    SEARCH_LATENCY_BUDGET_SECONDS: float = 2.5  # Modo "parallel": se devuelve lo que haya llegado en este plazo
+    SEARCH_SINGLE_FLIGHT_LOCK_SECONDS: float = 15.0  # Lock en Redis mientras un worker consulta a los proveedores
+    # Cliente HTTP compartido para OpenLibrary / Google Books
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True  # Solo si está instalado httpx[http2]
+    # Circuit breaker por proveedor de catálogo (OpenLibrary, Google Books)
+    PROVIDER_BREAKER_WINDOW_SIZE: int = 20  # Últimas llamadas consideradas
+    PROVIDER_BREAKER_WINDOW_SECONDS: float = 60.0  # Y solo las de este último minuto
+    PROVIDER_BREAKER_MIN_CALLS: int = 5
+    PROVIDER_BREAKER_FAILURE_RATIO: float = 0.5  # Proporción de fallos que abre el circuito
+    PROVIDER_BREAKER_OPEN_SECONDS: float = 30.0  # Tiempo abierto antes de la llamada de prueba
+    PROVIDER_SLOW_CALL_SECONDS: float = 5.0  # Respuestas más lentas cuentan como fallo
+    PROVIDER_TIMEOUT_P95_MULTIPLIER: float = 2.0  # Timeout adaptativo: p95 observado por este factor
+    PROVIDER_TIMEOUT_MIN_SECONDS: float = 1.0
     
     # Configuración de la aplicación
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
     PREFER_ALEMBIC_DB_URL: bool = True
     
+    # Escaneo / OCR
+    OCR_READER_POOL_SIZE: int = 1  # Lectores EasyOCR por proceso
+    OCR_READER_CHECKOUT_TIMEOUT_SECONDS: float = 30.0
+    OCR_WARMUP_ON_STARTUP: bool = True
+    SCAN_WORKER_PROCESSES: int = 2  # 0 = escanear en un hilo del propio proceso
+    SCAN_QUEUE_MAX_PENDING: int = 8  # Escaneos en espera antes de responder 503
+    SCAN_RETRY_AFTER_SECONDS: int = 5
+    SCAN_JOB_TTL_SECONDS: int = 60 * 60  # Resultados de trabajos de escaneo: 1 hora
+    SCAN_JOB_TIMEOUT_SECONDS: int = 5 * 60
+    SCAN_MAX_IMAGE_EDGE: int = 1600  # Lado máximo (px) al que se reduce la imagen antes de escanear
+    SCAN_SHELF_MAX_IMAGE_EDGE: int = 2800  # Las fotos de estantería conservan más resolución para los lomos
+    SCAN_SHELF_MAX_CANDIDATES: int = 60
+    SCAN_BATCH_MAX_FILES: int = 20  # Imágenes por petición en /scan/batch
+    SCAN_MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB por imagen; las subidas mayores se cortan con 413
+    SCAN_RESULT_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # Resultados por hash perceptual: 24 horas
+    SCAN_RESULT_CACHE_MAX_DISTANCE: int = 12  # Bits distintos (de 256) para considerar dos fotos iguales; 0 = solo exactas
+    
     # Configuración de archivos
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
+    COVER_PROXY_ALLOWED_HOSTS: str = "covers.openlibrary.org,archive.org,books.google.com,books.googleusercontent.com"
+    COVER_FETCH_TIMEOUT_SECONDS: float = 5.0
+    COVER_MAX_SOURCE_BYTES: int = 5 * 1024 * 1024  # Portada original más grande que se descarga
+    COVER_FAILURE_TTL_SECONDS: int = 600  # Tras una descarga fallida no se reintenta hasta pasado este tiempo
+    COVER_CACHE_MAX_AGE_SECONDS: int = 7 * 24 * 60 * 60  # Cache-Control de /covers; después se revalida con el ETag
     
     # CORS Configuration
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001"
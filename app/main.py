@@ -18,6 +18,7 @@ from app.middleware.error_handler import (
     database_exception_handler, auth_exception_handler,
     BusinessLogicError, DatabaseError, AuthenticationError, AuthorizationError
 )
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi import HTTPException
@@ -26,6 +27,7 @@ from app.api.users import router as users_router
 from app.api.books import router as books_router
 from app.api.loans import router as loans_router
 from app.api.search import router as search_router
+from app.api.covers import router as covers_router
 from app.api.scan import router as scan_router
 from app.api.groups import router as groups_router
 from app.api.group_books import router as group_books_router
@@ -36,6 +38,9 @@ from app.api.search_enhanced import router as search_enhanced_router
 from app.api.reviews import router as reviews_router
 from app.api.notifications import router as notifications_router
 from app.scheduler import start_scheduler, stop_scheduler
+from app.services.ocr_reader_pool import warmup_ocr_reader_pool_in_background
+from app.services.scan_executor import get_scan_executor, shutdown_scan_executor
+from app.services.http_client import close_http_clients
 from app.database import engine, Base
 
 # Initialize comprehensive logging system
@@ -110,6 +115,10 @@ app = FastAPI(
             "name": "scan",
             "description": "Escaneo de códigos de barras y OCR para libros"
         },
+        {
+            "name": "covers",
+            "description": "Portadas de libros servidas desde la caché en disco"
+        },
         {
             "name": "chat",
             "description": "Sistema de mensajería entre usuarios"
@@ -147,6 +156,15 @@ app.add_exception_handler(AuthenticationError, auth_exception_handler)
 app.add_exception_handler(AuthorizationError, auth_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
+# Cut oversized uploads off while they stream in (added before CORS so 413s keep CORS headers)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/scan": settings.SCAN_MAX_FILE_SIZE,
+        "/scan/batch": settings.SCAN_BATCH_MAX_FILES * settings.SCAN_MAX_FILE_SIZE,
+    },
+)
+
 # Configure CORS with production security
 import re
 
@@ -179,6 +197,7 @@ app.include_router(reviews_router, prefix="/reviews", tags=["reviews"])
 app.include_router(books_router, prefix="/books", tags=["books"])
 app.include_router(loans_router)
 app.include_router(search_router)  # Búsqueda en APIs externas (OpenLibrary, Google Books) para AGREGAR libros
+app.include_router(covers_router)  # Portadas cacheadas en disco (WebP)
 app.include_router(scan_router)
 app.include_router(groups_router)
 app.include_router(group_books_router)
@@ -225,6 +244,16 @@ async def startup_event():
         except Exception:
             logger.exception("Schema creation via SQLAlchemy metadata failed")
 
+    # Precargar los lectores OCR para que el primer escaneo no pague la carga del modelo.
+    # Con workers de escaneo dedicados, cada proceso worker calienta su propio pool.
+    if settings.OCR_WARMUP_ON_STARTUP and os.getenv("TESTING") != "true":
+        if settings.SCAN_WORKER_PROCESSES > 0:
+            get_scan_executor().start()
+            logger.info("Scan worker processes starting (workers=%s)", settings.SCAN_WORKER_PROCESSES)
+        else:
+            warmup_ocr_reader_pool_in_background()
+            logger.info("OCR reader pool warmup started (size=%s)", settings.OCR_READER_POOL_SIZE)
+
     # Iniciar scheduler de tareas programadas
     try:
         start_scheduler()
@@ -245,6 +274,18 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Failed to stop scheduler: {str(e)}")
 
+    # Detener workers de escaneo
+    try:
+        shutdown_scan_executor()
+    except Exception as e:
+        logger.error(f"Failed to stop scan executor: {str(e)}")
+
+    # Cerrar las conexiones HTTP compartidas con los proveedores externos
+    try:
+        await close_http_clients()
+    except Exception as e:
+        logger.error(f"Failed to close HTTP clients: {str(e)}")
+
 
 @app.get("/")
 async def root():
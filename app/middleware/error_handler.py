@@ -32,7 +32,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
             "message": exc.detail,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "path": str(request.url.path)
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
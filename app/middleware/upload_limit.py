@@ -0,0 +1,82 @@
+"""
+Request body size limits for upload endpoints
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+from typing import Dict, Optional
+
+from app.utils.uploads import upload_too_large
+
+logger = logging.getLogger(__name__)
+
+# Multipart boundaries, part headers and small form fields on top of the files
+MULTIPART_OVERHEAD = 64 * 1024
+
+_BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized request bodies before they are buffered.
+
+    Starlette spools every multipart file to memory/disk before the endpoint
+    runs, so a per-file check in the handler only fires after the whole body
+    has been received. This middleware checks ``Content-Length`` up front and
+    counts the bytes actually received, raising a 413 ``HTTPException`` from
+    ``receive`` as soon as the limit for the path is exceeded. FastAPI re-raises
+    it while parsing the body, so the regular exception handlers format it.
+
+    ``limits`` maps path prefixes to the maximum upload size in bytes; the
+    longest matching prefix wins and paths without a match are not limited.
+    ``MULTIPART_OVERHEAD`` is allowed on top so the framing of a maximum-size
+    file does not trip the limit.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]) -> None:
+        self.app = app
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in _BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = _content_length(scope)
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            if declared is not None and declared > limit + MULTIPART_OVERHEAD:
+                logger.warning(f"Upload rejected by Content-Length ({declared} bytes) on {scope['path']}")
+                raise upload_too_large(limit, declared)
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit + MULTIPART_OVERHEAD:
+                    logger.warning(f"Upload aborted after {received} bytes on {scope['path']}")
+                    raise upload_too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _content_length(scope: Scope) -> Optional[int]:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
@@ -7,4 +7,5 @@ from app.models.invitation import Invitation  # noqa: F401
 from app.models.book import Book  # noqa: F401
 from app.models.loan import Loan  # noqa: F401
 from app.models.review import Review  # noqa: F401
-from app.models.notification import Notification  # noqa: F401
\ No newline at end of file
+from app.models.notification import Notification  # noqa: F401
+from app.models.catalog import CatalogEdition, CatalogAuthor  # noqa: F401
@@ -0,0 +1,42 @@
+"""
+Catálogo local de ediciones importado de los volcados de OpenLibrary
+"""
+from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class CatalogEdition(Base):
+    """Una fila por ISBN-13: una edición con ISBN-10 e ISBN-13 se guarda una vez."""
+    __tablename__ = "catalog_editions"
+
+    isbn13 = Column(String(13), primary_key=True)
+    edition_key = Column(String(32), nullable=False)  # OL...M
+    work_key = Column(String(32), nullable=True)  # OL...W
+    title = Column(String(500), nullable=False)
+    author_keys = Column(JSON, nullable=True)  # ["OL...A", ...], nombres en catalog_authors
+    publisher = Column(String(255), nullable=True)
+    published_date = Column(String(50), nullable=True)
+    page_count = Column(Integer, nullable=True)
+    language = Column(String(10), nullable=True)
+    cover_id = Column(Integer, nullable=True)
+    description = Column(Text, nullable=True)  # De la obra (works), si el volcado la incluye
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_catalog_editions_work_key", "work_key"),
+    )
+
+    def __repr__(self):
+        return f"<CatalogEdition {self.isbn13} - {self.title}>"
+
+
+class CatalogAuthor(Base):
+    __tablename__ = "catalog_authors"
+
+    key = Column(String(32), primary_key=True)  # OL...A
+    name = Column(String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<CatalogAuthor {self.key} - {self.name}>"
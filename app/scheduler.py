@@ -2,8 +2,13 @@
 Configuración de APScheduler para tareas programadas
 """
 import logging
+from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+
+from app.config import settings
+from app.tasks.cache_warming import warm_catalog_cache
 
 from app.tasks.notification_tasks import (
     check_due_date_reminders,
@@ -57,6 +62,31 @@ def start_scheduler():
         replace_existing=True
     )
     logger.info("Scheduled task: cleanup_old_notifications (weekly on Sunday at 2:00 AM)")
+
+    # Tarea 4: Calentar la caché de catálogo (búsquedas populares + ISBN de la biblioteca)
+    # Se ejecuta todos los días en la ventana valle (SEARCH_WARM_CRON_HOUR)
+    if settings.SEARCH_WARM_ENABLED:
+        scheduler.add_job(
+            warm_catalog_cache,
+            trigger=CronTrigger(hour=settings.SEARCH_WARM_CRON_HOUR, minute=30),
+            id='warm_catalog_cache',
+            name='Warm catalog cache',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        logger.info("Scheduled task: warm_catalog_cache (daily at %s:30)", settings.SEARCH_WARM_CRON_HOUR)
+
+        # Tras un despliegue, opcionalmente, un calentado unos minutos después de arrancar
+        if settings.SEARCH_WARM_ON_STARTUP:
+            scheduler.add_job(
+                warm_catalog_cache,
+                trigger=DateTrigger(run_date=datetime.now() + timedelta(minutes=2)),
+                id='warm_catalog_cache_startup',
+                name='Warm catalog cache after startup',
+                replace_existing=True
+            )
+            logger.info("Scheduled task: warm_catalog_cache_startup (in 2 minutes)")
     
     # Iniciar scheduler
     scheduler.start()
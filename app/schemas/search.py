@@ -0,0 +1,13 @@
+"""
+Schemas Pydantic para la búsqueda en catálogos externos
+"""
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+
+
+class IsbnBatchRequest(BaseModel):
+    isbns: List[str] = Field(..., min_length=1, max_length=settings.SEARCH_ISBN_BATCH_MAX_ITEMS)
+    limit: int = Field(5, ge=1, le=20, description="Resultados máximos por ISBN")
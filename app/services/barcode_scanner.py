@@ -1,11 +1,14 @@
 """Servicio para escanear códigos de barras en imágenes de libros."""
 
 import logging
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
+from app.services.image_preprocessing import PreprocessedImage
+from app.utils.isbn import clean_isbn, is_valid_isbn
+
 logger = logging.getLogger(__name__)
 
 try:  # pragma: no cover - comportamiento dependiente del entorno
@@ -27,86 +30,260 @@ except ImportError:  # pragma: no cover - ruta ejecutada solo si falta libzbar
 
     pyzbar = _PyzbarStub()  # type: ignore
     logger.warning(
-        "pyzbar/zbar no está disponible; el escaneo de códigos de barras se deshabilitará en este entorno."
+        "pyzbar/zbar no está disponible; se usará el detector de códigos de barras de OpenCV."
     )
 
 
+# Tipos que devuelve el detector de OpenCV, con el nombre que usa zbar
+_OPENCV_TYPES = {"EAN_13": "EAN13", "EAN_8": "EAN8", "UPC_A": "UPC_A", "UPC_E": "UPC_E"}
+
+# Una transformación de la cascada: imagen a decodificar y matriz afín
+# (original -> variante) para devolver las posiciones en coordenadas originales
+_Variant = Tuple[np.ndarray, Optional[np.ndarray]]
+
+
 class BarcodeScanner:
     def __init__(self):
         self.supported_formats = ['EAN13', 'EAN8', 'ISBN13', 'ISBN10', 'UPC_A', 'UPC_E']
+        self._opencv_detector = None
 
-    def scan_barcodes(self, image_data: bytes) -> List[str]:
+    def scan_barcodes(
+        self,
+        image_data: Union[bytes, PreprocessedImage],
+        stop_at_first_isbn: bool = False,
+    ) -> List[str]:
         """
         Escanea códigos de barras en una imagen.
         
         Args:
-            image_data: Bytes de la imagen
+            image_data: Bytes de la imagen o imagen ya preprocesada
+            stop_at_first_isbn: Cortar la cascada en cuanto aparezca un ISBN válido
             
         Returns:
             Lista de códigos encontrados (ISBNs, EANs, etc.)
         """
-        try:
-            # Convertir bytes a imagen OpenCV
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                logger.warning("No se pudo decodificar la imagen")
-                return []
-            
-            # Detectar códigos de barras
-            barcodes = pyzbar.decode(image)
+        return [
+            barcode["code"]
+            for barcode in self.detect_barcodes(image_data, stop_at_first_isbn=stop_at_first_isbn)
+        ]
+
+    def detect_barcodes(
+        self,
+        image_data: Union[bytes, PreprocessedImage],
+        stop_at_first_isbn: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Detecta códigos de barras de libros junto con su posición en la imagen.
+        
+        Prueba una cascada de variantes de la imagen (gris, contraste, umbral,
+        rotaciones y escalas), de la más barata a la más cara, para que los
+        códigos girados o con poco contraste no acaben en el OCR.
+        
+        Args:
+            image_data: Bytes de la imagen o imagen ya preprocesada
+            stop_at_first_isbn: Cortar la cascada en cuanto aparezca un ISBN válido
             
-            codes = []
-            for barcode in barcodes:
-                # Obtener el tipo y datos del código
-                barcode_type = barcode.type
-                barcode_data = barcode.data.decode('utf-8')
+        Returns:
+            Lista de diccionarios con ``code``, ``type`` y ``rect`` (x, y, width, height)
+        """
+        try:
+            if isinstance(image_data, PreprocessedImage):
+                source = image_data
+                variants = self._variants(source)
+            else:
+                # Convertir bytes a imagen OpenCV
+                nparr = np.frombuffer(image_data, np.uint8)
+                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
                 
-                logger.info(f"Código detectado: {barcode_type} = {barcode_data}")
+                if image is None:
+                    logger.warning("No se pudo decodificar la imagen")
+                    return []
                 
-                # Filtrar solo códigos de libros
-                if barcode_type in self.supported_formats:
-                    codes.append(barcode_data)
-            
-            return codes
-            
+                source = PreprocessedImage(image, (image.shape[1], image.shape[0]))
+                # El primer intento usa la imagen tal cual se decodificó
+                variants = [("original", lambda: (image, None))] + self._variants(source)[1:]
         except Exception as e:
             logger.error(f"Error escaneando códigos de barras: {e}")
             return []
+        
+        found: List[Dict[str, Any]] = []
+        seen = set()
+        for name, build in variants:
+            try:
+                variant, matrix = build()
+                detections = self._decode(variant)
+            except Exception as e:
+                logger.debug(f"Variante {name} descartada: {e}")
+                continue
+            
+            for barcode_type, barcode_data, corners in detections:
+                logger.info(f"Código detectado ({name}): {barcode_type} = {barcode_data}")
+                
+                # Filtrar solo códigos de libros
+                if barcode_type not in self.supported_formats or barcode_data in seen:
+                    continue
+                seen.add(barcode_data)
+                found.append({
+                    "code": barcode_data,
+                    "type": barcode_type,
+                    "rect": self._corners_to_rect(corners, matrix),
+                })
+            
+            if stop_at_first_isbn and any(self.is_isbn(barcode["code"]) for barcode in found):
+                break
+        
+        return found
 
-    def extract_isbn(self, image_data: bytes) -> Optional[str]:
+    def _variants(self, source: PreprocessedImage) -> List[Tuple[str, Callable[[], _Variant]]]:
+        # Cada variante se construye solo si las anteriores no han encontrado nada
+        return [
+            ("gray", lambda: (source.gray, None)),
+            ("contrast", lambda: (source.contrast, None)),
+            ("threshold", lambda: (self._threshold(source.gray), None)),
+            ("rotate_45", lambda: self._rotate(source.gray, 45)),
+            ("rotate_-45", lambda: self._rotate(source.gray, -45)),
+            ("scale_2", lambda: self._scale(source.gray, 2.0)),
+            ("scale_0.5", lambda: self._scale(source.gray, 0.5)),
+        ]
+
+    @staticmethod
+    def _threshold(gray: np.ndarray) -> np.ndarray:
+        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+        _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binary
+
+    @staticmethod
+    def _rotate(gray: np.ndarray, angle: float) -> _Variant:
+        height, width = gray.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        # Ampliar el lienzo para no recortar las esquinas
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_width = int(height * sin + width * cos)
+        new_height = int(height * cos + width * sin)
+        matrix[0, 2] += new_width / 2 - width / 2
+        matrix[1, 2] += new_height / 2 - height / 2
+        rotated = cv2.warpAffine(gray, matrix, (new_width, new_height), borderValue=255)
+        return rotated, matrix
+
+    @staticmethod
+    def _scale(gray: np.ndarray, factor: float) -> _Variant:
+        interpolation = cv2.INTER_CUBIC if factor > 1 else cv2.INTER_AREA
+        scaled = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=interpolation)
+        return scaled, np.array([[factor, 0, 0], [0, factor, 0]], dtype=np.float64)
+
+    def _decode(self, image: np.ndarray) -> List[Tuple[str, str, Any]]:
+        try:
+            barcodes = pyzbar.decode(image)
+        except ImportError:
+            # Sin libzbar: detector de códigos de barras integrado en OpenCV
+            return self._decode_with_opencv(image)
+        
+        return [
+            (barcode.type, barcode.data.decode('utf-8'), self._rect_corners(getattr(barcode, "rect", None)))
+            for barcode in barcodes
+        ]
+
+    def _decode_with_opencv(self, image: np.ndarray) -> List[Tuple[str, str, Any]]:
+        if self._opencv_detector is None:
+            if not hasattr(cv2, "barcode"):
+                logger.warning("Ni zbar ni el detector de OpenCV están disponibles")
+                return []
+            self._opencv_detector = cv2.barcode.BarcodeDetector()
+        
+        ok, codes, types, points = self._opencv_detector.detectAndDecodeWithType(image)
+        if not ok:
+            return []
+        
+        return [
+            (_OPENCV_TYPES.get(barcode_type, barcode_type), code, points[i] if points is not None else None)
+            for i, (code, barcode_type) in enumerate(zip(codes, types))
+            if code
+        ]
+
+    @staticmethod
+    def _rect_corners(rect: Any) -> Optional[np.ndarray]:
+        try:
+            left, top, width, height = int(rect.left), int(rect.top), int(rect.width), int(rect.height)
+        except Exception:
+            return None
+        return np.array(
+            [[left, top], [left + width, top], [left + width, top + height], [left, top + height]],
+            dtype=np.float64,
+        )
+
+    @staticmethod
+    def _corners_to_rect(corners: Any, matrix: Optional[np.ndarray]) -> Optional[Dict[str, int]]:
+        """Rectángulo (x, y, width, height) en coordenadas de la imagen sin transformar."""
+        if corners is None:
+            return None
+        try:
+            points = np.asarray(corners, dtype=np.float64).reshape(-1, 2)
+            if matrix is not None:
+                inverse = cv2.invertAffineTransform(matrix)
+                points = points @ inverse[:, :2].T + inverse[:, 2]
+            left, top = points.min(axis=0)
+            right, bottom = points.max(axis=0)
+            return {
+                "x": int(round(left)),
+                "y": int(round(top)),
+                "width": int(round(right - left)),
+                "height": int(round(bottom - top)),
+            }
+        except Exception:
+            return None
+
+    def extract_isbn(self, image_data: Union[bytes, PreprocessedImage]) -> Optional[str]:
         """
         Extrae el ISBN de una imagen de libro.
         
         Args:
-            image_data: Bytes de la imagen
+            image_data: Bytes de la imagen o imagen ya preprocesada
             
         Returns:
-            ISBN encontrado o None
+            ISBN encontrado (con dígito de control válido) o None
         """
-        codes = self.scan_barcodes(image_data)
+        codes = self.scan_barcodes(image_data, stop_at_first_isbn=True)
         
         # Buscar ISBN en los códigos encontrados
         for code in codes:
             # Limpiar el código (quitar guiones, espacios)
-            clean_code = code.replace('-', '').replace(' ', '')
+            clean_code = clean_isbn(code)
             
-            # Verificar si es un ISBN válido (10 o 13 dígitos)
-            if clean_code.isdigit() and len(clean_code) in [10, 13]:
+            # Descartar EAN de otros productos y lecturas erróneas
+            if self.is_isbn(clean_code):
                 return clean_code
         
         return None
 
+    def extract_isbns(self, image_data: Union[bytes, PreprocessedImage]) -> List[Dict[str, Any]]:
+        """
+        Extrae todos los ISBN distintos de una imagen (p. ej. una pila de libros).
+        
+        Args:
+            image_data: Bytes de la imagen o imagen ya preprocesada
+            
+        Returns:
+            Lista de diccionarios con ``isbn`` y ``rect``, sin duplicados y en orden de detección
+        """
+        seen = set()
+        found = []
+        for barcode in self.detect_barcodes(image_data):
+            clean_code = clean_isbn(barcode["code"])
+            if self.is_isbn(clean_code) and clean_code not in seen:
+                seen.add(clean_code)
+                found.append({"isbn": clean_code, "rect": barcode["rect"]})
+        return found
+
     def is_isbn(self, code: str) -> bool:
         """
         Verifica si un código es un ISBN válido.
         
+        Comprueba la longitud y el dígito de control de ISBN-10/ISBN-13.
+        
         Args:
             code: Código a verificar
             
         Returns:
             True si es ISBN válido
         """
-        clean_code = code.replace('-', '').replace(' ', '')
-        return clean_code.isdigit() and len(clean_code) in [10, 13]
+        return is_valid_isbn(code)
@@ -4,9 +4,12 @@ Servicio unificado para escanear libros: códigos de barras + OCR.
 from typing import Dict, List, Optional, Any
 import logging
 
+from app.config import settings
 from app.services.barcode_scanner import BarcodeScanner
 from app.services.ocr_service import OCRService
 from app.services.book_search_service import BookSearchService
+from app.services.image_preprocessing import PreprocessedImage, preprocess_image
+from app.services.scan_result_cache import ScanResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +20,77 @@ class BookScanService:
         barcode_scanner: Optional[BarcodeScanner] = None,
         ocr_service: Optional[OCRService] = None,
         search_service: Optional[BookSearchService] = None,
+        result_cache: Optional[ScanResultCache] = None,
     ):
         self.barcode_scanner = barcode_scanner or BarcodeScanner()
         self.ocr_service = ocr_service or OCRService()
         self.search_service = search_service or BookSearchService()
+        self.result_cache = result_cache or ScanResultCache()
+
+    def _preprocess(self, image_data: bytes):
+        # Si no podemos decodificarla, cada consumidor recibe los bytes tal cual
+        # y reporta su propio error, como antes del preprocesado compartido.
+        return preprocess_image(image_data) or image_data
+
+    def _image_hash(self, image) -> Optional[int]:
+        if not isinstance(image, PreprocessedImage):
+            return None
+        try:
+            return self.result_cache.image_hash(image)
+        except Exception as e:
+            logger.debug(f"No se pudo calcular el hash perceptual: {e}")
+            return None
+
+    # Lo que sale de la propia imagen; la búsqueda en catálogo se repite en cada
+    # acierto (tiene su propia caché, con TTL negativo corto si no encontró nada)
+    _IMAGE_FIELDS = ("method", "isbn", "title", "author")
+
+    def _cached_scan(self, image, image_hash: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve lo extraído en un escaneo previo de la misma foto (o casi igual).
+        
+        Dos fotos de códigos de barras distintos pueden tener hashes cercanos, así
+        que en coincidencias no exactas se confirma el ISBN (decodificar el código
+        es barato) antes de reutilizar el resultado.
+        """
+        if image_hash is None:
+            return None
+        
+        hit = self.result_cache.get(image_hash, "scan_book")
+        if hit is None:
+            return None
+        
+        cached = hit["result"]
+        if cached.get("method") not in ("barcode", "ocr"):
+            return None
+        if hit["distance"] and cached.get("method") == "barcode":
+            if self.barcode_scanner.extract_isbn(image) != cached.get("isbn"):
+                return None
+        
+        logger.info(f"Escaneo resuelto desde caché (distancia {hit['distance']})")
+        return {field: cached.get(field) for field in self._IMAGE_FIELDS}
+
+    def _remember_scan(self, image_hash: Optional[int], result: Dict[str, Any]) -> None:
+        if image_hash is not None:
+            fields = {field: result[field] for field in self._IMAGE_FIELDS}
+            if fields["method"] == "barcode":
+                # Con código de barras, título y autor vienen de la búsqueda
+                fields["title"] = fields["author"] = None
+            self.result_cache.set(image_hash, "scan_book", fields)
+
+    def _search_catalog(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Completa el resultado con la búsqueda en catálogo por ISBN o por título."""
+        if result["method"] == "barcode":
+            search_results = self.search_service.search(isbn=result["isbn"], limit=5)
+            if search_results:
+                # Usar datos de la búsqueda
+                first_result = search_results[0]
+                result["title"] = first_result.get("title")
+                result["author"] = first_result.get("authors", [None])[0] if first_result.get("authors") else None
+        else:
+            search_results = self.search_service.search(title=result["title"], limit=5)
+        result["search_results"] = search_results
+        return result
 
     def scan_book(self, image_data: bytes) -> Dict[str, Any]:
         """
@@ -45,33 +115,36 @@ class BookScanService:
         }
         
         try:
+            # Decodificar una sola vez; barcode y OCR comparten la imagen reducida
+            image = self._preprocess(image_data)
+            
+            # 0. Foto ya escaneada (reintento tras un alta fallida)
+            image_hash = self._image_hash(image)
+            cached = self._cached_scan(image, image_hash)
+            if cached:
+                result.update(cached, success=True, cached=True)
+                return self._search_catalog(result)
+            
             # 1. Intentar escanear código de barras primero (más confiable)
-            isbn = self.barcode_scanner.extract_isbn(image_data)
+            isbn = self.barcode_scanner.extract_isbn(image)
             
             if isbn:
                 logger.info(f"ISBN encontrado por código de barras: {isbn}")
                 result["method"] = "barcode"
                 result["isbn"] = isbn
                 result["success"] = True
+                self._remember_scan(image_hash, result)
                 
                 # Buscar libro por ISBN
-                search_results = self.search_service.search(isbn=isbn, limit=5)
-                result["search_results"] = search_results
-                
-                if search_results:
-                    # Usar datos de la búsqueda
-                    first_result = search_results[0]
-                    result["title"] = first_result.get("title")
-                    result["author"] = first_result.get("authors", [None])[0] if first_result.get("authors") else None
-                
-                return result
+                return self._search_catalog(result)
             
             # 2. Si no hay código de barras, usar OCR
             logger.info("No se encontró código de barras, intentando OCR")
             
-            # Extraer título con OCR
-            title = self.ocr_service.extract_book_title(image_data)
-            author = self.ocr_service.extract_author(image_data)
+            # Una sola pasada de OCR; título y autor reutilizan el mismo resultado
+            ocr_result = self.ocr_service.analyze_image(image)
+            title = self.ocr_service.extract_book_title(ocr_result)
+            author = self.ocr_service.extract_author(ocr_result)
             
             if title:
                 logger.info(f"Título extraído por OCR: {title}")
@@ -79,12 +152,10 @@ class BookScanService:
                 result["title"] = title
                 result["author"] = author
                 result["success"] = True
+                self._remember_scan(image_hash, result)
                 
                 # Buscar libro por título
-                search_results = self.search_service.search(title=title, limit=5)
-                result["search_results"] = search_results
-                
-                return result
+                return self._search_catalog(result)
             
             # 3. Si no se encontró nada
             result["error"] = "No se pudo extraer información del libro"
@@ -123,8 +194,10 @@ class BookScanService:
         }
         
         try:
+            image = self._preprocess(image_data)
+            
             # Escanear código de barras
-            isbn = self.barcode_scanner.extract_isbn(image_data)
+            isbn = self.barcode_scanner.extract_isbn(image)
             if isbn:
                 result["barcode"]["isbn"] = isbn
                 result["barcode"]["success"] = True
@@ -136,9 +209,10 @@ class BookScanService:
                 
                 return result
             
-            # Escanear con OCR
-            title = self.ocr_service.extract_book_title(image_data)
-            author = self.ocr_service.extract_author(image_data)
+            # Escanear con OCR (una sola pasada)
+            ocr_result = self.ocr_service.analyze_image(image)
+            title = self.ocr_service.extract_book_title(ocr_result)
+            author = self.ocr_service.extract_author(ocr_result)
             
             if title:
                 result["ocr"]["title"] = title
@@ -154,3 +228,94 @@ class BookScanService:
             logger.error(f"Error durante escaneo múltiple: {e}")
         
         return result
+
+    def scan_shelf(self, image_data: bytes) -> Dict[str, Any]:
+        """
+        Escanea una foto con varios libros (estantería o pila).
+        
+        Detecta todos los códigos de barras y las regiones de texto de los lomos,
+        genera un candidato por libro y resuelve todas las búsquedas en una sola
+        pasada por ``BookSearchService.search_many``.
+        
+        Args:
+            image_data: Bytes de la imagen
+            
+        Returns:
+            Diccionario con la lista de candidatos encontrados
+        """
+        logger.info("Iniciando escaneo de estantería")
+        
+        result = {
+            "candidates": [],
+            "count": 0,
+            "success": False,
+            "error": None
+        }
+        
+        try:
+            image = preprocess_image(image_data, max_edge=settings.SCAN_SHELF_MAX_IMAGE_EDGE)
+            if image is None:
+                result["error"] = "No se pudo decodificar la imagen"
+                return result
+            
+            scale = image.scale or 1.0
+            candidates: List[Dict[str, Any]] = []
+            
+            # 1. Todos los códigos de barras de la foto
+            for found in self.barcode_scanner.extract_isbns(image):
+                candidates.append({
+                    "method": "barcode",
+                    "isbn": found["isbn"],
+                    "title": None,
+                    "author": None,
+                    "region": _scale_region(found["rect"], scale),
+                })
+            
+            # 2. Texto de los lomos (probando también texto girado)
+            ocr_result = self.ocr_service.analyze_image(image, rotation_info=[90, 270])
+            for region in ocr_result.spine_regions():
+                text = " ".join(box.text for box in region.boxes).strip()
+                if sum(c.isalpha() for c in text) < 4:
+                    continue
+                candidates.append({
+                    "method": "ocr",
+                    "isbn": None,
+                    "title": text[:100],
+                    "author": self.ocr_service.extract_author(region),
+                    "region": _scale_region(region.region, scale),
+                })
+            
+            candidates = candidates[:settings.SCAN_SHELF_MAX_CANDIDATES]
+            
+            # 3. Una sola pasada de búsqueda para todos los candidatos
+            queries = [
+                {"isbn": c["isbn"]} if c["isbn"] else {"title": c["title"]}
+                for c in candidates
+            ]
+            for candidate, search_results in zip(candidates, self.search_service.search_many(queries, limit=3)):
+                candidate["search_results"] = search_results
+                if search_results and not candidate["title"]:
+                    first_result = search_results[0]
+                    candidate["title"] = first_result.get("title")
+                    candidate["author"] = first_result.get("authors", [None])[0] if first_result.get("authors") else None
+            
+            result["candidates"] = candidates
+            result["count"] = len(candidates)
+            result["success"] = bool(candidates)
+            if not candidates:
+                result["error"] = "No se detectaron libros en la imagen"
+            
+            logger.info(f"Escaneo de estantería: {len(candidates)} candidatos")
+            
+        except Exception as e:
+            result["error"] = f"Error durante el escaneo: {str(e)}"
+            logger.error(f"Error durante el escaneo de estantería: {e}")
+        
+        return result
+
+
+def _scale_region(region: Optional[Dict[str, int]], scale: float) -> Optional[Dict[str, int]]:
+    """Convierte un rectángulo de la imagen reducida a coordenadas de la original."""
+    if not region or not scale:
+        return region
+    return {name: int(value / scale) for name, value in region.items()}
@@ -1,13 +1,69 @@
 """
-Servicio de búsqueda de libros con fallback: primero OpenLibrary, luego Google Books.
+Servicio de búsqueda de libros: con fallback (primero OpenLibrary, luego Google Books)
+o consultando ambos proveedores en paralelo y fusionando los resultados por ISBN.
 """
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import threading
 import time
 import logging
 
+from app.config import settings
+
 from app.services.openlibrary_client import OpenLibraryClient
 from app.services.googlebooks_client import GoogleBooksClient
-from app.services.cache import RedisCache
+from app.services.cache import RedisCache, TieredCache
+from app.services.local_catalog import LocalCatalog
+from app.services.popular_queries import PopularQueries
+from app.services.single_flight import SingleFlight
+from app.utils.isbn import canonical_isbn, to_isbn13
+from app.utils.text import canonical_query
+
+# Orden de preferencia al fusionar resultados de varios proveedores
+PROVIDERS = ("openlibrary", "googlebooks")
+
+
+_refresh_pool: Optional[ThreadPoolExecutor] = None
+_refresh_pool_lock = threading.Lock()
+
+
+def _get_refresh_pool() -> ThreadPoolExecutor:
+    global _refresh_pool
+    with _refresh_pool_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        return _refresh_pool
+
+
+def _is_stale(entry: Dict[str, Any]) -> bool:
+    return entry.get("fresh_until", 0) <= time.time()
+
+
+def merge_results(*result_lists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fusiona resultados de varios proveedores, de mayor a menor preferencia.
+
+    Los resultados con el mismo ISBN (normalizado a ISBN-13) se unen en uno:
+    se conservan los campos del primero y los vacíos se rellenan con los de
+    los siguientes. Los resultados sin ISBN válido se mantienen tal cual.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_isbn: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for result in results:
+            isbn13 = to_isbn13(result.get("isbn") or "")
+            existing = by_isbn.get(isbn13) if isbn13 else None
+            if existing is None:
+                item = dict(result)
+                merged.append(item)
+                if isbn13:
+                    by_isbn[isbn13] = item
+                continue
+            for field, value in result.items():
+                if value and not existing.get(field):
+                    existing[field] = value
+    return merged
 
 
 class BookSearchService:
@@ -16,87 +72,414 @@ class BookSearchService:
         openlibrary: Optional[OpenLibraryClient] = None,
         googlebooks: Optional[GoogleBooksClient] = None,
         cache: Optional[RedisCache] = None,
+        strategy: Optional[str] = None,
+        latency_budget_seconds: Optional[float] = None,
+        single_flight: Optional[SingleFlight] = None,
+        catalog: Optional[LocalCatalog] = None,
+        popular: Optional[PopularQueries] = None,
     ) -> None:
         self.openlibrary = openlibrary or OpenLibraryClient()
         self.googlebooks = googlebooks or GoogleBooksClient()
-        self.cache = cache or RedisCache()
+        self.cache = cache or TieredCache(compress_min_bytes=settings.CATALOG_CACHE_COMPRESS_MIN_BYTES)
+        # Catálogo importado de los volcados de OpenLibrary: los ISBN se buscan
+        # aquí antes de llamar a ningún proveedor
+        self.catalog = catalog or LocalCatalog()
+        # "fallback": Google Books solo si OpenLibrary no devuelve nada
+        # "parallel": ambos a la vez, fusionados, dentro de un presupuesto de latencia
+        self.strategy = strategy or settings.SEARCH_PROVIDER_STRATEGY
+        self.latency_budget = latency_budget_seconds or settings.SEARCH_LATENCY_BUDGET_SECONDS
+        self.single_flight = single_flight or SingleFlight(redis_client=getattr(self.cache, "client", None))
+        # Búsquedas más frecuentes, para el calentado programado de la caché
+        self.popular = popular or PopularQueries(redis_client=getattr(self.cache, "client", None))
+        # Frescura de las entradas: positivas, negativas (sin resultados) y
+        # ventana extra en la que se sirven caducadas mientras se refrescan
+        self.positive_ttl = settings.CACHE_TTL_SECONDS
+        self.negative_ttl = settings.SEARCH_NEGATIVE_CACHE_TTL_SECONDS
+        self.stale_ttl = settings.SEARCH_STALE_WHILE_REVALIDATE_SECONDS
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_tasks: Set[asyncio.Future] = set()
 
     def search(self, *, title: Optional[str] = None, isbn: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
         if not title and not isbn:
             return []
 
-        logger = logging.getLogger(__name__)
         t0 = time.perf_counter()
+        self.popular.record(title=title, isbn=isbn, limit=limit)
 
         # Intentar caché
         key = self._make_cache_key(title=title, isbn=isbn, limit=limit)
-        cached = self.cache.get_json(key)
+        if key is None:
+            return self._search_providers(None, t0, title=title, isbn=isbn, limit=limit)
+        cached, stale = self._get_cached(key, t0, title=title, isbn=isbn, limit=limit)
         if cached is not None:
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            logger.info(
-                "search cache_hit key=%s query={title=%s isbn=%s limit=%s} duration_ms=%s results=%s",
-                key,
-                title,
-                isbn,
-                limit,
-                duration_ms,
-                len(cached),
-            )
+            if stale:
+                # Se sirve lo que hay y se refresca en segundo plano
+                self._refresh_in_background(key, title=title, isbn=isbn, limit=limit)
             return cached
 
+        # Fallos simultáneos de la misma clave esperan a una sola consulta
+        return self.single_flight.run(
+            key,
+            lambda: self._search_providers(key, t0, title=title, isbn=isbn, limit=limit),
+            lambda: self._fresh_results(key),
+        )
+
+    def _search_providers(
+        self, key: Optional[str], t0: float, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        if isbn and (local := self._lookup_catalog(isbn)) is not None:
+            return self._store(key, local[0], limit, t0, "catalog", local[1])
+
+        if self.strategy == "parallel":
+            results, provider, provider_duration_ms, complete = self._search_parallel(title=title, isbn=isbn, limit=limit)
+            return self._store(key, results, limit, t0, provider, provider_duration_ms, cache_result=complete)
+
+        calls = self._provider_calls(title=title, isbn=isbn, limit=limit)
         results: List[Dict[str, Any]] = []
         provider_duration_ms: Optional[int] = None
         provider: Optional[str] = None
-        try:
-            if isbn:
+        answered = 0
+        for name in PROVIDERS:
+            if name not in calls:
+                continue
+            try:
                 p0 = time.perf_counter()
-                results = self.openlibrary.search_by_isbn(isbn)
+                results = calls[name]()
                 provider_duration_ms = int((time.perf_counter() - p0) * 1000)
-                provider = "openlibrary"
-            elif title:
+                provider = name
+                answered += 1
+            except Exception as e:
+                logging.getLogger(__name__).error("search provider failed provider=%s error=%s", name, e)
+                results = []
+            if results:
+                break
+
+        # Un vacío solo es definitivo si todos los proveedores han respondido
+        # (ni saltados por su circuito ni con error)
+        complete = bool(results) or answered == len(PROVIDERS)
+        return self._store(key, results, limit, t0, provider, provider_duration_ms, cache_result=complete)
+
+    async def asearch(self, *, title: Optional[str] = None, isbn: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Versión asíncrona de ``search`` para los endpoints.
+
+        Usa los métodos ``asearch_*`` de los clientes, que comparten el
+        ``httpx.AsyncClient`` del proceso, así que no bloquea el event loop.
+        Misma caché, misma estrategia de proveedores y mismo formato de resultados.
+        """
+        if not title and not isbn:
+            return []
+
+        t0 = time.perf_counter()
+        self.popular.record(title=title, isbn=isbn, limit=limit)
+
+        key = self._make_cache_key(title=title, isbn=isbn, limit=limit)
+        if key is None:
+            return await self._asearch_providers(None, t0, title=title, isbn=isbn, limit=limit)
+        cached, stale = self._get_cached(key, t0, title=title, isbn=isbn, limit=limit)
+        if cached is not None:
+            if stale:
+                self._arefresh_in_background(key, title=title, isbn=isbn, limit=limit)
+            return cached
+
+        return await self.single_flight.arun(
+            key,
+            lambda: self._asearch_providers(key, t0, title=title, isbn=isbn, limit=limit),
+            lambda: self._fresh_results(key),
+        )
+
+    async def _asearch_providers(
+        self, key: Optional[str], t0: float, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        # El catálogo local es una consulta SQLAlchemy síncrona: fuera del event loop
+        if isbn and (local := await asyncio.to_thread(self._lookup_catalog, isbn)) is not None:
+            return self._store(key, local[0], limit, t0, "catalog", local[1])
+
+        if self.strategy == "parallel":
+            results, provider, provider_duration_ms, complete = await self._asearch_parallel(
+                title=title, isbn=isbn, limit=limit
+            )
+            return self._store(key, results, limit, t0, provider, provider_duration_ms, cache_result=complete)
+
+        calls = self._aprovider_calls(title=title, isbn=isbn, limit=limit)
+        results: List[Dict[str, Any]] = []
+        provider_duration_ms: Optional[int] = None
+        provider: Optional[str] = None
+        answered = 0
+        for name in PROVIDERS:
+            if name not in calls:
+                continue
+            try:
                 p0 = time.perf_counter()
-                results = self.openlibrary.search_by_title(title, limit=limit)
+                results = await calls[name]()
                 provider_duration_ms = int((time.perf_counter() - p0) * 1000)
-                provider = "openlibrary"
-        except Exception:
-            results = []
+                provider = name
+                answered += 1
+            except Exception as e:
+                logging.getLogger(__name__).error("search provider failed provider=%s error=%s", name, e)
+                results = []
+            if results:
+                break
+
+        complete = bool(results) or answered == len(PROVIDERS)
+        return self._store(key, results, limit, t0, provider, provider_duration_ms, cache_result=complete)
+
+    def _lookup_catalog(self, isbn: str) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """(resultados, duración en ms) del catálogo local, o None si no tiene el ISBN."""
+        p0 = time.perf_counter()
+        results = self.catalog.lookup(isbn)
+        return (results, int((time.perf_counter() - p0) * 1000)) if results else None
 
-        if not results:
+    def _available_providers(self) -> List[str]:
+        """Proveedores con el circuito cerrado (o listo para la llamada de prueba)."""
+        available = []
+        for name in PROVIDERS:
+            breaker = getattr(getattr(self, name), "breaker", None)
+            if breaker is None or breaker.is_available():
+                available.append(name)
+            else:
+                logging.getLogger(__name__).info("search provider skipped provider=%s circuit=open", name)
+        return available
+
+    def _provider_calls(
+        self, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> Dict[str, Callable[[], List[Dict[str, Any]]]]:
+        if isbn:
+            calls = {
+                "openlibrary": lambda: self.openlibrary.search_by_isbn(isbn),
+                "googlebooks": lambda: self.googlebooks.search_by_isbn(isbn, limit=limit),
+            }
+        else:
+            calls = {
+                "openlibrary": lambda: self.openlibrary.search_by_title(title, limit=limit),
+                "googlebooks": lambda: self.googlebooks.search_by_title(title, limit=limit),
+            }
+        return {name: calls[name] for name in self._available_providers()}
+
+    def _aprovider_calls(
+        self, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> Dict[str, Callable[[], Awaitable[List[Dict[str, Any]]]]]:
+        if isbn:
+            calls = {
+                "openlibrary": lambda: self.openlibrary.asearch_by_isbn(isbn),
+                "googlebooks": lambda: self.googlebooks.asearch_by_isbn(isbn, limit=limit),
+            }
+        else:
+            calls = {
+                "openlibrary": lambda: self.openlibrary.asearch_by_title(title, limit=limit),
+                "googlebooks": lambda: self.googlebooks.asearch_by_title(title, limit=limit),
+            }
+        return {name: calls[name] for name in self._available_providers()}
+
+    def _merge_arrived(
+        self, arrived: Dict[str, List[Dict[str, Any]]], pending: List[str], p0: float
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], int, bool]:
+        duration_ms = int((time.perf_counter() - p0) * 1000)
+        if pending:
+            logging.getLogger(__name__).warning(
+                "search providers over budget providers=%s budget_ms=%s",
+                ",".join(pending),
+                int(self.latency_budget * 1000),
+            )
+        answered = [name for name in PROVIDERS if arrived.get(name)]
+        results = merge_results(*(arrived.get(name) or [] for name in PROVIDERS))
+        # Los proveedores saltados por su circuito o con error tampoco han respondido
+        complete = not pending and len(arrived) == len(PROVIDERS)
+        return results, "+".join(answered) or None, duration_ms, complete
+
+    def _search_parallel(
+        self, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], int, bool]:
+        """
+        Consulta todos los proveedores a la vez y fusiona lo que llegue a tiempo.
+
+        Returns:
+            (resultados, proveedores que respondieron, duración en ms, si respondieron todos)
+        """
+        logger = logging.getLogger(__name__)
+        calls = self._provider_calls(title=title, isbn=isbn, limit=limit)
+        p0 = time.perf_counter()
+        if not calls:
+            return self._merge_arrived({}, [], p0)
+        pool = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="search-provider")
+        try:
+            futures = {pool.submit(call): name for name, call in calls.items()}
+            done, not_done = wait(futures, timeout=self.latency_budget)
+        finally:
+            # El proveedor lento termina en su hilo; no se le espera
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        arrived: Dict[str, List[Dict[str, Any]]] = {}
+        for future in done:
             try:
-                if isbn:
-                    p0 = time.perf_counter()
-                    results = self.googlebooks.search_by_isbn(isbn, limit=limit)
-                    provider_duration_ms = int((time.perf_counter() - p0) * 1000)
-                    provider = "googlebooks"
-                elif title:
-                    p0 = time.perf_counter()
-                    results = self.googlebooks.search_by_title(title, limit=limit)
-                    provider_duration_ms = int((time.perf_counter() - p0) * 1000)
-                    provider = "googlebooks"
-            except Exception:
-                results = []
+                arrived[futures[future]] = future.result()
+            except Exception as e:
+                # Sin respuesta: no cuenta como vacío definitivo en ``_merge_arrived``
+                logger.error("search provider failed provider=%s error=%s", futures[future], e)
+        return self._merge_arrived(arrived, [futures[f] for f in not_done], p0)
 
-        # Limitar cantidad y normalizar estructura común para el frontend
-        normalized: List[Dict[str, Any]] = []
-        for r in results[:limit]:
-            normalized.append(
-                {
-                    "title": r.get("title"),
-                    "authors": r.get("authors") or [],
-                    "isbn": r.get("isbn"),
-                    "cover_url": r.get("cover_url"),
-                    "description": r.get("description"),
-                    "publisher": r.get("publisher"),
-                    "published_date": r.get("published_date"),
-                    "page_count": r.get("page_count"),
-                    "language": r.get("language"),
-                    "source": r.get("source"),
-                }
+    async def _asearch_parallel(
+        self, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], int, bool]:
+        """Versión asíncrona de ``_search_parallel``: las peticiones pendientes se cancelan."""
+        logger = logging.getLogger(__name__)
+        calls = self._aprovider_calls(title=title, isbn=isbn, limit=limit)
+        p0 = time.perf_counter()
+        if not calls:
+            return self._merge_arrived({}, [], p0)
+        tasks = {asyncio.ensure_future(call()): name for name, call in calls.items()}
+        done, not_done = await asyncio.wait(tasks, timeout=self.latency_budget)
+        for task in not_done:
+            task.cancel()
+
+        arrived: Dict[str, List[Dict[str, Any]]] = {}
+        for task in done:
+            try:
+                arrived[tasks[task]] = task.result()
+            except Exception as e:
+                # Sin respuesta: no cuenta como vacío definitivo en ``_merge_arrived``
+                logger.error("search provider failed provider=%s error=%s", tasks[task], e)
+        return self._merge_arrived(arrived, [tasks[t] for t in not_done], p0)
+
+    def _read_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.cache.get_json(key)
+        if not isinstance(entry, dict) or "results" not in entry:
+            return None
+        if _is_stale(entry) and hasattr(self.cache, "local"):
+            # La copia en memoria puede ir por detrás de Redis, donde otro
+            # worker quizá ya la haya refrescado
+            self.cache.local.delete(key)
+            entry = self.cache.get_json(key)
+            if not isinstance(entry, dict) or "results" not in entry:
+                return None
+        return entry
+
+    def _fresh_results(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._read_entry(key)
+        return entry["results"] if entry and not _is_stale(entry) else None
+
+    def _get_cached(
+        self, key: str, t0: float, *, title: Optional[str], isbn: Optional[str], limit: int
+    ) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Returns:
+            (resultados en caché o None, si están caducados y hay que refrescarlos)
+        """
+        entry = self._read_entry(key)
+        if entry is None:
+            return None, False
+        cached = entry["results"]
+        stale = _is_stale(entry)
+        duration_ms = int((time.perf_counter() - t0) * 1000)
+        logging.getLogger(__name__).info(
+            "search cache_hit key=%s query={title=%s isbn=%s limit=%s} duration_ms=%s results=%s stale=%s",
+            key,
+            title,
+            isbn,
+            limit,
+            duration_ms,
+            len(cached),
+            stale,
+        )
+        return cached, stale
+
+    def warm(self, *, title: Optional[str] = None, isbn: Optional[str] = None, limit: int = 5) -> bool:
+        """
+        Deja en caché una entrada fresca para la consulta (calentado programado).
+
+        No cuenta como búsqueda para ``popular`` ni sirve resultados: si la
+        entrada está fresca no hace nada y si está caducada o falta consulta
+        a los proveedores y la reescribe.
+
+        Returns:
+            True si ha consultado a los proveedores
+        """
+        if not title and not isbn:
+            return False
+        key = self._make_cache_key(title=title, isbn=isbn, limit=limit)
+        if key is None or self._fresh_results(key) is not None or not self._start_refresh(key):
+            return False
+        try:
+            self.single_flight.run(
+                key,
+                lambda: self._search_providers(key, time.perf_counter(), title=title, isbn=isbn, limit=limit),
+                lambda: self._fresh_results(key),
             )
-        # Guardar en caché y registrar métricas
-        self.cache.set_json(key, normalized)
+        finally:
+            self._finish_refresh(key)
+        return True
+
+    def _refresh_in_background(self, key: str, *, title: Optional[str], isbn: Optional[str], limit: int) -> None:
+        if not self._start_refresh(key):
+            return
+
+        def _refresh() -> None:
+            try:
+                self.single_flight.run(
+                    key,
+                    lambda: self._search_providers(key, time.perf_counter(), title=title, isbn=isbn, limit=limit),
+                    lambda: self._fresh_results(key),
+                )
+            except Exception as e:
+                logging.getLogger(__name__).error("search refresh failed key=%s error=%s", key, e)
+            finally:
+                self._finish_refresh(key)
+
+        _get_refresh_pool().submit(_refresh)
+
+    def _arefresh_in_background(self, key: str, *, title: Optional[str], isbn: Optional[str], limit: int) -> None:
+        if not self._start_refresh(key):
+            return
+
+        async def _refresh() -> None:
+            try:
+                await self.single_flight.arun(
+                    key,
+                    lambda: self._asearch_providers(key, time.perf_counter(), title=title, isbn=isbn, limit=limit),
+                    lambda: self._fresh_results(key),
+                )
+            except Exception as e:
+                logging.getLogger(__name__).error("search refresh failed key=%s error=%s", key, e)
+            finally:
+                self._finish_refresh(key)
+
+        task = asyncio.ensure_future(_refresh())
+        # Referencia fuerte hasta que termine: el loop solo guarda una débil
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def _start_refresh(self, key: str) -> bool:
+        # Un solo refresco por clave en el proceso; entre procesos coalesce SingleFlight
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _finish_refresh(self, key: str) -> None:
+        with self._refresh_lock:
+            self._refreshing.discard(key)
+
+    def _store(
+        self,
+        key: Optional[str],
+        results: List[Dict[str, Any]],
+        limit: int,
+        t0: float,
+        provider: Optional[str],
+        provider_duration_ms: Optional[int],
+        cache_result: bool = True,
+    ) -> List[Dict[str, Any]]:
+        normalized = self._normalize(results, limit)
+        # Guardar en caché y registrar métricas; un resultado parcial (algún
+        # proveedor fuera de plazo) no se guarda para no servirlo durante horas;
+        # sin clave (consulta sin palabras) tampoco.
+        if cache_result and key is not None:
+            entry, ttl = self._cache_entry(normalized)
+            self.cache.set_json(key, entry, ttl_seconds=ttl)
         total_ms = int((time.perf_counter() - t0) * 1000)
-        logger.info(
+        logging.getLogger(__name__).info(
             "search cache_miss key=%s provider=%s provider_ms=%s total_ms=%s results=%s",
             key,
             provider,
@@ -106,11 +489,213 @@ class BookSearchService:
         )
         return normalized
 
-    def _make_cache_key(self, *, title: Optional[str], isbn: Optional[str], limit: int) -> str:
+    @staticmethod
+    def _normalize(results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        # Limitar cantidad y normalizar estructura común para el frontend
+        return [
+            {
+                "title": r.get("title"),
+                "authors": r.get("authors") or [],
+                "isbn": r.get("isbn"),
+                "cover_url": r.get("cover_url"),
+                "description": r.get("description"),
+                "publisher": r.get("publisher"),
+                "published_date": r.get("published_date"),
+                "page_count": r.get("page_count"),
+                "language": r.get("language"),
+                "source": r.get("source"),
+            }
+            for r in results[:limit]
+        ]
+
+    def _cache_entry(self, normalized: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], int]:
+        """Entrada de caché y TTL en Redis; los resultados vacíos caducan antes."""
+        fresh_ttl = self.positive_ttl if normalized else self.negative_ttl
+        entry = {"results": normalized, "fresh_until": time.time() + fresh_ttl}
+        return entry, int(fresh_ttl + self.stale_ttl)
+
+    async def asearch_isbns(self, isbns: List[str], *, limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Busca muchos ISBN de una vez (importación de bibliotecas).
+
+        Los aciertos de caché se leen con un solo MGET (las entradas caducadas
+        se sirven y se refrescan en segundo plano, como en ``search``). Los
+        fallos se piden a OpenLibrary en bloques de ``bibkeys`` y lo que siga
+        sin resultado a Google Books en paralelo; después se guardan con un
+        solo pipeline de SETEX. Las claves de caché son las de ``search``.
+
+        Args:
+            isbns: ISBN ya limpios (sin guiones ni espacios)
+            limit: Resultados máximos por ISBN
+
+        Returns:
+            ``{isbn: resultados}`` con el mismo formato que ``search``
+        """
+        t0 = time.perf_counter()
+        keys = {isbn: self._make_cache_key(title=None, isbn=isbn, limit=limit) for isbn in dict.fromkeys(isbns)}
+        entries = self.cache.get_many_json(list(keys.values()))
+
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        misses: List[str] = []
+        # clave -> ISBN que se pide: el ISBN-10 y el ISBN-13 de un libro comparten clave
+        fetch: Dict[str, str] = {}
+        stale: List[str] = []
+        for isbn, key in keys.items():
+            entry = entries.get(key)
+            if not isinstance(entry, dict) or "results" not in entry:
+                misses.append(isbn)
+                fetch.setdefault(key, isbn)
+                continue
+            resolved[isbn] = entry["results"]
+            if _is_stale(entry) and self._start_refresh(key):
+                stale.append(isbn)
+
+        if fetch:
+            fetched = await self._afetch_isbns(list(fetch.values()), keys, limit)
+            resolved.update((isbn, fetched[fetch[keys[isbn]]]) for isbn in misses)
+        if stale:
+            task = asyncio.ensure_future(self._arefresh_isbns(stale, keys, limit))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+
+        logging.getLogger(__name__).info(
+            "search isbn_batch isbns=%s cache_hits=%s misses=%s stale=%s total_ms=%s",
+            len(keys),
+            len(keys) - len(misses),
+            len(misses),
+            len(stale),
+            int((time.perf_counter() - t0) * 1000),
+        )
+        return resolved
+
+    async def _afetch_isbns(
+        self, isbns: List[str], keys: Dict[str, str], limit: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        logger = logging.getLogger(__name__)
+        local = await asyncio.to_thread(self.catalog.lookup_many, isbns)
+        isbns_remote = [isbn for isbn in isbns if isbn not in local]
+        available = self._available_providers() if isbns_remote else []
+        found: Dict[str, List[Dict[str, Any]]] = dict(local)
+        if "openlibrary" in available:
+            try:
+                found.update(await self.openlibrary.asearch_by_isbns(isbns_remote))
+            except Exception as e:
+                logger.error("search isbn_batch provider failed provider=openlibrary error=%s", e)
+        # ISBN a los que OpenLibrary ha respondido (los de un bloque fallido no están)
+        openlibrary_answered = set(found)
+
+        remaining = [isbn for isbn in isbns_remote if not found.get(isbn)]
+        googlebooks_answered: Set[str] = set()
+        if remaining and "googlebooks" in available:
+            semaphore = asyncio.Semaphore(settings.SEARCH_BATCH_CONCURRENCY)
+
+            async def _googlebooks(isbn: str) -> Optional[List[Dict[str, Any]]]:
+                # None si Google Books no ha respondido, para no confundirlo con "sin resultados"
+                async with semaphore:
+                    try:
+                        return await self.googlebooks.asearch_by_isbn(isbn, limit=limit)
+                    except Exception as e:
+                        logger.error("search isbn_batch provider failed provider=googlebooks isbn=%s error=%s", isbn, e)
+                        return None
+
+            for isbn, results in zip(remaining, await asyncio.gather(*(_googlebooks(isbn) for isbn in remaining))):
+                if results is not None:
+                    found[isbn] = results
+                    googlebooks_answered.add(isbn)
+
+        # Un vacío solo es definitivo si lo confirman ambos proveedores
+        answered = openlibrary_answered & googlebooks_answered
+
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        writes: Dict[str, Tuple[Any, Optional[int]]] = {}
+        for isbn in isbns:
+            normalized = self._normalize(found.get(isbn) or [], limit)
+            resolved[isbn] = normalized
+            if normalized or isbn in answered:
+                writes[keys[isbn]] = self._cache_entry(normalized)
+        self.cache.set_many_json(writes)
+        return resolved
+
+    async def _arefresh_isbns(self, isbns: List[str], keys: Dict[str, str], limit: int) -> None:
+        try:
+            await self._afetch_isbns(isbns, keys, limit)
+        except Exception as e:
+            logging.getLogger(__name__).error("search isbn_batch refresh failed isbns=%s error=%s", len(isbns), e)
+        finally:
+            for isbn in isbns:
+                self._finish_refresh(keys[isbn])
+
+    def search_many(self, queries: List[Dict[str, Any]], *, limit: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Resuelve varias búsquedas en una sola pasada.
+
+        Las consultas repetidas se resuelven una sola vez y el resto se lanzan en
+        paralelo (cada una pasa por la caché de ``search``).
+
+        Args:
+            queries: Lista de diccionarios con ``title`` y/o ``isbn``
+            limit: Resultados máximos por consulta
+
+        Returns:
+            Lista de resultados en el mismo orden que ``queries``
+        """
+        logger = logging.getLogger(__name__)
+        unique: Dict[str, Dict[str, Any]] = {}
+        keys: List[Optional[str]] = []
+        for q in queries:
+            title, isbn = q.get("title"), q.get("isbn")
+            if not title and not isbn:
+                keys.append(None)
+                continue
+            # Las consultas sin clave de caché se agrupan por su texto tal cual
+            key = self._make_cache_key(title=title, isbn=isbn, limit=limit) or f"uncached:{title}"
+            unique.setdefault(key, {"title": title, "isbn": isbn})
+            keys.append(key)
+
+        t0 = time.perf_counter()
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        if unique:
+            workers = min(settings.SEARCH_BATCH_CONCURRENCY, len(unique))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search") as pool:
+                futures = {
+                    key: pool.submit(self.search, title=q["title"], isbn=q["isbn"], limit=limit)
+                    for key, q in unique.items()
+                }
+                for key, future in futures.items():
+                    try:
+                        resolved[key] = future.result()
+                    except Exception as e:
+                        logger.error("search_many query failed key=%s error=%s", key, e)
+                        resolved[key] = []
+
+        logger.info(
+            "search_many queries=%s unique=%s total_ms=%s",
+            len(queries),
+            len(unique),
+            int((time.perf_counter() - t0) * 1000),
+        )
+        return [resolved.get(key, []) if key else [] for key in keys]
+
+    def _make_cache_key(self, *, title: Optional[str], isbn: Optional[str], limit: int) -> Optional[str]:
+        """None si el título no tiene ninguna palabra: esas consultas no se cachean."""
         # v2: incluye publisher, published_date, page_count, language
+        # v3: entradas {"results", "fresh_until"} para stale-while-revalidate
+        # v4: consultas canónicas (sin acentos ni puntuación, ISBN-10 como ISBN-13)
+        # v5: se conservan "+" y "#" tras una palabra ("C++" no es "C")
         if isbn:
-            return f"search:v2:isbn:{isbn}:{limit}"
-        t = (title or "").strip().lower().replace(" ", "+")
-        return f"search:v2:title:{t}:{limit}"
+            return f"search:v5:isbn:{canonical_isbn(isbn)}:{limit}"
+        query = canonical_query(title or "")
+        return f"search:v5:title:{query}:{limit}" if query else None
+
+
+_book_search_service: Optional[BookSearchService] = None
+_book_search_service_lock = threading.Lock()
 
 
+def get_book_search_service() -> BookSearchService:
+    """Devuelve el servicio de búsqueda del proceso (se crea bajo demanda)."""
+    global _book_search_service
+    with _book_search_service_lock:
+        if _book_search_service is None:
+            _book_search_service = BookSearchService()
+        return _book_search_service
@@ -1,35 +1,298 @@
 """
 Cliente simple de caché basado en Redis.
+
+``TieredCache`` añade delante un LRU en memoria del proceso para las claves
+calientes, de modo que un acierto no paga ni el viaje a Redis ni el
+``json.loads``.
+
+Con ``compress_min_bytes`` los valores se guardan en Redis como JSON compacto
+en bytes y, a partir de ese tamaño, comprimidos con zlib.
 """
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
 import json
+import threading
+import time
+import zlib
 
 import redis
 
 from app.config import settings
 
+# Prefijo de los valores comprimidos (un JSON nunca empieza por "z")
+_COMPRESSED_PREFIX = b"z:"
+_COMPRESSION_LEVEL = 6
+
+Payload = Union[str, bytes]
+
 
 class RedisCache:
-    def __init__(self, url: Optional[str] = None, default_ttl_seconds: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        default_ttl_seconds: Optional[int] = None,
+        compress_min_bytes: Optional[int] = None,
+    ) -> None:
         self.url = url or settings.REDIS_URL
         self.ttl = default_ttl_seconds or settings.CACHE_TTL_SECONDS
-        self.client = redis.Redis.from_url(self.url, decode_responses=True)
+        # None: JSON en texto, como siempre; si no, bytes y zlib desde ese tamaño
+        self.compress_min_bytes = compress_min_bytes
+        self.client = redis.Redis.from_url(self.url, decode_responses=compress_min_bytes is None)
 
     def get_json(self, key: str):
+        val = self._get_raw(key)
+        if val is None:
+            return None
         try:
-            val = self.client.get(key)
-            if val is None:
-                return None
-            return json.loads(val)
+            return self._decode(val)[0]
+        except ValueError:
+            return None
+
+    def get_many_json(self, keys: List[str]) -> Dict[str, Any]:
+        """Lee varias claves con un solo MGET; devuelve solo las encontradas."""
+        found = {}
+        for key, val in self._get_many_raw(keys).items():
+            try:
+                found[key] = self._decode(val)[0]
+            except ValueError:
+                continue
+        return found
+
+    def _encode(self, value: Any) -> Tuple[Payload, int]:
+        """Valor tal como se guarda en Redis y tamaño de su JSON."""
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        if self.compress_min_bytes is None:
+            return raw, len(raw)
+        data = raw.encode("utf-8")
+        if len(data) >= self.compress_min_bytes:
+            return _COMPRESSED_PREFIX + zlib.compress(data, _COMPRESSION_LEVEL), len(raw)
+        return data, len(raw)
+
+    @staticmethod
+    def _decode(payload: Payload) -> Tuple[Any, int]:
+        """
+        Inversa de ``_encode``: valor y tamaño de su JSON.
+
+        Lee también las entradas sin comprimir, así que activar la compresión
+        no invalida lo que ya hay en Redis.
+
+        Raises:
+            ValueError: si el valor no es JSON válido o está mal comprimido
+        """
+        if isinstance(payload, bytes):
+            if payload.startswith(_COMPRESSED_PREFIX):
+                try:
+                    payload = zlib.decompress(payload[len(_COMPRESSED_PREFIX):])
+                except zlib.error as e:
+                    raise ValueError(f"corrupt compressed cache value: {e}") from e
+            payload = payload.decode("utf-8")
+        return json.loads(payload), len(payload)
+
+    def _get_raw(self, key: str) -> Optional[Payload]:
+        try:
+            return self.client.get(key)
         except Exception:
             return None
 
+    def _get_many_raw(self, keys: List[str]) -> Dict[str, Payload]:
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget(keys)
+        except Exception:
+            return {}
+        return {key: val for key, val in zip(keys, values) if val is not None}
+
     def set_json(self, key: str, value, ttl_seconds: Optional[int] = None):
         try:
             ttl = ttl_seconds or self.ttl
-            self.client.setex(key, ttl, json.dumps(value, ensure_ascii=False))
+            self.client.setex(key, ttl, self._encode(value)[0])
+        except Exception:
+            # Fail silently for cache errors
+            pass
+
+    def set_many_json(self, items: Dict[str, Tuple[Any, Optional[int]]]) -> None:
+        """Escribe varias claves ``{clave: (valor, ttl)}`` con un solo pipeline de SETEX."""
+        self._set_many_raw({key: (self._encode(value)[0], ttl) for key, (value, ttl) in items.items()})
+
+    def _set_many_raw(self, items: Dict[str, Tuple[Payload, Optional[int]]]) -> None:
+        if not items:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, (raw, ttl) in items.items():
+                pipe.setex(key, ttl or self.ttl, raw)
+            pipe.execute()
+        except Exception:
+            # Fail silently for cache errors
+            pass
+
+
+class LocalLRUCache:
+    """
+    LRU en memoria del proceso con TTL por entrada.
+
+    Acotado por número de entradas y por bytes (tamaño del JSON serializado).
+    Los valores se devuelven tal cual, sin copiar: quien los lee no debe
+    modificarlos.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries or settings.CATALOG_LOCAL_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.CATALOG_LOCAL_CACHE_MAX_BYTES
+        self.ttl = ttl_seconds or settings.CATALOG_LOCAL_CACHE_TTL_SECONDS
+        # clave -> (caduca_en, bytes, valor)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key: str, value: Any, size: int, ttl_seconds: Optional[float] = None) -> None:
+        ttl = min(ttl_seconds or self.ttl, self.ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class TieredCache(RedisCache):
+    """
+    ``RedisCache`` con un ``LocalLRUCache`` delante.
+
+    Las lecturas miran primero la memoria del proceso y, si fallan, Redis (y
+    rellenan la memoria). Las escrituras van a ambos niveles. La memoria
+    guarda las entradas como mucho ``CATALOG_LOCAL_CACHE_TTL_SECONDS``, así
+    que lo que otro worker escriba en Redis se ve pasado ese tiempo.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        default_ttl_seconds: Optional[int] = None,
+        local: Optional[LocalLRUCache] = None,
+        compress_min_bytes: Optional[int] = None,
+    ) -> None:
+        super().__init__(url, default_ttl_seconds, compress_min_bytes)
+        self.local = local or LocalLRUCache()
+        self._redis_hits = 0
+        self._redis_misses = 0
+
+    def get_json(self, key: str):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        raw = self._get_raw(key)
+        if raw is None:
+            self._redis_misses += 1
+            return None
+        try:
+            value, size = self._decode(raw)
+        except ValueError:
+            return None
+        self._redis_hits += 1
+        self.local.set(key, value, size)
+        return value
+
+    def get_many_json(self, keys: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        remote: List[str] = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote.append(key)
+        raws = self._get_many_raw(remote)
+        self._redis_misses += len(remote) - len(raws)
+        for key, raw in raws.items():
+            try:
+                value, size = self._decode(raw)
+            except ValueError:
+                continue
+            self._redis_hits += 1
+            self.local.set(key, value, size)
+            found[key] = value
+        return found
+
+    def set_json(self, key: str, value, ttl_seconds: Optional[int] = None):
+        ttl = ttl_seconds or self.ttl
+        raw, size = self._encode(value)
+        self.local.set(key, value, size, ttl)
+        try:
+            self.client.setex(key, ttl, raw)
         except Exception:
             # Fail silently for cache errors
             pass
 
+    def set_many_json(self, items: Dict[str, Tuple[Any, Optional[int]]]) -> None:
+        raws: Dict[str, Tuple[Payload, Optional[int]]] = {}
+        for key, (value, ttl) in items.items():
+            raw, size = self._encode(value)
+            self.local.set(key, value, size, ttl or self.ttl)
+            raws[key] = (raw, ttl)
+        self._set_many_raw(raws)
 
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._redis_hits + self._redis_misses
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "hits": self._redis_hits,
+                "misses": self._redis_misses,
+                "hit_ratio": round(self._redis_hits / lookups, 3) if lookups else None,
+            },
+        }
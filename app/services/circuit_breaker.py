@@ -0,0 +1,282 @@
+"""
+Circuit breaker por proveedor de catálogo externo.
+
+Cada proveedor (OpenLibrary, Google Books) tiene un breaker por proceso con
+una ventana deslizante de las últimas llamadas (acotada en número y en
+tiempo). Cuenta como fallo un error de red, un 5xx/429 o una respuesta más
+lenta que ``PROVIDER_SLOW_CALL_SECONDS``:
+
+- ``closed``: las llamadas pasan. Si en la ventana hay al menos
+  ``PROVIDER_BREAKER_MIN_CALLS`` y la proporción de fallos alcanza
+  ``PROVIDER_BREAKER_FAILURE_RATIO``, el circuito se abre.
+- ``open``: las llamadas se rechazan al momento con ``CircuitOpenError``
+  durante ``PROVIDER_BREAKER_OPEN_SECONDS``.
+- ``half_open``: pasado ese tiempo se deja pasar una sola llamada de prueba;
+  si va bien se cierra y si falla se vuelve a abrir.
+
+El timeout de cada llamada se deriva del p95 de las latencias correctas de la
+ventana, en lugar de esperar siempre ``HTTP_CLIENT_TIMEOUT_SECONDS``.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+import math
+import threading
+import time
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Con menos latencias que estas no se estima el p95 y se usa el timeout máximo
+_MIN_LATENCY_SAMPLES = 5
+
+
+class ProviderError(Exception):
+    """
+    El proveedor no ha respondido (error de red o HTTP, o circuito abierto).
+
+    Los clientes la lanzan en lugar de devolver una lista vacía para que un
+    fallo no se confunda con "no hay resultados" y no se guarde como tal en caché.
+    """
+
+
+class CircuitOpenError(Exception):
+    """El proveedor tiene el circuito abierto y la llamada no se ha hecho."""
+
+    def __init__(self, provider: str) -> None:
+        super().__init__(f"circuit open for provider {provider}")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window_size: Optional[int] = None,
+        window_seconds: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_ratio: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.window_size = window_size or settings.PROVIDER_BREAKER_WINDOW_SIZE
+        self.window_seconds = window_seconds or settings.PROVIDER_BREAKER_WINDOW_SECONDS
+        self.min_calls = min_calls or settings.PROVIDER_BREAKER_MIN_CALLS
+        self.failure_ratio = failure_ratio or settings.PROVIDER_BREAKER_FAILURE_RATIO
+        self.open_seconds = open_seconds or settings.PROVIDER_BREAKER_OPEN_SECONDS
+        self.slow_call_seconds = slow_call_seconds or settings.PROVIDER_SLOW_CALL_SECONDS
+        # (instante, correcta, latencia en segundos)
+        self._calls: Deque[Tuple[float, bool, float]] = deque(maxlen=self.window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def is_available(self) -> bool:
+        """Si una llamada tendría opción de pasar (sin reservar la prueba de ``half_open``)."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight(now))
+
+    def allow_request(self) -> bool:
+        """Reserva una llamada; en ``half_open`` solo se concede la de prueba."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight(now):
+                self._probe_started = now
+                return True
+            self._rejected += 1
+            return False
+
+    def get(self, http: httpx.Client, url: str, **kwargs: Any) -> httpx.Response:
+        """``http.get`` protegido por el breaker y con el timeout adaptativo."""
+        self._before_call(kwargs)
+        t0 = time.perf_counter()
+        try:
+            response = http.get(url, **kwargs)
+        except httpx.HTTPError:
+            self.record_failure(time.perf_counter() - t0)
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self._record_response(response, time.perf_counter() - t0)
+        return response
+
+    async def aget(self, http: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+        """Versión asíncrona de ``get``."""
+        self._before_call(kwargs)
+        t0 = time.perf_counter()
+        try:
+            response = await http.get(url, **kwargs)
+        except httpx.HTTPError:
+            self.record_failure(time.perf_counter() - t0)
+            raise
+        except BaseException:
+            # Cancelada (p. ej. por el presupuesto del modo paralelo): no es un fallo del proveedor
+            self.release_probe()
+            raise
+        self._record_response(response, time.perf_counter() - t0)
+        return response
+
+    def record_success(self, latency: float) -> None:
+        if latency > self.slow_call_seconds:
+            self.record_failure(latency)
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, True, latency))
+            if self._current_state(now) == HALF_OPEN:
+                logger.info("provider circuit closed provider=%s", self.name)
+                self._state = CLOSED
+                self._probe_started = None
+                # La ventana anterior describe la caída, no el estado actual
+                self._calls.clear()
+                self._calls.append((now, True, latency))
+
+    def record_failure(self, latency: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, False, latency))
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._open(now)
+            elif state == CLOSED:
+                total, failures = self._counts(now)
+                if total >= self.min_calls and failures / total >= self.failure_ratio:
+                    self._open(now)
+
+    def release_probe(self) -> None:
+        """Libera la prueba de ``half_open`` de una llamada que no llegó a completarse."""
+        with self._lock:
+            self._probe_started = None
+
+    def reset(self) -> None:
+        """Vuelve a ``closed`` con la ventana vacía."""
+        with self._lock:
+            self._calls.clear()
+            self._state = CLOSED
+            self._probe_started = None
+            self._rejected = 0
+
+    def timeout(self) -> float:
+        """
+        Timeout de lectura para la próxima llamada.
+
+        ``PROVIDER_TIMEOUT_P95_MULTIPLIER`` veces el p95 de las latencias
+        correctas de la ventana, acotado entre ``PROVIDER_TIMEOUT_MIN_SECONDS``
+        y ``HTTP_CLIENT_TIMEOUT_SECONDS``.
+        """
+        ceiling = settings.HTTP_CLIENT_TIMEOUT_SECONDS
+        p95 = self.p95_latency()
+        if p95 is None:
+            return ceiling
+        adaptive = p95 * settings.PROVIDER_TIMEOUT_P95_MULTIPLIER
+        return min(ceiling, max(settings.PROVIDER_TIMEOUT_MIN_SECONDS, adaptive))
+
+    def p95_latency(self) -> Optional[float]:
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = sorted(latency for _, ok, latency in self._calls if ok)
+        if len(latencies) < _MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95_latency()
+        timeout = self.timeout()
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            total, failures = self._counts(now)
+            retry_in = max(0.0, self._opened_at + self.open_seconds - now) if state == OPEN else None
+            return {
+                "state": state,
+                "calls": total,
+                "failures": failures,
+                "failure_ratio": round(failures / total, 3) if total else None,
+                "p95_ms": int(p95 * 1000) if p95 is not None else None,
+                "timeout_ms": int(timeout * 1000),
+                "rejected": self._rejected,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+    def _before_call(self, kwargs: Dict[str, Any]) -> None:
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        # Las llamadas con timeout propio (más corto) lo conservan
+        kwargs.setdefault(
+            "timeout", httpx.Timeout(self.timeout(), connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS)
+        )
+
+    def _record_response(self, response: httpx.Response, latency: float) -> None:
+        if is_failure_status(response.status_code):
+            self.record_failure(latency)
+        else:
+            self.record_success(latency)
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    def _probe_in_flight(self, now: float) -> bool:
+        # Una prueba que nunca registró resultado no bloquea el circuito para siempre
+        return self._probe_started is not None and now - self._probe_started < settings.HTTP_CLIENT_TIMEOUT_SECONDS
+
+    def _open(self, now: float) -> None:
+        logger.warning("provider circuit opened provider=%s open_seconds=%s", self.name, self.open_seconds)
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _counts(self, now: float) -> Tuple[int, int]:
+        self._prune(now)
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        return len(self._calls), failures
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Devuelve el breaker compartido del proveedor ``name`` en este proceso."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def circuit_breakers() -> List[CircuitBreaker]:
+    with _breakers_lock:
+        return list(_breakers.values())
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Respuestas que indican un proveedor caído o saturado (no un 404 normal)."""
+    return status_code >= 500 or status_code == 429
@@ -0,0 +1,202 @@
+"""
+Caché en disco de portadas de libros.
+
+Las portadas de OpenLibrary y Google Books se descargan una sola vez, se
+convierten a WebP en varios anchos y se guardan en ``UPLOAD_DIR/covers``.
+Desde ahí las sirve ``GET /covers/{book_id}`` sin volver a tocar el proveedor.
+
+Solo se descargan imágenes de ``COVER_PROXY_ALLOWED_HOSTS`` (también tras
+cada redirección): ``Book.cover_url`` lo escriben los usuarios y el servidor
+no debe pedir URLs arbitrarias. Una descarga fallida se recuerda durante
+``COVER_FAILURE_TTL_SECONDS`` para no repetirla en cada petición.
+"""
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlsplit
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.http_client import get_async_http_client
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Variantes: nombre -> ancho máximo en píxeles
+COVER_SIZES: Dict[str, int] = {"small": 160, "medium": 320, "large": 640}
+
+# Cambiar si cambia la codificación, para invalidar ficheros y ETags anteriores
+_COVER_VERSION = "v1"
+_MAX_REDIRECTS = 3
+_WEBP_QUALITY = 80
+
+
+class CoverUnavailableError(Exception):
+    """La portada no se puede descargar (host no permitido, error o no es una imagen)."""
+
+
+class CoverCache:
+    def __init__(self, root: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None) -> None:
+        self.root = root or os.path.join(settings.UPLOAD_DIR, "covers")
+        self._http = http_client
+        self.allowed_hosts = [h.strip().lower() for h in settings.COVER_PROXY_ALLOWED_HOSTS.split(",") if h.strip()]
+        # Varias peticiones de la misma portada sin caché esperan a una sola descarga
+        self.single_flight = SingleFlight()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http or get_async_http_client()
+
+    @staticmethod
+    def source_id(cover_url: str) -> str:
+        return hashlib.sha256(f"{_COVER_VERSION}:{cover_url}".encode("utf-8")).hexdigest()
+
+    def etag(self, cover_url: str, size: str) -> str:
+        # Los ficheros no cambian una vez escritos: el ETag fuerte sale de la URL de origen
+        return f'"{self.source_id(cover_url)[:32]}-{size}"'
+
+    def path_for(self, cover_url: str, size: str) -> str:
+        source_id = self.source_id(cover_url)
+        return os.path.join(self.root, source_id[:2], f"{source_id}-{size}.webp")
+
+    async def get(self, cover_url: str, size: str) -> str:
+        """
+        Ruta del WebP de ``cover_url`` en la variante ``size``, descargándolo si hace falta.
+
+        Raises:
+            CoverUnavailableError: si la portada no se puede descargar o decodificar
+        """
+        path = self.path_for(cover_url, size)
+        if os.path.exists(path):
+            return path
+        if not self.is_allowed(cover_url):
+            raise CoverUnavailableError(f"host not allowed: {cover_url}")
+        if self._failed_recently(cover_url):
+            raise CoverUnavailableError(f"recent download failure: {cover_url}")
+        await self.single_flight.arun(
+            self.source_id(cover_url),
+            lambda: self._fetch_and_store(cover_url),
+            lambda: True if os.path.exists(path) else None,
+        )
+        return path
+
+    def failure_path(self, cover_url: str) -> str:
+        source_id = self.source_id(cover_url)
+        return os.path.join(self.root, source_id[:2], f"{source_id}.failed")
+
+    def _failed_recently(self, cover_url: str) -> bool:
+        try:
+            age = time.time() - os.path.getmtime(self.failure_path(cover_url))
+        except OSError:
+            return False
+        return age < settings.COVER_FAILURE_TTL_SECONDS
+
+    async def _fetch_and_store(self, cover_url: str) -> None:
+        try:
+            data = await self._download(cover_url)
+            # Decodificar y redimensionar no debe bloquear el event loop
+            variants = await asyncio.to_thread(_render_variants, data)
+        except CoverUnavailableError:
+            # Marca en disco (compartida entre workers): no reintentar hasta COVER_FAILURE_TTL_SECONDS
+            _write_atomic(self.failure_path(cover_url), b"")
+            raise
+        # Todas las variantes de una vez: la descarga es lo caro
+        for size, payload in variants.items():
+            _write_atomic(self.path_for(cover_url, size), payload)
+        logger.info("cover cached url=%s source_bytes=%s", cover_url, len(data))
+
+    def is_allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        return parts.scheme in ("http", "https") and any(
+            host == allowed or host.endswith(f".{allowed}") for allowed in self.allowed_hosts
+        )
+
+    async def _download(self, url: str) -> bytes:
+        for _ in range(_MAX_REDIRECTS + 1):
+            if not self.is_allowed(url):
+                raise CoverUnavailableError(f"host not allowed: {url}")
+            try:
+                async with self.http.stream(
+                    "GET", url, timeout=settings.COVER_FETCH_TIMEOUT_SECONDS, follow_redirects=False
+                ) as response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers.get("location", ""))
+                        continue
+                    if response.status_code != 200:
+                        raise CoverUnavailableError(f"status {response.status_code} for {url}")
+                    return await _read_capped(response, settings.COVER_MAX_SOURCE_BYTES)
+            except httpx.HTTPError as e:
+                raise CoverUnavailableError(f"download failed for {url}: {e}") from e
+        raise CoverUnavailableError(f"too many redirects for {url}")
+
+
+async def _read_capped(response: httpx.Response, max_bytes: int) -> bytes:
+    chunks = bytearray()
+    async for chunk in response.aiter_bytes():
+        chunks += chunk
+        if len(chunks) > max_bytes:
+            raise CoverUnavailableError(f"cover larger than {max_bytes} bytes")
+    return bytes(chunks)
+
+
+def _render_variants(data: bytes) -> Dict[str, bytes]:
+    # PIL solo se carga al generar la primera portada, no al arrancar la API
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            image = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise CoverUnavailableError(f"not an image: {e}") from e
+    # OpenLibrary devuelve un GIF de 1x1 cuando no tiene portada
+    if image.width < 2 or image.height < 2:
+        raise CoverUnavailableError("placeholder image")
+
+    variants = {}
+    for size, width in COVER_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail((width, width * 2), Image.LANCZOS)
+        out = io.BytesIO()
+        variant.save(out, format="WEBP", quality=_WEBP_QUALITY, method=4)
+        variants[size] = out.getvalue()
+    return variants
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+_cover_cache: Optional[CoverCache] = None
+
+
+def get_cover_cache() -> CoverCache:
+    global _cover_cache
+    if _cover_cache is None:
+        _cover_cache = CoverCache()
+    return _cover_cache
+
+
+def cover_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.COVER_CACHE_MAX_AGE_SECONDS}",
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
@@ -7,15 +7,29 @@ import logging
 import httpx
 
 from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, ProviderError, get_circuit_breaker
+from app.services.http_client import get_async_http_client, get_http_client
 
 
 class GoogleBooksClient:
-    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.Client] = None) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
         self.base_url = "https://www.googleapis.com/books/v1"
         self.api_key = api_key or settings.GOOGLE_BOOKS_API_KEY
-        self.http = http_client or httpx.Client(timeout=10.0)
+        self.http = http_client or get_http_client()
+        self._async_http = async_http_client
+        self.breaker = breaker or get_circuit_breaker("googlebooks")
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def async_http(self) -> httpx.AsyncClient:
+        return self._async_http or get_async_http_client()
+
     def search_by_title(self, title: str, limit: int = 5) -> List[Dict[str, Any]]:
         q = f"intitle:{title}"
         return self._search(q=q, limit=limit)
@@ -24,21 +38,46 @@ class GoogleBooksClient:
         q = f"isbn:{isbn}"
         return self._search(q=q, limit=limit)
 
-    def _search(self, q: str, limit: int) -> List[Dict[str, Any]]:
-        url = f"{self.base_url}/volumes"
+    async def asearch_by_title(self, title: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return await self._asearch(q=f"intitle:{title}", limit=limit)
+
+    async def asearch_by_isbn(self, isbn: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return await self._asearch(q=f"isbn:{isbn}", limit=limit)
+
+    def _params(self, q: str, limit: int) -> Dict[str, Any]:
         params = {"q": q, "maxResults": limit}
         if self.api_key:
             params["key"] = self.api_key
+        return params
+
+    def _search(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Raises:
+            ProviderError: si Google Books no responde (una lista vacía es "sin resultados")
+        """
+        url = f"{self.base_url}/volumes"
         self.logger.info("googlebooks _search q=%s limit=%s", q, limit)
         try:
-            r = self.http.get(url, params=params)
+            r = self.breaker.get(self.http, url, params=self._params(q, limit))
             r.raise_for_status()
             data = r.json()
             items = data.get("items", [])
             return [self._normalize_item(it) for it in items]
         except Exception as e:
             self.logger.error("googlebooks _search error: %s", e)
-            return []
+            raise ProviderError(f"googlebooks: {e}") from e
+
+    async def _asearch(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        url = f"{self.base_url}/volumes"
+        self.logger.info("googlebooks _asearch q=%s limit=%s", q, limit)
+        try:
+            r = await self.breaker.aget(self.async_http, url, params=self._params(q, limit))
+            r.raise_for_status()
+            items = r.json().get("items", [])
+            return [self._normalize_item(it) for it in items]
+        except Exception as e:
+            self.logger.error("googlebooks _asearch error: %s", e)
+            raise ProviderError(f"googlebooks: {e}") from e
 
     def _normalize_item(self, it: Dict[str, Any]) -> Dict[str, Any]:
         info = it.get("volumeInfo", {})
@@ -0,0 +1,95 @@
+"""
+Clientes HTTP compartidos para los proveedores de catálogo externos.
+
+Crear un ``httpx.Client`` por búsqueda obliga a abrir una conexión (y un
+handshake TLS) en cada petición. Aquí se mantiene un cliente por proceso con
+keep-alive y límites de pool ajustados: uno asíncrono para los endpoints y uno
+síncrono para el código que corre en hilos o en los workers de escaneo.
+HTTP/2 se activa si el paquete ``h2`` está instalado.
+"""
+from typing import Optional
+import asyncio
+import logging
+import os
+import threading
+
+import httpx
+
+from app.config import settings
+
+# Optional import: HTTP/2 needs the h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _client_options() -> dict:
+    return {
+        "timeout": httpx.Timeout(
+            settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "http2": settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+    }
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_sync_client: Optional[httpx.Client] = None
+_sync_client_pid: Optional[int] = None
+_sync_client_lock = threading.Lock()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el ``httpx.AsyncClient`` compartido (se crea bajo demanda).
+
+    Las conexiones del pool pertenecen al event loop en el que se abrieron, así
+    que si se llama desde otro loop (p. ej. varios ``TestClient``) se crea un
+    cliente nuevo en lugar de reutilizar sockets de un loop ya cerrado.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        options = _client_options()
+        _async_client = httpx.AsyncClient(**options)
+        _async_client_loop = loop
+        logger.info("shared async http client created http2=%s", options["http2"])
+    return _async_client
+
+
+def get_http_client() -> httpx.Client:
+    """Devuelve el ``httpx.Client`` síncrono compartido por los hilos del proceso."""
+    global _sync_client, _sync_client_pid
+    with _sync_client_lock:
+        # Un proceso hijo no debe reutilizar los sockets heredados del padre
+        if _sync_client is None or _sync_client.is_closed or _sync_client_pid != os.getpid():
+            _sync_client = httpx.Client(**_client_options())
+            _sync_client_pid = os.getpid()
+        return _sync_client
+
+
+async def close_http_clients() -> None:
+    """Cierra los clientes compartidos (al apagar la aplicación)."""
+    global _async_client, _async_client_loop, _sync_client
+    async_client, _async_client, _async_client_loop = _async_client, None, None
+    with _sync_client_lock:
+        sync_client, _sync_client = _sync_client, None
+
+    if async_client is not None and not async_client.is_closed:
+        try:
+            await async_client.aclose()
+        except RuntimeError as e:  # pragma: no cover - el loop original ya no existe
+            logger.warning("shared async http client not closed cleanly: %s", e)
+    if sync_client is not None:
+        sync_client.close()
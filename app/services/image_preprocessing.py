@@ -0,0 +1,131 @@
+"""
+Preprocesado de imágenes para el escaneo: decodificar una sola vez.
+
+La imagen subida se decodifica una única vez, reducida a un lado máximo
+configurable, y las variantes (gris, contraste normalizado) se calculan bajo
+demanda y se comparten entre el lector de códigos de barras y el OCR.
+"""
+from functools import cached_property
+from typing import Optional, Tuple, Union
+import io
+import logging
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Las subidas llegan como memoryview sobre el buffer de lectura
+ImageBytes = Union[bytes, memoryview]
+
+# Bytes que se entregan a PIL para leer las dimensiones (cabecera + EXIF)
+_HEADER_BYTES = 256 * 1024
+
+# Orientaciones EXIF que giran la imagen 90° (cv2.imdecode ya las aplica)
+_EXIF_ORIENTATION = 0x0112
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Factores de reducción que libjpeg puede aplicar durante la propia decodificación
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class PreprocessedImage:
+    """Imagen decodificada y reducida, con variantes calculadas bajo demanda."""
+
+    def __init__(self, color: np.ndarray, original_size: Tuple[int, int]) -> None:
+        self.color = color
+        self.original_size = original_size
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        height, width = self.color.shape[:2]
+        return width, height
+
+    @property
+    def scale(self) -> float:
+        """Relación entre el tamaño procesado y el original (1.0 = sin reducir)."""
+        return self.size[0] / self.original_size[0] if self.original_size[0] else 1.0
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.color, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def contrast(self) -> np.ndarray:
+        """Escala de grises con contraste normalizado localmente (CLAHE)."""
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        return clahe.apply(self.gray)
+
+
+def _header_size(image_data: ImageBytes) -> Optional[Tuple[int, int]]:
+    # PIL solo lee la cabecera aquí; los píxeles no se decodifican. Se le pasa
+    # solo el principio del buffer para no copiar la imagen entera a BytesIO.
+    # El tamaño se devuelve ya girado según el EXIF, como lo decodifica OpenCV.
+    try:
+        with Image.open(io.BytesIO(image_data[:_HEADER_BYTES])) as img:
+            width, height = img.size
+            if img.getexif().get(_EXIF_ORIENTATION) in _TRANSPOSED_ORIENTATIONS:
+                return height, width
+            return width, height
+    except Exception:
+        return None
+
+
+def _decode_flag(size: Optional[Tuple[int, int]], max_edge: int) -> int:
+    if not size:
+        return cv2.IMREAD_COLOR
+    longest = max(size)
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if longest // factor >= max_edge:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def preprocess_image(image_data: ImageBytes, max_edge: Optional[int] = None) -> Optional[PreprocessedImage]:
+    """
+    Decodifica la imagen una vez y la reduce para que su lado mayor no supere ``max_edge``.
+
+    Args:
+        image_data: Bytes de la imagen (o una vista sobre ellos, sin copiar)
+        max_edge: Lado máximo en píxeles (por defecto ``SCAN_MAX_IMAGE_EDGE``)
+
+    Returns:
+        PreprocessedImage o None si la imagen no se puede decodificar
+    """
+    max_edge = max_edge or settings.SCAN_MAX_IMAGE_EDGE
+    try:
+        original_size = _header_size(image_data)
+        nparr = np.frombuffer(image_data, np.uint8)
+        image = cv2.imdecode(nparr, _decode_flag(original_size, max_edge))
+        if image is None:
+            logger.warning("No se pudo decodificar la imagen")
+            return None
+
+        height, width = image.shape[:2]
+        if original_size is None:
+            original_size = (width, height)
+
+        longest = max(width, height)
+        if longest > max_edge:
+            ratio = max_edge / longest
+            image = cv2.resize(
+                image,
+                (max(1, round(width * ratio)), max(1, round(height * ratio))),
+                interpolation=cv2.INTER_AREA,
+            )
+
+        logger.debug(
+            "imagen preprocesada original=%sx%s procesada=%sx%s",
+            original_size[0], original_size[1], image.shape[1], image.shape[0],
+        )
+        return PreprocessedImage(image, original_size)
+    except Exception as e:
+        logger.error(f"Error preprocesando imagen: {e}")
+        return None
@@ -0,0 +1,93 @@
+"""
+Búsquedas por ISBN en el catálogo local (volcados de OpenLibrary importados
+con ``python -m app.tasks.catalog_import``).
+
+Una búsqueda es una lectura por clave primaria, sin red: resuelve la mayoría
+de los escaneos sin llamar a los proveedores y sigue funcionando si están caídos.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.catalog import CatalogAuthor, CatalogEdition
+from app.utils.isbn import to_isbn13
+
+logger = logging.getLogger(__name__)
+
+
+def cover_url(cover_id: Optional[int]) -> Optional[str]:
+    return f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg" if cover_id else None
+
+
+class LocalCatalog:
+    def __init__(self, session_factory=None, enabled: Optional[bool] = None) -> None:
+        self.session_factory = session_factory or SessionLocal
+        self.enabled = settings.LOCAL_CATALOG_ENABLED if enabled is None else enabled
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, isbn: str) -> List[Dict[str, Any]]:
+        """Resultados (formato de ``BookSearchService.search``) del ISBN, o lista vacía."""
+        return self.lookup_many([isbn]).get(isbn, [])
+
+    def lookup_many(self, isbns: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Busca varios ISBN (10 o 13) con una sola consulta.
+
+        Returns:
+            ``{isbn: [resultado]}`` solo para los encontrados
+        """
+        if not self.enabled:
+            return {}
+        wanted = {isbn: to_isbn13(isbn) for isbn in isbns}
+        wanted = {isbn: isbn13 for isbn, isbn13 in wanted.items() if isbn13}
+        if not wanted:
+            return {}
+
+        try:
+            with self.session_factory() as db:
+                rows = db.query(CatalogEdition).filter(CatalogEdition.isbn13.in_(set(wanted.values()))).all()
+                author_keys = {key for row in rows for key in row.author_keys or []}
+                names = dict(
+                    db.query(CatalogAuthor.key, CatalogAuthor.name).filter(CatalogAuthor.key.in_(author_keys)).all()
+                ) if author_keys else {}
+        except SQLAlchemyError as e:
+            logger.warning("local catalog lookup failed isbns=%s error=%s", len(wanted), e)
+            return {}
+
+        by_isbn13 = {row.isbn13: row for row in rows}
+        found = {
+            isbn: [self._to_result(by_isbn13[isbn13], names)]
+            for isbn, isbn13 in wanted.items()
+            if isbn13 in by_isbn13
+        }
+        self._hits += len(found)
+        self._misses += len(wanted) - len(found)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+        }
+
+    @staticmethod
+    def _to_result(row: CatalogEdition, author_names: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "title": row.title,
+            "authors": [author_names[key] for key in row.author_keys or [] if key in author_names],
+            "isbn": row.isbn13,
+            "cover_url": cover_url(row.cover_id),
+            "description": row.description,
+            "publisher": row.publisher,
+            "published_date": row.published_date,
+            "page_count": row.page_count,
+            "language": row.language,
+            "source": "openlibrary",
+        }
@@ -0,0 +1,161 @@
+"""
+Pool de lectores EasyOCR compartido durante toda la vida del proceso.
+
+Crear un ``easyocr.Reader`` carga los pesos del detector y del reconocedor
+(segundos y cientos de MB), así que los lectores se crean una sola vez y se
+prestan a cada escaneo mediante ``checkout()``.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import queue
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OCRReaderPoolExhausted(Exception):
+    """No hay lectores libres dentro del tiempo de espera indicado."""
+
+
+def _default_reader_factory(languages: Sequence[str]) -> Any:
+    import easyocr
+
+    return easyocr.Reader(list(languages), gpu=False)
+
+
+class OCRReaderPool:
+    def __init__(
+        self,
+        languages: Optional[Sequence[str]] = None,
+        size: Optional[int] = None,
+        reader_factory: Optional[Callable[[Sequence[str]], Any]] = None,
+        checkout_timeout: Optional[float] = None,
+    ) -> None:
+        self.languages: Tuple[str, ...] = tuple(languages or ("en", "es"))
+        self.size = max(1, size or settings.OCR_READER_POOL_SIZE)
+        self.checkout_timeout = (
+            checkout_timeout if checkout_timeout is not None else settings.OCR_READER_CHECKOUT_TIMEOUT_SECONDS
+        )
+        self._factory = reader_factory or _default_reader_factory
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    def _try_create(self) -> Optional[Any]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            t0 = time.perf_counter()
+            reader = self._factory(self.languages)
+            logger.info(
+                "ocr reader created languages=%s load_ms=%s",
+                ",".join(self.languages),
+                int((time.perf_counter() - t0) * 1000),
+            )
+            return reader
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def warmup(self) -> int:
+        """
+        Crea todos los lectores del pool por adelantado.
+
+        Returns:
+            Número de lectores disponibles tras el calentamiento
+        """
+        while True:
+            reader = self._try_create()
+            if reader is None:
+                break
+            self._idle.put(reader)
+        logger.info("ocr reader pool warmed size=%s", self._created)
+        return self._created
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        reader = self._try_create()
+        if reader is not None:
+            return reader
+
+        wait = self.checkout_timeout if timeout is None else timeout
+        try:
+            return self._idle.get(timeout=wait)
+        except queue.Empty:
+            raise OCRReaderPoolExhausted(
+                f"No hay lectores OCR libres tras {wait}s (pool size={self.size})"
+            )
+
+    def release(self, reader: Any) -> None:
+        self._idle.put(reader)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Presta un lector del pool y lo devuelve al salir del bloque.
+
+        Args:
+            timeout: Segundos máximos de espera si todos los lectores están ocupados
+        """
+        reader = self.acquire(timeout=timeout)
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "languages": list(self.languages),
+            "size": self.size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+        }
+
+
+_pools: Dict[Tuple[str, ...], OCRReaderPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ocr_reader_pool(languages: Optional[List[str]] = None) -> OCRReaderPool:
+    """Devuelve el pool del proceso para la combinación de idiomas indicada."""
+    key = tuple(languages or ("en", "es"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = OCRReaderPool(languages=key)
+            _pools[key] = pool
+        return pool
+
+
+def warmup_ocr_reader_pool_in_background(languages: Optional[List[str]] = None) -> threading.Thread:
+    """
+    Calienta el pool en un hilo aparte para no retrasar el arranque de la API.
+
+    Los escaneos que lleguen antes de terminar esperan al lector en ``checkout()``.
+    """
+    pool = get_ocr_reader_pool(languages)
+
+    def _run() -> None:
+        try:
+            pool.warmup()
+        except Exception as e:
+            logger.error("ocr reader pool warmup failed: %s", e)
+
+    thread = threading.Thread(target=_run, name="ocr-reader-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,86 +1,307 @@
 """
 Servicio para extraer texto de imágenes de libros usando EasyOCR.
 """
-import easyocr
 import cv2
 import numpy as np
-from typing import List, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
 import logging
 import re
 
+from app.services.image_preprocessing import PreprocessedImage
+from app.services.ocr_reader_pool import OCRReaderPool, get_ocr_reader_pool
+
 logger = logging.getLogger(__name__)
 
+# Confianza mínima para considerar un fragmento reconocido por EasyOCR
+MIN_CONFIDENCE = 0.5
+
+_AUTHOR_KEYWORDS_RE = re.compile(r"\b(by|por|autor|author)\b[:\s]*(.*)", re.IGNORECASE)
+
+
+@dataclass
+class OCRTextBox:
+    """Fragmento de texto reconocido junto con su caja delimitadora."""
+
+    text: str
+    confidence: float
+    bbox: Sequence[Any] = field(default_factory=list)
+
+    def _coords(self, axis: int) -> List[float]:
+        try:
+            return [float(point[axis]) for point in self.bbox]
+        except (TypeError, IndexError, ValueError):
+            return []
+
+    @property
+    def top(self) -> float:
+        ys = self._coords(1)
+        return min(ys) if ys else 0.0
+
+    @property
+    def left(self) -> float:
+        xs = self._coords(0)
+        return min(xs) if xs else 0.0
+
+    @property
+    def height(self) -> float:
+        ys = self._coords(1)
+        return max(ys) - min(ys) if ys else 0.0
+
+    @property
+    def width(self) -> float:
+        xs = self._coords(0)
+        return max(xs) - min(xs) if xs else 0.0
+
+    @property
+    def center_y(self) -> float:
+        return self.top + self.height / 2
+
+    @property
+    def is_vertical(self) -> bool:
+        """Texto girado 90° (típico de los lomos de una estantería)."""
+        return self.height > self.width * 1.5
+
+
+@dataclass
+class OCRLine:
+    """Cajas alineadas horizontalmente, leídas de izquierda a derecha."""
+
+    boxes: List[OCRTextBox]
+
+    @property
+    def text(self) -> str:
+        return " ".join(box.text for box in self.boxes)
+
+    @property
+    def height(self) -> float:
+        return max((box.height for box in self.boxes), default=0.0)
+
+    @property
+    def top(self) -> float:
+        return min((box.top for box in self.boxes), default=0.0)
+
+
+@dataclass
+class OCRResult:
+    """
+    Resultado de una única pasada de OCR sobre una imagen.
+
+    Se calcula una vez por imagen y lo comparten las heurísticas de título y autor.
+    """
+
+    boxes: List[OCRTextBox] = field(default_factory=list)
+
+    @classmethod
+    def from_readtext(cls, results: Sequence[Any]) -> "OCRResult":
+        boxes = []
+        for bbox, text, confidence in results:
+            text = (text or "").strip()
+            if text:
+                boxes.append(OCRTextBox(text=text, confidence=float(confidence), bbox=bbox))
+        return cls(boxes=boxes)
+
+    @property
+    def confident_boxes(self) -> List[OCRTextBox]:
+        return [box for box in self.boxes if box.confidence > MIN_CONFIDENCE]
+
+    @property
+    def text(self) -> str:
+        return " ".join(box.text for box in self.confident_boxes)
+
+    @property
+    def confidence(self) -> float:
+        boxes = self.confident_boxes
+        if not boxes:
+            return 0.0
+        return sum(box.confidence for box in boxes) / len(boxes)
+
+    def lines(self) -> List[OCRLine]:
+        """Agrupa las cajas fiables en líneas, de arriba abajo."""
+        lines: List[OCRLine] = []
+        for box in sorted(self.confident_boxes, key=lambda b: b.center_y):
+            current = lines[-1] if lines else None
+            tolerance = max(box.height, current.height if current else 0.0) / 2
+            if current and abs(box.center_y - current.boxes[-1].center_y) <= tolerance:
+                current.boxes.append(box)
+            else:
+                lines.append(OCRLine(boxes=[box]))
+        for line in lines:
+            line.boxes.sort(key=lambda b: b.left)
+        return lines
+
+    @property
+    def region(self) -> Optional[Dict[str, int]]:
+        """Rectángulo que engloba todas las cajas (x, y, width, height)."""
+        if not self.boxes:
+            return None
+        left = min(box.left for box in self.boxes)
+        top = min(box.top for box in self.boxes)
+        right = max(box.left + box.width for box in self.boxes)
+        bottom = max(box.top + box.height for box in self.boxes)
+        return {"x": int(left), "y": int(top), "width": int(right - left), "height": int(bottom - top)}
+
+    def spine_regions(self) -> List["OCRResult"]:
+        """
+        Separa el texto de una foto de estantería en un grupo por libro.
+
+        Los lomos verticales se agrupan por columnas que se solapan en X y los
+        libros apilados (texto horizontal) por filas, como en ``lines()``.
+        """
+        vertical = [box for box in self.confident_boxes if box.is_vertical]
+        horizontal = [box for box in self.confident_boxes if not box.is_vertical]
+
+        columns: List[List[OCRTextBox]] = []
+        for box in sorted(vertical, key=lambda b: b.left):
+            current = columns[-1] if columns else None
+            if current:
+                right = max(b.left + b.width for b in current)
+                overlap = right - box.left
+                if overlap >= min(box.width, right - min(b.left for b in current)) / 2:
+                    current.append(box)
+                    continue
+            columns.append([box])
+
+        regions = [OCRResult(boxes=sorted(column, key=lambda b: b.top)) for column in columns]
+        regions.extend(OCRResult(boxes=line.boxes) for line in OCRResult(boxes=horizontal).lines())
+        return regions
+
 
 class OCRService:
-    def __init__(self, languages: List[str] = None):
+    def __init__(
+        self,
+        languages: List[str] = None,
+        reader: Optional[Any] = None,
+        reader_pool: Optional[OCRReaderPool] = None,
+    ):
         """
         Inicializa el servicio OCR.
-        
+
+        Los lectores de EasyOCR no se crean aquí: se toman prestados del pool
+        del proceso en cada lectura, salvo que se inyecte un ``reader`` concreto.
+
         Args:
             languages: Lista de idiomas para OCR (por defecto ['en', 'es'])
+            reader: Lector ya construido (útil en tests)
+            reader_pool: Pool de lectores a utilizar (por defecto el global)
         """
         self.languages = languages or ['en', 'es']
-        self.reader = easyocr.Reader(self.languages, gpu=False)
-        
-    def extract_text_from_image(self, image_data: bytes) -> str:
+        self.reader = reader
+        self.reader_pool = reader_pool
+
+    @contextmanager
+    def _checkout_reader(self) -> Iterator[Any]:
+        if self.reader is not None:
+            yield self.reader
+            return
+        pool = self.reader_pool or get_ocr_reader_pool(self.languages)
+        with pool.checkout() as reader:
+            yield reader
+
+    def analyze_image(
+        self,
+        image_data: Union[bytes, PreprocessedImage],
+        rotation_info: Optional[List[int]] = None,
+    ) -> OCRResult:
         """
-        Extrae texto de una imagen.
-        
+        Ejecuta EasyOCR una sola vez sobre la imagen.
+
         Args:
-            image_data: Bytes de la imagen
-            
+            image_data: Bytes de la imagen o imagen ya preprocesada
+            rotation_info: Ángulos adicionales a probar (p. ej. [90, 270] para lomos)
+
         Returns:
-            Texto extraído
+            OCRResult con texto, confianza y cajas (vacío si hay error)
         """
         try:
-            # Convertir bytes a imagen OpenCV
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
+            if isinstance(image_data, PreprocessedImage):
+                image = image_data.color
+            else:
+                # Convertir bytes a imagen OpenCV
+                nparr = np.frombuffer(image_data, np.uint8)
+                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
             if image is None:
                 logger.warning("No se pudo decodificar la imagen")
-                return ""
-            
+                return OCRResult()
+
             # Procesar con EasyOCR
-            results = self.reader.readtext(image)
-            
-            # Extraer texto de los resultados
-            text_parts = []
-            for (bbox, text, confidence) in results:
-                if confidence > 0.5:  # Filtrar por confianza
-                    text_parts.append(text.strip())
-            
-            full_text = " ".join(text_parts)
-            logger.info(f"Texto extraído: {full_text[:100]}...")
-            
-            return full_text
-            
+            with self._checkout_reader() as reader:
+                if rotation_info:
+                    results = reader.readtext(image, rotation_info=rotation_info)
+                else:
+                    results = reader.readtext(image)
+
+            ocr_result = OCRResult.from_readtext(results)
+            logger.info(f"Texto extraído: {ocr_result.text[:100]}...")
+
+            return ocr_result
+
         except Exception as e:
             logger.error(f"Error en OCR: {e}")
-            return ""
+            return OCRResult()
 
-    def extract_book_title(self, image_data: bytes) -> Optional[str]:
+    def extract_text_from_image(self, image_data: Union[bytes, PreprocessedImage]) -> str:
+        """
+        Extrae texto de una imagen.
+
+        Args:
+            image_data: Bytes de la imagen o imagen ya preprocesada
+
+        Returns:
+            Texto extraído
+        """
+        return self.analyze_image(image_data).text
+
+    def extract_book_title(self, source: Union[bytes, OCRResult]) -> Optional[str]:
         """
         Extrae el título del libro de una imagen.
-        
+
         Args:
-            image_data: Bytes de la imagen
-            
+            source: Resultado OCR ya calculado o bytes de la imagen
+
         Returns:
             Título del libro o None
         """
-        text = self.extract_text_from_image(image_data)
-        
+        if isinstance(source, OCRResult):
+            title = self._title_from_layout(source)
+            if title:
+                return title
+            return self._title_from_text(source.text)
+
+        return self._title_from_text(self.extract_text_from_image(source))
+
+    def extract_author(self, source: Union[bytes, OCRResult]) -> Optional[str]:
+        """
+        Extrae el autor del libro de una imagen.
+
+        Args:
+            source: Resultado OCR ya calculado o bytes de la imagen
+
+        Returns:
+            Autor del libro o None
+        """
+        if isinstance(source, OCRResult):
+            lines = [line.text for line in source.lines()]
+            return self._author_from_keywords(lines) or self._author_from_layout(source)
+
+        text = self.extract_text_from_image(source)
         if not text:
             return None
-        
+        return self._author_from_keywords(text.split('\n'))
+
+    def _title_from_text(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+
         # Limpiar y normalizar texto
         clean_text = re.sub(r'\s+', ' ', text.strip())
-        
+
         # Heurísticas para encontrar el título:
         # 1. Buscar líneas que parezcan títulos (mayúsculas, longitud)
         lines = clean_text.split('\n')
-        
+
         for line in lines:
             line = line.strip()
             if len(line) > 5 and len(line) < 100:  # Longitud razonable
@@ -90,43 +311,59 @@ class OCRService:
                 # Si es la primera línea significativa, podría ser título
                 if len(line) > 10:
                     return line
-        
+
         # Si no encontramos nada específico, devolver las primeras palabras
         words = clean_text.split()
         if len(words) > 2:
             return " ".join(words[:5])  # Primeras 5 palabras
-        
+
         return clean_text[:50] if clean_text else None
 
-    def extract_author(self, image_data: bytes) -> Optional[str]:
-        """
-        Extrae el autor del libro de una imagen.
-        
-        Args:
-            image_data: Bytes de la imagen
-            
-        Returns:
-            Autor del libro o None
-        """
-        text = self.extract_text_from_image(image_data)
-        
-        if not text:
+    def _title_from_layout(self, result: OCRResult) -> Optional[str]:
+        # En una portada el título suele ser el texto de mayor tamaño:
+        # tomamos las líneas más altas y las unimos en orden de lectura.
+        candidates = [
+            line for line in result.lines()
+            if any(c.isalpha() for c in line.text) and not _AUTHOR_KEYWORDS_RE.search(line.text)
+        ]
+        if not candidates:
+            return None
+
+        max_height = max(line.height for line in candidates)
+        if max_height <= 0:
             return None
-        
-        # Buscar patrones comunes de autor
-        lines = text.split('\n')
-        
+
+        title_lines = [line.text for line in candidates if line.height >= max_height * 0.75]
+        title = re.sub(r'\s+', ' ', " ".join(title_lines)).strip()
+        if len(title) < 2:
+            return None
+        return title[:100]
+
+    def _author_from_keywords(self, lines: List[str]) -> Optional[str]:
         for line in lines:
-            line = line.strip()
             # Buscar líneas que contengan "by", "por", "autor", etc.
-            if any(keyword in line.lower() for keyword in ['by', 'por', 'autor', 'author']):
-                # Extraer el nombre después de la palabra clave
-                for keyword in ['by', 'por', 'autor', 'author']:
-                    if keyword in line.lower():
-                        parts = line.lower().split(keyword)
-                        if len(parts) > 1:
-                            author = parts[1].strip()
-                            if len(author) > 2:
-                                return author.title()
-        
+            for match in _AUTHOR_KEYWORDS_RE.finditer(line.strip()):
+                author = match.group(2).strip()
+                if len(author) > 2:
+                    return author.title()
         return None
+
+    def _author_from_layout(self, result: OCRResult) -> Optional[str]:
+        lines = result.lines()
+        title = self._title_from_layout(result)
+        candidates = []
+        for line in lines:
+            text = line.text.strip()
+            if title and text in title:
+                continue
+            words = text.split()
+            # Un nombre de autor: 2-4 palabras sin dígitos
+            if 2 <= len(words) <= 4 and not any(c.isdigit() for c in text):
+                candidates.append(line)
+
+        if not candidates:
+            return None
+
+        best = max(candidates, key=lambda line: line.height)
+        author = best.text.strip()
+        return author.title() if author.isupper() else author
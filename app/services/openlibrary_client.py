@@ -1,71 +1,283 @@
 """
 Cliente para OpenLibrary API: búsqueda por título y por ISBN.
 """
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
 import logging
 
 import httpx
 
 from app.config import settings
+from app.services.cache import RedisCache, TieredCache
+from app.services.circuit_breaker import CircuitBreaker, ProviderError, get_circuit_breaker
+from app.services.http_client import get_async_http_client, get_http_client
+
+_AUTHOR_CACHE_PREFIX = "openlibrary:author:v1"
 
 
 class OpenLibraryClient:
-    def __init__(self, base_url: Optional[str] = None, http_client: Optional[httpx.Client] = None) -> None:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        author_cache: Optional[RedisCache] = None,
+    ) -> None:
         self.base_url = base_url or settings.OPENLIBRARY_BASE_URL.rstrip("/")
-        self.http = http_client or httpx.Client(timeout=10.0)
+        self.http = http_client or get_http_client()
+        self._async_http = async_http_client
+        self.breaker = breaker or get_circuit_breaker("openlibrary")
+        # Los registros de autor casi nunca cambian: TTL largo
+        self.author_cache = author_cache or TieredCache(
+            default_ttl_seconds=settings.OPENLIBRARY_AUTHOR_CACHE_TTL_SECONDS
+        )
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def async_http(self) -> httpx.AsyncClient:
+        return self._async_http or get_async_http_client()
+
     def search_by_title(self, title: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Busca por título y enriquece los resultados con sus ediciones.
+
+        Raises:
+            ProviderError: si OpenLibrary no responde (una lista vacía es "sin resultados")
+        """
         url = f"{self.base_url}/search.json"
         params = {"q": title, "limit": limit}
         self.logger.info("openlibrary search_by_title title=%s limit=%s", title, limit)
         try:
-            r = self.http.get(url, params=params)
+            r = self.breaker.get(self.http, url, params=params)
             r.raise_for_status()
             data = r.json()
             docs = data.get("docs", [])
             
-            results = []
-            for doc in docs:
-                # Intentar enriquecer con datos de la edición si hay ISBN
-                isbns = doc.get("isbn") or []
-                enriched = None
-                
-                if isbns:
-                    # Intentar obtener detalles completos del primer ISBN
-                    for isbn in isbns[:2]:  # Probar con los primeros 2 ISBNs
-                        try:
-                            edition_url = f"{self.base_url}/isbn/{isbn}.json"
-                            edition_r = self.http.get(edition_url, timeout=2.0)
-                            if edition_r.status_code == 200:
-                                edition_data = edition_r.json()
-                                enriched = self._normalize_edition(edition_data)
-                                if enriched:
-                                    break
-                        except:
-                            continue
-                
-                # Si no pudimos enriquecer, usar datos básicos
-                if not enriched:
-                    enriched = self._normalize_doc(doc)
-                
-                results.append(enriched)
-            
-            return results
+            # Enriquecer con los datos de edición de toda la página en una sola petición
+            editions = self._pick_editions(docs, self._fetch_editions(docs))
+            authors = self._resolve_authors(self._missing_author_keys(editions))
+            return self._enrich_docs(docs, editions, authors)
         except Exception as e:
             self.logger.error("openlibrary search_by_title error: %s", e)
-            return []
+            raise ProviderError(f"openlibrary: {e}") from e
+
+    async def asearch_by_title(self, title: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Versión asíncrona de ``search_by_title``."""
+        url = f"{self.base_url}/search.json"
+        params = {"q": title, "limit": limit}
+        self.logger.info("openlibrary asearch_by_title title=%s limit=%s", title, limit)
+        try:
+            r = await self.breaker.aget(self.async_http, url, params=params)
+            r.raise_for_status()
+            docs = r.json().get("docs", [])
+            editions = self._pick_editions(docs, await self._afetch_editions(docs))
+            authors = await self._aresolve_authors(self._missing_author_keys(editions))
+            return self._enrich_docs(docs, editions, authors)
+        except Exception as e:
+            self.logger.error("openlibrary asearch_by_title error: %s", e)
+            raise ProviderError(f"openlibrary: {e}") from e
+
+    def _edition_bibkeys(self, docs: List[Dict[str, Any]]) -> List[str]:
+        # Los primeros 2 ISBNs de cada resultado, sin repetir
+        bibkeys: Dict[str, None] = {}
+        for doc in docs:
+            for isbn in (doc.get("isbn") or [])[:2]:
+                bibkeys[f"ISBN:{isbn}"] = None
+        return list(bibkeys)
+
+    def _editions_request(self, bibkeys: List[str]) -> Dict[str, Any]:
+        # /api/books con jscmd=details devuelve, por clave, el mismo registro
+        # de edición que /isbn/{isbn}.json
+        return {
+            "url": f"{self.base_url}/api/books",
+            "params": {"bibkeys": ",".join(bibkeys), "format": "json", "jscmd": "details"},
+            "timeout": settings.OPENLIBRARY_EDITIONS_TIMEOUT_SECONDS,
+        }
+
+    def _fetch_editions(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        bibkeys = self._edition_bibkeys(docs)
+        if not bibkeys:
+            return {}
+        try:
+            r = self.breaker.get(self.http, **self._editions_request(bibkeys))
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            self.logger.warning("openlibrary editions lookup failed keys=%s error=%s", len(bibkeys), e)
+            return {}
+
+    async def _afetch_editions(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        bibkeys = self._edition_bibkeys(docs)
+        if not bibkeys:
+            return {}
+        try:
+            r = await self.breaker.aget(self.async_http, **self._editions_request(bibkeys))
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            self.logger.warning("openlibrary editions lookup failed keys=%s error=%s", len(bibkeys), e)
+            return {}
+
+    def _pick_editions(self, docs: List[Dict[str, Any]], editions: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        # Por cada resultado, el registro de la primera edición con título
+        picked = []
+        for doc in docs:
+            record = None
+            for isbn in (doc.get("isbn") or [])[:2]:
+                details = (editions.get(f"ISBN:{isbn}") or {}).get("details")
+                if isinstance(details, dict) and details.get("title"):
+                    record = details
+                    break
+            picked.append(record)
+        return picked
+
+    def _enrich_docs(
+        self,
+        docs: List[Dict[str, Any]],
+        editions: List[Optional[Dict[str, Any]]],
+        author_names: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        results = []
+        for doc, record in zip(docs, editions):
+            # Si no hay edición, usar los datos básicos de la búsqueda
+            enriched = self._normalize_edition(record, author_names) if record else None
+            results.append(enriched or self._normalize_doc(doc))
+        return results
+
+    @staticmethod
+    def _missing_author_keys(records: Iterable[Optional[Dict[str, Any]]]) -> List[str]:
+        """Keys de autor (``OL123A``) sin nombre en los registros, sin repetir."""
+        keys: Dict[str, None] = {}
+        for record in records:
+            for author in (record or {}).get("authors") or []:
+                if isinstance(author, dict) and not author.get("name") and author.get("key"):
+                    keys[author["key"].rstrip("/").split("/")[-1]] = None
+        return list(keys)
+
+    def _cached_authors(self, keys: List[str]) -> Dict[str, str]:
+        cached = self.author_cache.get_many_json([f"{_AUTHOR_CACHE_PREFIX}:{key}" for key in keys])
+        return {
+            key: cached[f"{_AUTHOR_CACHE_PREFIX}:{key}"]
+            for key in keys
+            if cached.get(f"{_AUTHOR_CACHE_PREFIX}:{key}")
+        }
+
+    def _remember_author(self, key: str, name: Optional[str]) -> None:
+        if name:
+            self.author_cache.set_json(f"{_AUTHOR_CACHE_PREFIX}:{key}", name)
+
+    def _author_name(self, data: Dict[str, Any]) -> Optional[str]:
+        return data.get("name") or data.get("personal_name")
+
+    def _fetch_author(self, key: str) -> Optional[str]:
+        try:
+            r = self.breaker.get(
+                self.http, f"{self.base_url}/authors/{key}.json", timeout=settings.OPENLIBRARY_AUTHOR_TIMEOUT_SECONDS
+            )
+            r.raise_for_status()
+            return self._author_name(r.json())
+        except Exception as e:
+            self.logger.debug("openlibrary author lookup failed key=%s error=%s", key, e)
+            return None
+
+    async def _afetch_author(self, key: str) -> Optional[str]:
+        try:
+            r = await self.breaker.aget(
+                self.async_http, f"{self.base_url}/authors/{key}.json", timeout=settings.OPENLIBRARY_AUTHOR_TIMEOUT_SECONDS
+            )
+            r.raise_for_status()
+            return self._author_name(r.json())
+        except Exception as e:
+            self.logger.debug("openlibrary author lookup failed key=%s error=%s", key, e)
+            return None
+
+    def _resolve_authors(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Resuelve keys de autor a nombres: primero la caché, el resto en paralelo.
+
+        Returns:
+            Diccionario ``key -> nombre`` con las keys que se han podido resolver
+        """
+        if not keys:
+            return {}
+        names = self._cached_authors(keys)
+        missing = [key for key in keys if key not in names]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), settings.SEARCH_BATCH_CONCURRENCY)) as pool:
+                fetched = list(pool.map(self._fetch_author, missing))
+            for key, name in zip(missing, fetched):
+                self._remember_author(key, name)
+                if name:
+                    names[key] = name
+        self.logger.debug("openlibrary authors resolved=%s fetched=%s", len(names), len(missing))
+        return names
+
+    async def _aresolve_authors(self, keys: List[str]) -> Dict[str, str]:
+        """Versión asíncrona de ``_resolve_authors``."""
+        if not keys:
+            return {}
+        names = self._cached_authors(keys)
+        missing = [key for key in keys if key not in names]
+        if missing:
+            fetched = await asyncio.gather(*(self._afetch_author(key) for key in missing))
+            for key, name in zip(missing, fetched):
+                self._remember_author(key, name)
+                if name:
+                    names[key] = name
+        self.logger.debug("openlibrary authors resolved=%s fetched=%s", len(names), len(missing))
+        return names
+
+    async def asearch_by_isbns(self, isbns: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Busca muchos ISBN con ``/api/books?bibkeys=...``, en bloques de
+        ``OPENLIBRARY_BIBKEYS_BATCH_SIZE`` lanzados en paralelo.
+
+        Returns:
+            ``{isbn: resultados}`` (lista vacía si OpenLibrary no lo tiene).
+            Los ISBN de un bloque que falló no aparecen.
+        """
+        size = settings.OPENLIBRARY_BIBKEYS_BATCH_SIZE
+        chunks = [isbns[i:i + size] for i in range(0, len(isbns), size)]
+        self.logger.info("openlibrary asearch_by_isbns isbns=%s requests=%s", len(isbns), len(chunks))
+        responses = await asyncio.gather(*(self._afetch_bibkeys(chunk) for chunk in chunks))
+
+        records: Dict[str, Optional[Dict[str, Any]]] = {}
+        for chunk, editions in zip(chunks, responses):
+            if editions is None:
+                continue
+            for isbn in chunk:
+                details = (editions.get(f"ISBN:{isbn}") or {}).get("details")
+                records[isbn] = details if isinstance(details, dict) else None
+
+        authors = await self._aresolve_authors(self._missing_author_keys(records.values()))
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        for isbn, record in records.items():
+            normalized = self._normalize_edition(record, authors) if record else None
+            found[isbn] = [normalized] if normalized else []
+        return found
+
+    async def _afetch_bibkeys(self, isbns: List[str]) -> Optional[Dict[str, Any]]:
+        try:
+            r = await self.breaker.aget(self.async_http, **self._editions_request([f"ISBN:{isbn}" for isbn in isbns]))
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            self.logger.warning("openlibrary bibkeys lookup failed isbns=%s error=%s", len(isbns), e)
+            return None
 
     def search_by_isbn(self, isbn: str) -> List[Dict[str, Any]]:
         # Intentar primero con el endpoint de ISBN que da más detalles
         url = f"{self.base_url}/isbn/{isbn}.json"
         self.logger.info("openlibrary search_by_isbn isbn=%s", isbn)
         try:
-            r = self.http.get(url)
+            r = self.breaker.get(self.http, url)
             if r.status_code == 200:
                 data = r.json()
                 # Este endpoint devuelve un solo libro con detalles completos
-                normalized = self._normalize_edition(data)
+                authors = self._resolve_authors(self._missing_author_keys([data]))
+                normalized = self._normalize_edition(data, authors)
                 return [normalized] if normalized else []
         except Exception as e:
             self.logger.debug("openlibrary isbn endpoint failed: %s", e)
@@ -74,14 +286,39 @@ class OpenLibraryClient:
         try:
             url = f"{self.base_url}/search.json"
             params = {"q": f"isbn:{isbn}", "limit": 5}
-            r = self.http.get(url, params=params)
+            r = self.breaker.get(self.http, url, params=params)
             r.raise_for_status()
             data = r.json()
             docs = data.get("docs", [])
             return [self._normalize_doc(d) for d in docs]
         except Exception as e:
             self.logger.error("openlibrary search_by_isbn error: %s", e)
-            return []
+            raise ProviderError(f"openlibrary: {e}") from e
+
+    async def asearch_by_isbn(self, isbn: str) -> List[Dict[str, Any]]:
+        """Versión asíncrona de ``search_by_isbn``."""
+        url = f"{self.base_url}/isbn/{isbn}.json"
+        self.logger.info("openlibrary asearch_by_isbn isbn=%s", isbn)
+        try:
+            r = await self.breaker.aget(self.async_http, url)
+            if r.status_code == 200:
+                data = r.json()
+                authors = await self._aresolve_authors(self._missing_author_keys([data]))
+                normalized = self._normalize_edition(data, authors)
+                return [normalized] if normalized else []
+        except Exception as e:
+            self.logger.debug("openlibrary isbn endpoint failed: %s", e)
+
+        try:
+            url = f"{self.base_url}/search.json"
+            params = {"q": f"isbn:{isbn}", "limit": 5}
+            r = await self.breaker.aget(self.async_http, url, params=params)
+            r.raise_for_status()
+            docs = r.json().get("docs", [])
+            return [self._normalize_doc(d) for d in docs]
+        except Exception as e:
+            self.logger.error("openlibrary asearch_by_isbn error: %s", e)
+            raise ProviderError(f"openlibrary: {e}") from e
 
     def _normalize_doc(self, d: Dict[str, Any]) -> Dict[str, Any]:
         title = d.get("title")
@@ -153,7 +390,9 @@ class OpenLibraryClient:
         
         return result
 
-    def _normalize_edition(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _normalize_edition(
+        self, data: Dict[str, Any], author_names: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Normaliza datos del endpoint /isbn/{isbn}.json que devuelve una edición completa."""
         try:
             title = data.get("title")
@@ -165,12 +404,15 @@ class OpenLibraryClient:
             author_data = data.get("authors") or []
             for author in author_data:
                 if isinstance(author, dict):
-                    # Necesitaríamos hacer otra llamada para obtener el nombre
-                    # Por ahora, extraemos la key
-                    author_key = author.get("key", "")
-                    if author_key:
-                        # Extraer nombre del key si es posible
-                        authors.append(author_key.split("/")[-1].replace("_", " ").title())
+                    # /api/books?jscmd=details incluye el nombre junto a la key;
+                    # /isbn/{isbn}.json solo trae la key, resuelta en author_names
+                    if author.get("name"):
+                        authors.append(author["name"])
+                        continue
+                    author_key = author.get("key", "").rstrip("/").split("/")[-1]
+                    name = (author_names or {}).get(author_key)
+                    if name:
+                        authors.append(name)
             
             # ISBN
             isbn_10 = data.get("isbn_10")
@@ -0,0 +1,112 @@
+"""
+Recuento de las búsquedas más frecuentes, para calentar la caché de catálogo.
+
+Cada proceso acumula los recuentos en memoria y los vuelca a Redis como mucho
+una vez cada ``SEARCH_POPULAR_FLUSH_SECONDS``, así que registrar una búsqueda
+no añade un viaje a Redis por petición. En Redis hay un ZSET por día
+(``search:popular:AAAAMMDD``) que caduca pasados ``SEARCH_WARM_QUERY_DAYS``.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import threading
+import time
+
+from app.config import settings
+from app.utils.isbn import canonical_isbn
+from app.utils.text import query_words
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "search:popular"
+# Consultas que se conservan por día (el resto se recorta al volcar)
+_MAX_MEMBERS_PER_DAY = 5000
+
+
+class PopularQueries:
+    def __init__(
+        self,
+        redis_client: Any = None,
+        flush_interval_seconds: Optional[float] = None,
+        retention_days: Optional[int] = None,
+    ) -> None:
+        self.redis = redis_client
+        self.flush_interval = (
+            settings.SEARCH_POPULAR_FLUSH_SECONDS if flush_interval_seconds is None else flush_interval_seconds
+        )
+        self.retention_days = retention_days or settings.SEARCH_WARM_QUERY_DAYS
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, *, title: Optional[str] = None, isbn: Optional[str] = None, limit: int) -> None:
+        """Anota una búsqueda; se agrupa por su forma canónica, como la caché."""
+        if isbn:
+            member = ["isbn", canonical_isbn(isbn), limit]
+        elif title and (words := query_words(title)):
+            member = ["title", " ".join(words), limit]
+        else:
+            return
+        with self._lock:
+            self._counts[json.dumps(member, ensure_ascii=False, separators=(",", ":"))] += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Vuelca a Redis los recuentos acumulados en el proceso."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        if not counts or self.redis is None:
+            return
+        key = self._day_key(datetime.now(timezone.utc))
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for member, count in counts.items():
+                pipe.zincrby(key, count, member)
+            pipe.zremrangebyrank(key, 0, -(_MAX_MEMBERS_PER_DAY + 1))
+            pipe.expire(key, self.retention_days * 86400)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("popular queries flush failed queries=%s error=%s", len(counts), e)
+
+    def top(self, n: int, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Las ``n`` consultas más buscadas en los últimos ``days`` días.
+
+        Returns:
+            Lista de ``{"title" | "isbn": ..., "limit": ...}``, de más a menos búsquedas
+        """
+        if self.redis is None or n <= 0:
+            return []
+        today = datetime.now(timezone.utc)
+        keys = [self._day_key(today - timedelta(days=offset)) for offset in range(days or self.retention_days)]
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.zrange(key, 0, -1, withscores=True)
+            days_members = pipe.execute()
+        except Exception as e:
+            logger.warning("popular queries read failed error=%s", e)
+            return []
+
+        totals: Counter = Counter()
+        for members in days_members:
+            for member, score in members or []:
+                totals[member.decode("utf-8") if isinstance(member, bytes) else member] += score
+
+        queries = []
+        for member, _ in totals.most_common(n):
+            try:
+                kind, value, limit = json.loads(member)
+            except ValueError:
+                continue
+            queries.append({kind: value, "limit": limit})
+        return queries
+
+    @staticmethod
+    def _day_key(day: datetime) -> str:
+        return f"{_KEY_PREFIX}:{day:%Y%m%d}"
@@ -0,0 +1,90 @@
+"""
+Escaneo por lotes: varias imágenes en una sola petición.
+
+Las imágenes se reparten entre los workers del pool de escaneo y cada
+resultado se emite como una línea NDJSON en cuanto termina, etiquetado con
+la posición de la imagen en la petición (el orden de salida no es el de
+entrada).
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from app.config import settings
+from app.services.scan_executor import ScanExecutor, ScanQueueFullError, get_scan_executor
+
+logger = logging.getLogger(__name__)
+
+# (índice, nombre de archivo, bytes de la imagen o None, error de validación o None)
+BatchItem = Tuple[int, Optional[str], Optional[bytes], Optional[Dict[str, Any]]]
+
+
+async def _scan_when_available(executor: ScanExecutor, method: str, image_data: bytes) -> Dict[str, Any]:
+    # Con la cola llena esperamos en lugar de fallar: el lote ya fue aceptado
+    deadline = time.monotonic() + settings.SCAN_JOB_TIMEOUT_SECONDS
+    while True:
+        try:
+            return await executor.run(method, image_data)
+        except ScanQueueFullError as e:
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def stream_scan_batch(
+    items: List[BatchItem],
+    method: str,
+    executor: Optional[ScanExecutor] = None,
+) -> AsyncIterator[str]:
+    """
+    Escanea las imágenes en paralelo y devuelve una línea NDJSON por imagen.
+
+    Como mucho se ejecutan a la vez tantas imágenes del lote como workers tiene
+    el pool, para que un lote grande no ocupe toda la cola de escaneo.
+
+    Args:
+        items: Imágenes del lote con su índice y, si falló la validación, el error
+        method: Método de ``BookScanService`` a ejecutar
+        executor: Pool de escaneo (por defecto el del proceso)
+
+    Yields:
+        Líneas ``{"index", "filename", "result"}`` o ``{"index", "filename", "error"}``
+    """
+    executor = executor or get_scan_executor()
+    semaphore = asyncio.Semaphore(max(1, executor.max_workers))
+    t0 = time.perf_counter()
+
+    async def _scan(index: int, filename: Optional[str], image_data: bytes) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await _scan_when_available(executor, method, image_data)
+                return {"index": index, "filename": filename, "result": result}
+            except ScanQueueFullError:
+                error = {"msg": "El servicio de escaneo está saturado", "type": "scan_queue_full"}
+            except Exception as e:
+                logger.error("batch scan item %s failed: %s", index, e, exc_info=True)
+                error = {"msg": "Error interno del servidor al procesar la imagen", "type": "server_error"}
+            return {"index": index, "filename": filename, "error": error}
+
+    tasks = []
+    for index, filename, image_data, error in items:
+        if error is not None:
+            yield json.dumps({"index": index, "filename": filename, "error": error}, ensure_ascii=False) + "\n"
+        else:
+            tasks.append(asyncio.ensure_future(_scan(index, filename, image_data)))
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        # Si el cliente corta la conexión no seguimos escaneando para nadie
+        for task in tasks:
+            task.cancel()
+
+    logger.info(
+        "batch scan finished items=%s method=%s duration_ms=%s",
+        len(items), method, int((time.perf_counter() - t0) * 1000),
+    )
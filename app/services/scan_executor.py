@@ -0,0 +1,244 @@
+"""
+Ejecución de escaneos fuera del event loop.
+
+El escaneo (pyzbar + EasyOCR) es CPU-bound y síncrono. Este módulo lo despacha
+a un pool de procesos dedicado con una cola acotada: cuando la cola está llena
+se rechaza la petición al instante (503 + Retry-After) en lugar de acumular
+trabajo. Las imágenes viajan a los workers por memoria compartida para no
+serializar los bytes a través del pipe del executor.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Optional, Union
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Métodos de BookScanService que se pueden despachar al pool
+SCAN_METHODS = {"scan_book", "scan_multiple_methods", "scan_shelf"}
+
+
+class ScanQueueFullError(Exception):
+    """La cola de escaneo está llena; el cliente debe reintentar más tarde."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Cola de escaneo llena, reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+# --- Código que se ejecuta dentro de los procesos worker -------------------
+
+_worker_scan_service = None
+
+
+def _init_scan_worker(warmup_ocr: bool) -> None:
+    global _worker_scan_service
+    from app.services.book_scan_service import BookScanService
+
+    _worker_scan_service = BookScanService()
+    if warmup_ocr:
+        from app.services.ocr_reader_pool import get_ocr_reader_pool
+
+        try:
+            get_ocr_reader_pool().warmup()
+        except Exception as e:
+            logger.error("scan worker ocr warmup failed: %s", e)
+
+
+def _get_worker_scan_service():
+    global _worker_scan_service
+    if _worker_scan_service is None:
+        from app.services.book_scan_service import BookScanService
+
+        _worker_scan_service = BookScanService()
+    return _worker_scan_service
+
+
+def _run_scan_from_shared_memory(method: str, shm_name: str, size: int) -> Dict[str, Any]:
+    shm = SharedMemory(name=shm_name)
+    # El proceso padre es el dueño del segmento: evitar que el resource
+    # tracker del worker lo libere o avise de una "fuga" al terminar.
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    view = shm.buf[:size]
+    try:
+        return getattr(_get_worker_scan_service(), method)(view)
+    finally:
+        try:
+            view.release()
+            shm.close()
+        except BufferError:  # pragma: no cover - queda alguna referencia viva
+            logger.warning("shared memory %s still referenced after scan", shm_name)
+
+
+def _ping() -> bool:
+    return True
+
+
+def _run_scan_inline(method: str, image_data: bytes) -> Dict[str, Any]:
+    return getattr(_get_worker_scan_service(), method)(image_data)
+
+
+# --- Lado del servidor web -------------------------------------------------
+
+class ScanExecutor:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        min_retry_after: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            max_workers: Procesos worker (0 = hilos dentro del propio proceso)
+            max_pending: Escaneos que pueden esperar en cola además de los que se ejecutan
+            min_retry_after: Segundos mínimos a sugerir en Retry-After
+        """
+        self.max_workers = settings.SCAN_WORKER_PROCESSES if max_workers is None else max_workers
+        self.max_pending = settings.SCAN_QUEUE_MAX_PENDING if max_pending is None else max_pending
+        self.min_retry_after = min_retry_after or settings.SCAN_RETRY_AFTER_SECONDS
+        self.capacity = max(1, self.max_workers) + max(0, self.max_pending)
+        self.use_processes = self.max_workers > 0
+
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_duration = 0.0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=get_context("spawn"),
+                        initializer=_init_scan_worker,
+                        initargs=(settings.OCR_WARMUP_ON_STARTUP,),
+                    )
+                    logger.info("scan process pool started workers=%s", self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan")
+            return self._executor
+
+    def _retry_after(self) -> int:
+        workers = max(1, self.max_workers)
+        estimate = math.ceil(self._avg_duration * self._in_flight / workers)
+        return max(self.min_retry_after, estimate)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ScanQueueFullError(self._retry_after())
+            self._in_flight += 1
+
+    def _finish(self, started: float) -> None:
+        duration = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            # Media móvil exponencial para estimar Retry-After
+            if self._avg_duration:
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            else:
+                self._avg_duration = duration
+
+    async def run(self, method: str, image_data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        """
+        Ejecuta ``BookScanService.<method>(image_data)`` fuera del event loop.
+
+        ``image_data`` puede ser una memoryview: con procesos se copia una sola
+        vez a la memoria compartida; en modo hilo no se copia.
+
+        Raises:
+            ScanQueueFullError: Si ya hay ``capacity`` escaneos en curso o en cola
+        """
+        if method not in SCAN_METHODS:
+            raise ValueError(f"Método de escaneo no soportado: {method}")
+
+        self._admit()
+        started = time.perf_counter()
+        shm: Optional[SharedMemory] = None
+        try:
+            if self.use_processes:
+                size = len(image_data)
+                shm = SharedMemory(create=True, size=max(1, size))
+                shm.buf[:size] = image_data
+                submit = lambda: self._get_executor().submit(
+                    _run_scan_from_shared_memory, method, shm.name, size
+                )
+            else:
+                submit = lambda: self._get_executor().submit(_run_scan_inline, method, image_data)
+
+            try:
+                future = submit()
+            except BrokenProcessPool:
+                logger.error("scan process pool broken, restarting")
+                self._reset_executor()
+                future = submit()
+            return await asyncio.wrap_future(future)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            self._finish(started)
+
+    def start(self) -> None:
+        """Arranca los workers por adelantado para que carguen los modelos antes del primer escaneo."""
+        executor = self._get_executor()
+        if self.use_processes:
+            executor.submit(_ping)
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("scan executor stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "process" if self.use_processes else "thread",
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_duration_ms": int(self._avg_duration * 1000),
+        }
+
+
+_scan_executor: Optional[ScanExecutor] = None
+_scan_executor_lock = threading.Lock()
+
+
+def get_scan_executor() -> ScanExecutor:
+    """Devuelve el executor de escaneo del proceso (se crea bajo demanda)."""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is None:
+            _scan_executor = ScanExecutor()
+        return _scan_executor
+
+
+def shutdown_scan_executor() -> None:
+    global _scan_executor
+    with _scan_executor_lock:
+        executor, _scan_executor = _scan_executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,160 @@
+"""
+Trabajos de escaneo asíncronos: el cliente sube la imagen, recibe un id y
+consulta el estado hasta que el resultado está disponible.
+
+Los trabajos se guardan en Redis con TTL para que cualquier worker de la API
+pueda responder a la consulta. Si Redis no está disponible se conserva una
+copia local en el proceso que creó el trabajo.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from app.config import settings
+from app.services.cache import RedisCache
+from app.services.scan_executor import ScanExecutor, ScanQueueFullError, get_scan_executor
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Máximo de trabajos en la copia local de respaldo
+_LOCAL_JOBS_MAX = 1000
+
+
+class ScanJobStore:
+    def __init__(self, cache: Optional[RedisCache] = None, ttl_seconds: Optional[int] = None) -> None:
+        self.cache = cache or RedisCache()
+        self.ttl = ttl_seconds or settings.SCAN_JOB_TTL_SECONDS
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"scan:job:{job_id}"
+
+    def save(self, job: Dict[str, Any]) -> None:
+        self.cache.set_json(self._key(job["id"]), job, ttl_seconds=self.ttl)
+        with self._lock:
+            self._local[job["id"]] = (time.monotonic() + self.ttl, job)
+            self._local.move_to_end(job["id"])
+            while len(self._local) > _LOCAL_JOBS_MAX:
+                self._local.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.cache.get_json(self._key(job_id))
+        if job is not None:
+            return job
+        with self._lock:
+            entry = self._local.get(job_id)
+            if entry is None:
+                return None
+            expires_at, job = entry
+            if expires_at < time.monotonic():
+                del self._local[job_id]
+                return None
+            return job
+
+    def update(self, job: Dict[str, Any], **changes: Any) -> Dict[str, Any]:
+        job = {**job, **changes, "updated_at": _now()}
+        self.save(job)
+        return job
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ScanJobService:
+    def __init__(self, store: Optional[ScanJobStore] = None, executor: Optional[ScanExecutor] = None) -> None:
+        self.store = store or ScanJobStore()
+        self.executor = executor
+
+    def create_job(self, *, method: str, user_id: str) -> Dict[str, Any]:
+        now = _now()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "method": method,
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+        }
+        self.store.save(job)
+        logger.info("scan job created id=%s method=%s user=%s", job["id"], method, user_id)
+        return job
+
+    def get_job(self, job_id: str, *, user_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job.get("user_id") != user_id:
+            return None
+        return job
+
+    async def run_job(self, job: Dict[str, Any], image_data: bytes) -> Dict[str, Any]:
+        """
+        Procesa el trabajo en el pool de escaneo y guarda el resultado.
+
+        Si la cola de escaneo está llena el trabajo sigue en estado ``queued``
+        y se reintenta hasta agotar ``SCAN_JOB_TIMEOUT_SECONDS``.
+        """
+        executor = self.executor or get_scan_executor()
+        deadline = time.monotonic() + settings.SCAN_JOB_TIMEOUT_SECONDS
+        t0 = time.perf_counter()
+
+        while True:
+            try:
+                job = self.store.update(job, status=JOB_PROCESSING)
+                result = await executor.run(job["method"], image_data)
+                break
+            except ScanQueueFullError as e:
+                job = self.store.update(job, status=JOB_QUEUED)
+                if time.monotonic() + e.retry_after > deadline:
+                    logger.warning("scan job %s timed out waiting for a scan worker", job["id"])
+                    return self.store.update(job, status=JOB_FAILED, error="Tiempo de espera agotado en la cola de escaneo")
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.error("scan job %s failed: %s", job["id"], e, exc_info=True)
+                return self.store.update(job, status=JOB_FAILED, error="Error interno al procesar la imagen")
+
+        logger.info(
+            "scan job completed id=%s duration_ms=%s success=%s",
+            job["id"],
+            int((time.perf_counter() - t0) * 1000),
+            result.get("success"),
+        )
+        return self.store.update(job, status=JOB_COMPLETED, result=result)
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Representación del trabajo devuelta al cliente."""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "method": job["method"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "status_url": f"/scan/jobs/{job['id']}",
+    }
+
+
+_scan_job_service: Optional[ScanJobService] = None
+
+
+def get_scan_job_service() -> ScanJobService:
+    """Servicio de trabajos compartido por el proceso (conserva la copia local de respaldo)."""
+    global _scan_job_service
+    if _scan_job_service is None:
+        _scan_job_service = ScanJobService()
+    return _scan_job_service
@@ -0,0 +1,141 @@
+"""
+Caché de resultados de escaneo por hash perceptual.
+
+Los usuarios suelen volver a subir la misma portada (o una foto casi igual)
+tras un alta fallida. Lo extraído de la imagen (método, ISBN, título y autor;
+no la búsqueda en catálogo, que tiene su propia caché) se indexa por un dHash
+de 256 bits de la imagen normalizada y se buscan vecinos con distancia de
+Hamming pequeña.
+
+Para encontrar vecinos sin recorrer toda la caché el hash se divide en 16
+bandas de 16 bits: si dos hashes difieren en menos de 16 bits, al menos una
+banda coincide exactamente (principio del palomar), así que basta con mirar
+las entradas que comparten alguna banda.
+"""
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.cache import RedisCache
+from app.services.image_preprocessing import PreprocessedImage
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 16  # dHash de 16x16 = 256 bits
+_BAND_BITS = 16
+_BANDS = (HASH_SIZE * HASH_SIZE) // _BAND_BITS
+_BUCKET_MAX_ENTRIES = 200
+_KEY_PREFIX = "scan:phash:v1"
+
+
+def compute_dhash(gray: np.ndarray, hash_size: int = HASH_SIZE) -> int:
+    """
+    Calcula el difference hash de una imagen en escala de grises.
+
+    Args:
+        gray: Imagen en escala de grises
+        hash_size: Lado de la rejilla (el hash tiene ``hash_size²`` bits)
+
+    Returns:
+        Hash como entero
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _hex(value: int) -> str:
+    return f"{value:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def _bands(value: int) -> List[int]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(value >> (i * _BAND_BITS)) & mask for i in range(_BANDS)]
+
+
+class ScanResultCache:
+    def __init__(
+        self,
+        cache: Optional[RedisCache] = None,
+        ttl_seconds: Optional[int] = None,
+        max_distance: Optional[int] = None,
+    ) -> None:
+        self.cache = cache or RedisCache()
+        self.ttl = ttl_seconds or settings.SCAN_RESULT_CACHE_TTL_SECONDS
+        distance = settings.SCAN_RESULT_CACHE_MAX_DISTANCE if max_distance is None else max_distance
+        # Con 16 bandas solo se garantiza encontrar vecinos a distancia < 16
+        self.max_distance = min(distance, _BANDS - 1)
+
+    def image_hash(self, image: PreprocessedImage) -> int:
+        return compute_dhash(image.gray)
+
+    def _result_key(self, method: str, image_hash: int) -> str:
+        return f"{_KEY_PREFIX}:{method}:r:{_hex(image_hash)}"
+
+    def _band_key(self, method: str, index: int, band: int) -> str:
+        return f"{_KEY_PREFIX}:{method}:b{index}:{band:04x}"
+
+    def get(self, image_hash: int, method: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado para la imagen o para una casi idéntica.
+
+        Returns:
+            Diccionario con ``result``, ``distance`` y ``hash`` o None
+        """
+        cached = self.cache.get_json(self._result_key(method, image_hash))
+        if cached is not None:
+            return {"result": cached, "distance": 0, "hash": _hex(image_hash)}
+
+        if self.max_distance <= 0:
+            return None
+
+        try:
+            pipe = self.cache.client.pipeline()
+            for index, band in enumerate(_bands(image_hash)):
+                pipe.lrange(self._band_key(method, index, band), 0, -1)
+            buckets = pipe.execute()
+        except Exception as e:
+            logger.debug("scan result cache band lookup failed: %s", e)
+            return None
+
+        neighbours: Set[str] = set()
+        for bucket in buckets:
+            neighbours.update(bucket or [])
+
+        best: Optional[tuple] = None
+        for candidate_hex in neighbours:
+            distance = hamming_distance(image_hash, int(candidate_hex, 16))
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, candidate_hex)
+
+        if best is None:
+            return None
+
+        cached = self.cache.get_json(f"{_KEY_PREFIX}:{method}:r:{best[1]}")
+        if cached is None:
+            return None
+        return {"result": cached, "distance": best[0], "hash": best[1]}
+
+    def set(self, image_hash: int, method: str, result: Dict[str, Any]) -> None:
+        hash_hex = _hex(image_hash)
+        self.cache.set_json(self._result_key(method, image_hash), result, ttl_seconds=self.ttl)
+        try:
+            pipe = self.cache.client.pipeline()
+            for index, band in enumerate(_bands(image_hash)):
+                key = self._band_key(method, index, band)
+                pipe.lpush(key, hash_hex)
+                pipe.ltrim(key, 0, _BUCKET_MAX_ENTRIES - 1)
+                pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.debug("scan result cache band update failed: %s", e)
@@ -0,0 +1,204 @@
+"""
+Coalescencia de búsquedas idénticas ("single-flight").
+
+Cuando varias peticiones fallan la caché para la misma clave a la vez, solo
+una consulta a los proveedores; el resto espera su resultado:
+
+- Dentro del proceso, los que llegan después esperan el futuro del primero
+  (``asyncio.Future`` en los endpoints, ``concurrent.futures.Future`` en hilos).
+- Entre procesos (workers de uvicorn y de escaneo), el primero toma un lock
+  corto en Redis (``SET NX PX``); los demás sondean la caché hasta que el
+  resultado aparece o el lock se libera, y solo entonces consultan ellos.
+
+Si Redis no está disponible se sigue sin lock: se pierde la coalescencia
+entre procesos, no la búsqueda.
+"""
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_LOCK_PREFIX = "lock"
+_POLL_INTERVAL_SECONDS = 0.05
+
+# Borra el lock solo si sigue siendo nuestro (pudo expirar y tomarlo otro)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Ejecuta una sola llamada por clave a la vez, en el proceso y entre procesos."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        lock_ttl_seconds: Optional[float] = None,
+        poll_interval_seconds: float = _POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self.redis = redis_client
+        self.lock_ttl = lock_ttl_seconds or settings.SEARCH_SINGLE_FLIGHT_LOCK_SECONDS
+        self.poll_interval = poll_interval_seconds
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+        self._remote_waits = 0
+
+    def run(self, key: str, fn: Callable[[], T], lookup: Callable[[], Optional[T]]) -> T:
+        """
+        Ejecuta ``fn`` salvo que ya haya una llamada en curso para ``key``.
+
+        Args:
+            key: Clave de caché de la búsqueda
+            fn: Consulta a los proveedores (debe guardar su resultado en caché)
+            lookup: Lectura de la caché, para esperar a otro proceso
+
+        Returns:
+            El resultado de ``fn``, propio o de la llamada a la que se ha unido
+        """
+        with self._lock:
+            existing = self._calls.get(key)
+            if existing is None:
+                future: Future = Future()
+                self._calls[key] = future
+            else:
+                self._coalesced += 1
+        if existing is not None:
+            return existing.result()
+
+        try:
+            result = self._run_leader(key, fn, lookup)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def arun(
+        self, key: str, fn: Callable[[], Awaitable[T]], lookup: Callable[[], Optional[T]]
+    ) -> T:
+        """Versión asíncrona de ``run`` para los endpoints."""
+        loop = asyncio.get_running_loop()
+        # Los futuros pertenecen a su event loop
+        slot = (id(loop), key)
+        existing = self._async_calls.get(slot)
+        if existing is not None:
+            self._coalesced += 1
+            return await asyncio.shield(existing)
+
+        future = loop.create_future()
+        # Evitar el aviso "exception was never retrieved" si nadie se unió
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._async_calls[slot] = future
+        try:
+            result = await self._arun_leader(key, fn, lookup)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._async_calls.pop(slot, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+            "remote_waits": self._remote_waits,
+        }
+
+    def _run_leader(self, key: str, fn: Callable[[], T], lookup: Callable[[], Optional[T]]) -> T:
+        token = self._acquire(key)
+        if token is None:
+            self._remote_waits += 1
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                cached = lookup()
+                if cached is not None:
+                    return cached
+                if not self._is_locked(key):
+                    break
+            token = self._acquire(key)
+
+        self._leaders += 1
+        try:
+            return fn()
+        finally:
+            self._release(key, token)
+
+    async def _arun_leader(
+        self, key: str, fn: Callable[[], Awaitable[T]], lookup: Callable[[], Optional[T]]
+    ) -> T:
+        token = self._acquire(key)
+        if token is None:
+            self._remote_waits += 1
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                cached = lookup()
+                if cached is not None:
+                    return cached
+                if not self._is_locked(key):
+                    break
+            token = self._acquire(key)
+
+        self._leaders += 1
+        try:
+            return await fn()
+        finally:
+            self._release(key, token)
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """
+        Intenta tomar el lock de ``key`` en Redis.
+
+        Returns:
+            El token del lock, ``""`` si no hay Redis (se sigue sin lock) o
+            None si lo tiene otro proceso
+        """
+        if self.redis is None:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis.set(f"{_LOCK_PREFIX}:{key}", token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.debug("single-flight lock unavailable key=%s error=%s", key, e)
+            return ""
+        return token if acquired else None
+
+    def _is_locked(self, key: str) -> bool:
+        try:
+            return bool(self.redis.exists(f"{_LOCK_PREFIX}:{key}"))
+        except Exception:
+            return False
+
+    def _release(self, key: str, token: Optional[str]) -> None:
+        if not token:
+            return
+        try:
+            self.redis.eval(_RELEASE_SCRIPT, 1, f"{_LOCK_PREFIX}:{key}", token)
+        except Exception as e:
+            logger.debug("single-flight lock release failed key=%s error=%s", key, e)
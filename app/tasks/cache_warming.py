@@ -0,0 +1,108 @@
+"""
+Calentado programado de la caché de catálogo.
+
+Tras un ``FLUSHALL`` de Redis o cuando caducan las entradas, los primeros
+usuarios que buscan pagan la latencia completa de los proveedores. Esta
+tarea, en la ventana valle, vuelve a dejar en caché las búsquedas más
+frecuentes de los últimos días y los ISBN de los libros de la biblioteca,
+sin pasar de ``SEARCH_WARM_QUERIES_PER_SECOND`` consultas a los proveedores.
+"""
+from typing import Any, Dict, List
+import logging
+import time
+import uuid
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.book import Book
+from app.services.book_search_service import get_book_search_service
+from app.utils.isbn import to_isbn13
+
+logger = logging.getLogger(__name__)
+
+# Con varios workers cada uno tiene su scheduler: solo calienta el que coge el cerrojo
+_LOCK_KEY = "search:warm:lock"
+# Límite de resultados con el que buscan los escaneos y GET /search por defecto
+_LIBRARY_LIMIT = 5
+
+
+def _library_queries() -> List[Dict[str, Any]]:
+    """ISBN (válidos, como ISBN-13) de los libros no archivados."""
+    db = SessionLocal()
+    try:
+        rows = db.query(Book.isbn).filter(Book.isbn.isnot(None), Book.is_archived == False).distinct().all()  # noqa: E712
+    finally:
+        db.close()
+    isbns = dict.fromkeys(isbn13 for (isbn,) in rows if (isbn13 := to_isbn13(isbn)))
+    return [{"isbn": isbn, "limit": _LIBRARY_LIMIT} for isbn in isbns]
+
+
+def warm_catalog_cache() -> Dict[str, Any]:
+    """
+    Calienta la caché de catálogo: primero las búsquedas populares y después la biblioteca.
+
+    Las consultas con entrada fresca no tocan a los proveedores; el resto se
+    espacia para no superar el ritmo configurado. Se detiene al agotar
+    ``SEARCH_WARM_MAX_SECONDS``.
+
+    Returns:
+        Recuento de consultas revisadas, refrescadas y fallidas
+    """
+    stats = {"queries": 0, "fetched": 0, "fresh": 0, "failed": 0, "stopped_early": False}
+    if not settings.SEARCH_WARM_ENABLED:
+        return stats
+
+    service = get_book_search_service()
+    redis = getattr(service.cache, "client", None)
+    token = uuid.uuid4().hex
+    try:
+        if redis is not None and not redis.set(_LOCK_KEY, token, nx=True, ex=settings.SEARCH_WARM_MAX_SECONDS):
+            logger.info("catalog cache warm skipped: another worker is warming")
+            return stats
+    except Exception as e:
+        # Sin Redis no hay caché que calentar
+        logger.warning("catalog cache warm skipped: redis unavailable error=%s", e)
+        return stats
+
+    t0 = time.monotonic()
+    deadline = t0 + settings.SEARCH_WARM_MAX_SECONDS
+    interval = 1.0 / settings.SEARCH_WARM_QUERIES_PER_SECOND
+    try:
+        # Los recuentos de este proceso aún sin volcar también cuentan
+        service.popular.flush()
+        queries = service.popular.top(settings.SEARCH_WARM_TOP_QUERIES) + _library_queries()
+        logger.info("catalog cache warm started queries=%s", len(queries))
+
+        for query in queries:
+            if time.monotonic() >= deadline:
+                stats["stopped_early"] = True
+                break
+            stats["queries"] += 1
+            try:
+                fetched = service.warm(title=query.get("title"), isbn=query.get("isbn"), limit=query["limit"])
+            except Exception as e:
+                logger.error("catalog cache warm query failed query=%s error=%s", query, e)
+                stats["failed"] += 1
+                fetched = True
+            if fetched:
+                stats["fetched"] += 1
+                time.sleep(interval)
+            else:
+                stats["fresh"] += 1
+    finally:
+        try:
+            if redis is not None and redis.get(_LOCK_KEY) in (token, token.encode()):
+                redis.delete(_LOCK_KEY)
+        except Exception:
+            pass
+
+    logger.info(
+        "catalog cache warm finished queries=%s fetched=%s fresh=%s failed=%s stopped_early=%s duration_s=%s",
+        stats["queries"],
+        stats["fetched"],
+        stats["fresh"],
+        stats["failed"],
+        stats["stopped_early"],
+        round(time.monotonic() - t0, 1),
+    )
+    return stats
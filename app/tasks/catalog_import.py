@@ -0,0 +1,302 @@
+"""
+Importa un volcado de OpenLibrary al catálogo local (``catalog_editions`` y
+``catalog_authors``).
+
+Acepta los volcados oficiales (``ol_dump_editions_*.txt.gz``: TSV con el
+registro JSON en la última columna) o JSONL, comprimidos con gzip o no. El
+fichero se lee en streaming y se escribe en bloques de ``--chunk-size``
+registros con upserts masivos, así que la memoria no depende del tamaño del
+volcado. Tras cada bloque se guarda un checkpoint (``<volcado>.checkpoint``):
+si la importación se interrumpe, al relanzarla continúa donde lo dejó.
+
+Orden recomendado: ediciones, obras (completan la descripción de las
+ediciones ya importadas) y autores (en cualquier momento).
+
+Uso:
+    python -m app.tasks.catalog_import ol_dump_editions_latest.txt.gz
+    python -m app.tasks.catalog_import ol_dump_works_latest.txt.gz
+    python -m app.tasks.catalog_import ol_dump_authors_latest.txt.gz --chunk-size 10000
+    python -m app.tasks.catalog_import editions.jsonl.gz --restart
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import bindparam, func, update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.catalog import CatalogAuthor, CatalogEdition
+from app.utils.isbn import to_isbn13
+
+logger = logging.getLogger(__name__)
+
+_EDITIONS = CatalogEdition.__table__
+_AUTHORS = CatalogAuthor.__table__
+
+
+@dataclass
+class ImportStats:
+    lines: int = 0
+    skipped_lines: int = 0  # Ya importadas según el checkpoint
+    editions: int = 0
+    works: int = 0
+    authors: int = 0
+    invalid: int = 0
+    elapsed_s: float = 0.0
+
+
+def _key(value: Any) -> Optional[str]:
+    """``/books/OL1M`` -> ``OL1M``."""
+    if isinstance(value, dict):
+        value = value.get("key")
+    if not isinstance(value, str) or not value:
+        return None
+    return value.rstrip("/").split("/")[-1]
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("value")
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def _list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+def _first(values: Any) -> Any:
+    return values[0] if isinstance(values, list) and values else None
+
+
+# Tipo de registro por el prefijo de su key, si la línea no trae "type"
+_KINDS_BY_PREFIX = {"/books/": "edition", "/works/": "work", "/authors/": "author"}
+
+
+def record_kind(record: Dict[str, Any]) -> Optional[str]:
+    kind = _key(record.get("type"))
+    if kind:
+        return kind
+    key = record.get("key")
+    if isinstance(key, str):
+        return next((kind for prefix, kind in _KINDS_BY_PREFIX.items() if key.startswith(prefix)), None)
+    return None
+
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """Registro JSON de una línea del volcado (TSV oficial o JSONL)."""
+    line = line.strip()
+    if not line:
+        return None
+    if not line.startswith("{"):
+        line = line.rsplit("\t", 1)[-1]
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def parse_edition(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Filas de ``catalog_editions`` de una edición: una por ISBN-13 distinto."""
+    title = _text(record.get("title"))
+    edition_key = _key(record)
+    if not title or not edition_key:
+        return []
+    isbn13s = {
+        isbn13
+        for code in _list(record.get("isbn_13")) + _list(record.get("isbn_10"))
+        if isinstance(code, str) and (isbn13 := to_isbn13(code))
+    }
+    if not isbn13s:
+        return []
+
+    page_count = record.get("number_of_pages")
+    cover_id = next((c for c in _list(record.get("covers")) if isinstance(c, int) and c > 0), None)
+    row = {
+        "edition_key": edition_key,
+        "work_key": _key(_first(record.get("works"))),
+        "title": title[:500],
+        "author_keys": [key for key in (_key(a) for a in _list(record.get("authors"))) if key] or None,
+        "publisher": (_text(_first(record.get("publishers"))) or "")[:255] or None,
+        "published_date": (_text(record.get("publish_date")) or "")[:50] or None,
+        "page_count": page_count if isinstance(page_count, int) and page_count > 0 else None,
+        "language": (_key(_first(record.get("languages"))) or "")[:10] or None,
+        "cover_id": cover_id,
+        "description": _text(record.get("description")),
+    }
+    return [{"isbn13": isbn13, **row} for isbn13 in sorted(isbn13s)]
+
+
+def parse_author(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    key = _key(record)
+    name = _text(record.get("name")) or _text(record.get("personal_name"))
+    return {"key": key, "name": name[:255]} if key and name else None
+
+
+def parse_work(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    key = _key(record)
+    description = _text(record.get("description"))
+    return {"b_work_key": key, "b_description": description} if key and description else None
+
+
+def _upsert_statement(dialect: str, table, key: str, columns: Iterable[str]):
+    """INSERT ... ON CONFLICT DO UPDATE para PostgreSQL y SQLite."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Dialecto no soportado para la importación del catálogo: {dialect}")
+    stmt = insert(table)
+    update_set = {column: stmt.excluded[column] for column in columns}
+    if "updated_at" in table.c:
+        update_set["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(index_elements=[key], set_=update_set)
+
+
+class CatalogImporter:
+    def __init__(self, session_factory=None, chunk_size: Optional[int] = None) -> None:
+        self.session_factory = session_factory or SessionLocal
+        self.chunk_size = chunk_size or settings.CATALOG_IMPORT_CHUNK_SIZE
+
+    def run(self, path: str, checkpoint_path: Optional[str] = None, restart: bool = False) -> ImportStats:
+        """
+        Importa el volcado ``path``.
+
+        Args:
+            path: Volcado (``.gz`` o sin comprimir)
+            checkpoint_path: Fichero de checkpoint (por defecto ``<path>.checkpoint``)
+            restart: Ignorar el checkpoint y empezar desde el principio
+        """
+        checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+        fingerprint = self._fingerprint(path)
+        checkpoint = None if restart else self._load_checkpoint(checkpoint_path, fingerprint)
+        stats = ImportStats()
+        if checkpoint and checkpoint.get("completed"):
+            logger.info("catalog import already completed path=%s", path)
+            return stats
+
+        resume_at = checkpoint["lines"] if checkpoint else 0
+        t0 = time.perf_counter()
+        editions: Dict[str, Dict[str, Any]] = {}
+        authors: Dict[str, Dict[str, Any]] = {}
+        works: Dict[str, Dict[str, Any]] = {}
+        pending = 0
+
+        with self._open(path) as lines:
+            for number, line in enumerate(lines, start=1):
+                stats.lines = number
+                if number <= resume_at:
+                    stats.skipped_lines += 1
+                    continue
+                record = parse_line(line)
+                kind = record_kind(record) if record else None
+                if kind == "edition":
+                    rows = parse_edition(record)
+                    # Un mismo ISBN solo una vez por bloque (ON CONFLICT no admite repetidos)
+                    editions.update((row["isbn13"], row) for row in rows)
+                    stats.editions += len(rows)
+                elif kind == "work" and (work := parse_work(record)):
+                    works[work["b_work_key"]] = work
+                    stats.works += 1
+                elif kind == "author" and (author := parse_author(record)):
+                    authors[author["key"]] = author
+                    stats.authors += 1
+                elif record is None:
+                    stats.invalid += 1
+
+                pending += 1
+                if pending >= self.chunk_size:
+                    self._flush(editions, authors, works)
+                    self._save_checkpoint(checkpoint_path, fingerprint, stats.lines)
+                    editions, authors, works, pending = {}, {}, {}, 0
+                    logger.info("catalog import progress path=%s lines=%s", path, stats.lines)
+
+        self._flush(editions, authors, works)
+        self._save_checkpoint(checkpoint_path, fingerprint, stats.lines, completed=True)
+        stats.elapsed_s = round(time.perf_counter() - t0, 1)
+        logger.info("catalog import finished path=%s stats=%s", path, asdict(stats))
+        return stats
+
+    def _flush(
+        self,
+        editions: Dict[str, Dict[str, Any]],
+        authors: Dict[str, Dict[str, Any]],
+        works: Dict[str, Dict[str, Any]],
+    ) -> None:
+        if not (editions or authors or works):
+            return
+        with self.session_factory() as db:
+            dialect = db.get_bind().dialect.name
+            if editions:
+                columns = [c.name for c in _EDITIONS.c if c.name not in ("isbn13", "updated_at")]
+                db.execute(_upsert_statement(dialect, _EDITIONS, "isbn13", columns), list(editions.values()))
+            if authors:
+                db.execute(_upsert_statement(dialect, _AUTHORS, "key", ["name"]), list(authors.values()))
+            if works:
+                # La descripción de la obra solo rellena ediciones que no traen la suya
+                stmt = (
+                    update(_EDITIONS)
+                    .where(_EDITIONS.c.work_key == bindparam("b_work_key"), _EDITIONS.c.description.is_(None))
+                    .values(description=bindparam("b_description"))
+                )
+                db.execute(stmt, list(works.values()))
+            db.commit()
+
+    @staticmethod
+    def _open(path: str):
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+        return open(path, "r", encoding="utf-8", errors="replace")
+
+    @staticmethod
+    def _fingerprint(path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        return {"source": os.path.abspath(path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if any(checkpoint.get(field) != value for field, value in fingerprint.items()):
+            logger.warning("catalog import checkpoint ignored (different dump) path=%s", checkpoint_path)
+            return None
+        return checkpoint
+
+    @staticmethod
+    def _save_checkpoint(
+        checkpoint_path: str, fingerprint: Dict[str, Any], lines: int, completed: bool = False
+    ) -> None:
+        # Escritura atómica: un corte a mitad no deja un checkpoint corrupto
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**fingerprint, "lines": lines, "completed": completed}, f)
+        os.replace(tmp_path, checkpoint_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa un volcado de OpenLibrary al catálogo local")
+    parser.add_argument("path", help="Volcado de ediciones, obras o autores (.txt.gz, .jsonl o .jsonl.gz)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Registros por bloque de escritura")
+    parser.add_argument("--checkpoint", default=None, help="Fichero de checkpoint (por defecto <path>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y empezar de cero")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    stats = CatalogImporter(chunk_size=args.chunk_size).run(args.path, args.checkpoint, restart=args.restart)
+    print(json.dumps(asdict(stats)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,10 @@ from fastapi import UploadFile, HTTPException
 from PIL import Image
 import io
 import logging
-from typing import Set
+from typing import Optional, Set
+
+from app.config import settings
+from app.utils.uploads import read_upload_capped
 
 # Optional import for python-magic
 try:
@@ -24,18 +27,23 @@ ALLOWED_MIME_TYPES: Set[str] = {
 }
 
 # File size limits
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_FILE_SIZE = settings.MAX_FILE_SIZE
 MIN_FILE_SIZE = 1024  # 1KB
 
-async def validate_image_file(file: UploadFile) -> UploadFile:
+async def read_validated_image(file: UploadFile, max_size: Optional[int] = None) -> memoryview:
     """
-    Comprehensive image file validation
+    Validate an uploaded image and return its bytes as a single buffer
+    
+    Same checks as ``validate_image_file``, but the upload is streamed through
+    ``read_upload_capped`` and read only once: callers get the validated bytes
+    instead of re-reading the file.
     
     Args:
         file: The uploaded file to validate
+        max_size: Maximum size in bytes (defaults to ``MAX_FILE_SIZE``)
         
     Returns:
-        UploadFile: The validated file
+        memoryview: The validated image bytes
         
     Raises:
         HTTPException: If validation fails
@@ -54,9 +62,11 @@ async def validate_image_file(file: UploadFile) -> UploadFile:
             detail=f"Tipo de archivo no permitido. Extensiones permitidas: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # 2. Read file contents
+    # 2-3. Read file contents, rejecting oversized uploads while streaming
     try:
-        contents = await file.read()
+        contents = await read_upload_capped(file, max_size or MAX_FILE_SIZE)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error reading file {file.filename}: {e}")
         raise HTTPException(
@@ -64,14 +74,7 @@ async def validate_image_file(file: UploadFile) -> UploadFile:
             detail="Error al leer el archivo"
         )
     
-    # 3. Validate file size
     file_size = len(contents)
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Archivo demasiado grande. Tamaño máximo: {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    
     if file_size < MIN_FILE_SIZE:
         raise HTTPException(
             status_code=400,
@@ -81,7 +84,7 @@ async def validate_image_file(file: UploadFile) -> UploadFile:
     # 4. Validate MIME type using python-magic (if available)
     if MAGIC_AVAILABLE:
         try:
-            mime_type = magic.from_buffer(contents, mime=True)
+            mime_type = magic.from_buffer(bytes(contents[:2048]), mime=True)
             if mime_type not in ALLOWED_MIME_TYPES:
                 raise HTTPException(
                     status_code=400,
@@ -127,10 +130,27 @@ async def validate_image_file(file: UploadFile) -> UploadFile:
             detail="El archivo no es una imagen válida"
         )
     
-    # 6. Reset file pointer for further processing
-    await file.seek(0)
-    
     logger.info(f"File validation successful for {file.filename} ({file_size} bytes)")
+    return contents
+
+
+async def validate_image_file(file: UploadFile) -> UploadFile:
+    """
+    Comprehensive image file validation
+    
+    Prefer ``read_validated_image``, which hands back the bytes it already read.
+    
+    Args:
+        file: The uploaded file to validate
+        
+    Returns:
+        UploadFile: The validated file, rewound for further processing
+        
+    Raises:
+        HTTPException: If validation fails
+    """
+    await read_validated_image(file)
+    await file.seek(0)
     return file
 
 async def validate_document_file(file: UploadFile) -> UploadFile:
@@ -0,0 +1,62 @@
+"""
+Utilidades para limpiar y validar ISBN (10 y 13 dígitos).
+"""
+from typing import Optional
+
+# Prefijos EAN reservados a libros ("Bookland")
+ISBN13_PREFIXES = ("978", "979")
+
+
+def clean_isbn(code: str) -> str:
+    """Quita guiones y espacios y normaliza la ``X`` final del ISBN-10."""
+    return (code or "").replace("-", "").replace(" ", "").strip().upper()
+
+
+def is_valid_isbn10(code: str) -> bool:
+    code = clean_isbn(code)
+    if len(code) != 10 or not code[:9].isdigit():
+        return False
+    if not (code[9].isdigit() or code[9] == "X"):
+        return False
+    total = sum((10 - i) * int(c) for i, c in enumerate(code[:9]))
+    total += 10 if code[9] == "X" else int(code[9])
+    return total % 11 == 0
+
+
+def _isbn13_check_digit(first12: str) -> int:
+    total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(first12))
+    return (10 - total % 10) % 10
+
+
+def is_valid_isbn13(code: str) -> bool:
+    """ISBN-13: 13 dígitos, prefijo 978/979 y dígito de control EAN correcto."""
+    code = clean_isbn(code)
+    if len(code) != 13 or not code.isdigit() or not code.startswith(ISBN13_PREFIXES):
+        return False
+    return _isbn13_check_digit(code[:12]) == int(code[12])
+
+
+def is_valid_isbn(code: str) -> bool:
+    """True si el código es un ISBN-10 o ISBN-13 con dígito de control válido."""
+    return is_valid_isbn13(code) or is_valid_isbn10(code)
+
+
+def to_isbn13(code: str) -> Optional[str]:
+    """
+    Convierte un ISBN válido a su forma de 13 dígitos.
+
+    Returns:
+        ISBN-13 o None si el código no es un ISBN válido
+    """
+    code = clean_isbn(code)
+    if is_valid_isbn13(code):
+        return code
+    if is_valid_isbn10(code):
+        first12 = "978" + code[:9]
+        return first12 + str(_isbn13_check_digit(first12))
+    return None
+
+
+def canonical_isbn(code: str) -> str:
+    """ISBN-13 del código si es un ISBN válido; si no, el código limpio tal cual."""
+    return to_isbn13(code) or clean_isbn(code)
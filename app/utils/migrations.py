@@ -4,9 +4,6 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
-from alembic import command
-from alembic.config import Config
-
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -14,6 +11,11 @@ logger = logging.getLogger(__name__)
 
 def run_migrations() -> None:
     """Apply all pending Alembic migrations using the active DATABASE_URL."""
+    # Alembic is only needed when RUN_DB_MIGRATIONS=1; importing it here keeps
+    # it out of every API worker's startup time.
+    from alembic import command
+    from alembic.config import Config
+
     project_root = Path(__file__).resolve().parents[2]
     alembic_cfg = Config(str(project_root / "alembic.ini"))
     alembic_cfg.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
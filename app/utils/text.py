@@ -0,0 +1,44 @@
+"""
+Normalización de texto libre para comparar y cachear búsquedas.
+"""
+from typing import List
+import re
+import unicodedata
+
+# Apóstrofos que se eliminan sin separar palabras ("Ender's" -> "enders")
+_APOSTROPHES = re.compile(r"['’`´]")
+# Palabras: letras y dígitos, más los "+" y "#" pegados detrás ("C++", "C#", "F#"),
+# que distinguen títulos; el resto de símbolos separa palabras
+_WORDS = re.compile(r"[^\W_]+[+#]*")
+
+
+def fold(text: str) -> str:
+    """
+    Forma canónica de ``text``: NFKD, sin acentos latinos y en minúsculas.
+
+    Solo se quitan las marcas que siguen a una letra ASCII ("ñ" -> "n",
+    "é" -> "e"); en otras escrituras (p. ej. el dakuten japonés) la marca
+    cambia la letra y se conserva.
+    """
+    chars = []
+    for ch in unicodedata.normalize("NFKD", text or ""):
+        if unicodedata.combining(ch) and chars and chars[-1].isascii():
+            continue
+        chars.append(ch)
+    return unicodedata.normalize("NFC", "".join(chars)).casefold()
+
+
+def query_words(text: str) -> List[str]:
+    """Palabras de ``text`` tras ``fold``: ``"C++ Primer!"`` -> ``["c++", "primer"]``."""
+    return _WORDS.findall(_APOSTROPHES.sub("", fold(text)))
+
+
+def canonical_query(text: str) -> str:
+    """
+    Consulta de texto normalizada para claves de caché.
+
+    ``"  Cien Años de Soledad! "`` y ``"cien anos de soledad"`` dan lo mismo:
+    ``"cien+anos+de+soledad"``. Vacía si ``text`` no tiene ninguna palabra
+    (solo espacios o puntuación).
+    """
+    return "+".join(query_words(text))
@@ -0,0 +1,66 @@
+"""
+Streaming upload helpers
+
+Kept free of image libraries so the API and its middleware can import them
+without pulling PIL into every worker.
+"""
+from fastapi import UploadFile, HTTPException
+from typing import Optional
+
+# Bytes read per await while streaming an upload
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def upload_too_large(max_size: int, actual_size: Optional[int] = None) -> HTTPException:
+    """413 error used by every upload size check."""
+    detail = {
+        "msg": f"El archivo es demasiado grande. Tamaño máximo permitido: {max_size / (1024 * 1024):g}MB",
+        "type": "payload_too_large",
+        "max_size_mb": round(max_size / (1024 * 1024), 2),
+    }
+    if actual_size is not None:
+        detail["actual_size_mb"] = round(actual_size / (1024 * 1024), 2)
+    return HTTPException(status_code=413, detail=detail)
+
+
+async def read_upload_capped(
+    file: UploadFile,
+    max_size: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> memoryview:
+    """
+    Stream an upload into a single buffer, aborting as soon as it exceeds ``max_size``.
+    
+    The declared size (multipart ``Content-Length``) is checked before reading
+    anything; the running total is checked after every chunk, so a client that
+    lies about the size is still cut off after at most ``max_size + chunk_size``
+    bytes.
+    
+    Args:
+        file: The uploaded file
+        max_size: Maximum accepted size in bytes
+        chunk_size: Bytes read per call
+        
+    Returns:
+        memoryview: Zero-copy view over the uploaded bytes
+        
+    Raises:
+        HTTPException: 413 if the upload is larger than ``max_size``
+    """
+    declared = getattr(file, "size", None)
+    if isinstance(declared, int) and declared > max_size:
+        raise upload_too_large(max_size, declared)
+
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_size:
+            raise upload_too_large(max_size)
+        buffer += chunk
+        if len(chunk) < chunk_size:
+            # A short read from a file object means end of file
+            break
+
+    return memoryview(buffer)
@@ -0,0 +1 @@
+"""Benchmarks reproducibles del backend (no forman parte de la app)."""
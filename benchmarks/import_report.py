@@ -0,0 +1,150 @@
+"""
+Informe del coste de importación al arrancar un worker de la API.
+
+Ejecuta ``python -X importtime -c "import <módulo>"`` en un proceso limpio y
+desglosa el tiempo por paquete y por módulo de ``app``, indicando además el
+RSS tras la importación y qué dependencias pesadas (torch, EasyOCR, OpenCV...)
+se han cargado. Un worker de uvicorn no debería cargar ninguna: el escaneo las
+importa en sus propios procesos o en el primer uso.
+
+Uso:
+    python -m benchmarks.import_report
+    python -m benchmarks.import_report --module app.services.book_scan_service --top 15
+    python -m benchmarks.import_report --json imports.json
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import json
+import subprocess
+import sys
+
+# Dependencias que no deberían cargarse al arrancar la API
+HEAVY_MODULES = ("torch", "easyocr", "cv2", "numpy", "scipy", "PIL", "pyzbar", "alembic")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+except ImportError:
+    import psutil
+    rss_kb = psutil.Process().memory_info().rss // 1024
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"elapsed_s": elapsed, "rss_kb": rss_kb, "heavy": heavy, "modules": len(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Convierte la salida de ``-X importtime`` en filas ``{module, self_us, cumulative_us, depth}``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|", 2)
+            self_us = int(head.split(":", 1)[1])
+            cumulative_us = int(cumulative_us)
+        except ValueError:
+            continue
+        # El anidamiento se indica con dos espacios por nivel tras el separador
+        name = name[1:]
+        rows.append({
+            "module": name.strip(),
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(name) - len(name.lstrip(" "))) // 2,
+        })
+    return rows
+
+
+def summarize(rows: List[Dict[str, Any]], target: str, top: int = 10) -> Dict[str, Any]:
+    by_package: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".", 1)[0]
+        by_package[package] = by_package.get(package, 0) + row["self_us"]
+
+    target_row = next((row for row in rows if row["module"] == target), None)
+    app_modules = sorted(
+        (row for row in rows if row["module"].startswith("app.") or row["module"] == "app"),
+        key=lambda row: row["cumulative_us"],
+        reverse=True,
+    )
+
+    return {
+        "module": target,
+        "total_ms": round((target_row["cumulative_us"] if target_row else sum(by_package.values())) / 1000, 1),
+        "packages": [
+            {"package": name, "ms": round(us / 1000, 1)}
+            for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "app_modules": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in app_modules[:top]
+        ],
+    }
+
+
+def run_report(module: str = "app.main", top: int = 10, python: Optional[str] = None) -> Dict[str, Any]:
+    python = python or sys.executable
+    traced = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=False,
+    )
+    if traced.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{traced.stderr[-2000:]}")
+
+    report = summarize(parse_importtime(traced.stderr), module, top)
+
+    # Segunda pasada sin -X importtime (que añade sobrecoste) para tiempo y RSS reales
+    probe = subprocess.run(
+        [python, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True,
+    )
+    measured = json.loads(probe.stdout.strip().splitlines()[-1])
+    report.update({
+        "wall_ms": round(measured["elapsed_s"] * 1000, 1),
+        "rss_mb": round(measured["rss_kb"] / 1024, 1),
+        "modules_loaded": measured["modules"],
+        "heavy_loaded": measured["heavy"],
+    })
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"import {report['module']}: {report['wall_ms']} ms, RSS {report['rss_mb']} MB, "
+          f"{report['modules_loaded']} módulos")
+    print(f"dependencias pesadas cargadas: {', '.join(report['heavy_loaded']) or 'ninguna'}")
+    print("\npor paquete (tiempo propio, -X importtime):")
+    for row in report["packages"]:
+        print(f"  {row['ms']:>8.1f} ms  {row['package']}")
+    print("\nmódulos de app (acumulado):")
+    for row in report["app_modules"]:
+        print(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Coste de importación por módulo")
+    parser.add_argument("--module", default="app.main", help="Módulo a importar")
+    parser.add_argument("--top", type=int, default=10, help="Filas por sección")
+    parser.add_argument("--json", dest="json_path", help="Guardar el informe en este archivo")
+    parser.add_argument("--fail-on-heavy", action="store_true",
+                        help="Salir con código 1 si se carga alguna dependencia pesada")
+    args = parser.parse_args(argv)
+
+    report = run_report(args.module, args.top)
+    _print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    return 1 if args.fail_on_heavy and report["heavy_loaded"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Benchmark offline del pipeline de escaneo.
+
+Genera imágenes sintéticas (códigos EAN-13 y portadas con texto) y las pasa por
+``BarcodeScanner``, ``OCRService`` y ``BookScanService`` sin tocar la red:
+las búsquedas en catálogo y la caché de resultados se sustituyen por versiones
+vacías para medir solo el trabajo de imagen.
+
+Tampoco necesita base de datos: ``book_scan_service`` importa (vía la búsqueda
+en catálogo) ``app.database``, así que antes de importar la app se activa el
+modo de pruebas con SQLite en memoria (``TESTING=true``,
+``TEST_DATABASE_URL=sqlite://``) y no hace falta ningún driver de PostgreSQL.
+
+El rendimiento se mide solo sobre el bucle de muestras de cada worker: la
+construcción de servicios, la carga de modelos, el calentamiento y el arranque
+de procesos quedan fuera del reloj.
+
+Informa de latencia p50/p95/p99, rendimiento por núcleo, pico de memoria (RSS)
+y porcentaje de aciertos por etapa.
+
+Uso:
+    python -m benchmarks.scan_benchmark
+    python -m benchmarks.scan_benchmark --samples 120 --stages barcode,scan --workers 4
+    python -m benchmarks.scan_benchmark --json baseline.json
+    python -m benchmarks.scan_benchmark --compare baseline.json   # exit 1 si hay regresión
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+
+from benchmarks.synthetic import Sample, generate_samples, title_matches
+
+STAGES = ("barcode", "ocr", "scan")
+
+# Muestras que tiene sentido pasar por cada etapa
+_STAGE_KINDS = {
+    "barcode": ("barcode",),
+    "ocr": ("cover",),
+    "scan": ("barcode", "cover"),
+}
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KB y macOS en bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:  # pragma: no cover - Windows
+        import psutil
+
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class _OfflineSearch:
+    """Búsqueda en catálogo vacía: el benchmark no mide la red."""
+
+    def search(self, **_kwargs: Any) -> List[Dict[str, Any]]:
+        return []
+
+    def search_many(self, queries: Sequence[Dict[str, Any]], **_kwargs: Any) -> List[List[Dict[str, Any]]]:
+        return [[] for _ in queries]
+
+
+def _offline_environment() -> None:
+    # Debe ir antes del primer import de la app (también en los workers ``spawn``);
+    # si ``app.database`` ya estaba importado no cambia nada
+    os.environ.setdefault("TESTING", "true")
+    os.environ.setdefault("TEST_DATABASE_URL", "sqlite://")
+
+
+def _build_stage(stage: str) -> Callable[[Sample], bool]:
+    """Devuelve una función que procesa una muestra e indica si el resultado es correcto."""
+    _offline_environment()
+    from app.services.barcode_scanner import BarcodeScanner
+    from app.services.book_scan_service import BookScanService
+    from app.services.image_preprocessing import preprocess_image
+    from app.services.ocr_service import OCRService
+    from app.services.scan_result_cache import ScanResultCache
+
+    if stage == "barcode":
+        scanner = BarcodeScanner()
+
+        def run_barcode(sample: Sample) -> bool:
+            image = preprocess_image(sample.image_data)
+            return scanner.extract_isbn(image) == sample.expected["isbn"]
+
+        return run_barcode
+
+    if stage == "ocr":
+        ocr = OCRService()
+
+        def run_ocr(sample: Sample) -> bool:
+            result = ocr.analyze_image(preprocess_image(sample.image_data))
+            return title_matches(sample.expected["title"], ocr.extract_book_title(result))
+
+        return run_ocr
+
+    class _NoResultCache(ScanResultCache):
+        # Cada muestra es distinta, pero así no dependemos de Redis
+        def get(self, image_hash, method):
+            return None
+
+        def set(self, image_hash, method, result):
+            return None
+
+    service = BookScanService(search_service=_OfflineSearch(), result_cache=_NoResultCache())
+
+    def run_scan(sample: Sample) -> bool:
+        result = service.scan_book(sample.image_data)
+        if sample.expected["isbn"]:
+            return result.get("isbn") == sample.expected["isbn"]
+        return title_matches(sample.expected["title"], result.get("title"))
+
+    return run_scan
+
+
+def _ocr_available() -> Optional[str]:
+    """None si EasyOCR puede cargar sus modelos; si no, el motivo."""
+    _offline_environment()
+    from app.services.ocr_reader_pool import get_ocr_reader_pool
+
+    try:
+        get_ocr_reader_pool().warmup()
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _in_subprocess(fn: Callable[..., Any], *args: Any) -> Any:
+    # ru_maxrss se hereda en fork/exec: lo que infla la memoria (generar fotos de
+    # 12 MP, importar torch) se hace fuera para no contaminar el pico de las etapas
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _generate(samples: int, seed: int) -> List[Sample]:
+    return list(generate_samples(samples, seed=seed))
+
+
+def _run_chunk(stage: str, samples: List[Sample], warmup: int) -> Dict[str, Any]:
+    """
+    Ejecuta una etapa sobre ``samples`` en el proceso actual.
+
+    ``elapsed_s`` es solo el bucle medido: construir la etapa y el calentamiento
+    van antes de poner en marcha el reloj.
+    """
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        run = _build_stage(stage)
+        for sample in samples[:warmup]:
+            run(sample)
+
+        latencies: List[float] = []
+        correct = 0
+        started = time.perf_counter()
+        for sample in samples:
+            t0 = time.perf_counter()
+            ok = run(sample)
+            latencies.append(time.perf_counter() - t0)
+            correct += int(bool(ok))
+        elapsed = time.perf_counter() - started
+    finally:
+        logging.disable(previous)
+
+    return {"latencies": latencies, "correct": correct, "elapsed_s": elapsed, "peak_rss_mb": _peak_rss_mb()}
+
+
+def run_stage(
+    stage: str,
+    samples: List[Sample],
+    workers: int = 1,
+    warmup: int = 2,
+    kinds: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Mide una etapa con ``workers`` procesos y devuelve el informe agregado.
+
+    Con un solo worker todo corre en el proceso actual; con más, las muestras se
+    reparten en procesos ``spawn`` (como el pool de escaneo real) y el rendimiento
+    por núcleo se calcula sobre el bucle medido más largo de los workers (el
+    arranque de procesos y el calentamiento no cuentan).
+    """
+    kinds = kinds or _STAGE_KINDS[stage]
+    samples = [s for s in samples if s.kind in kinds]
+    if not samples:
+        return {"stage": stage, "skipped": "sin muestras para esta etapa"}
+
+    if workers <= 1:
+        chunks = [_run_chunk(stage, samples, warmup)]
+    else:
+        parts = [samples[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            chunks = list(pool.map(_run_chunk, [stage] * workers, parts, [warmup] * workers))
+
+    latencies = [latency for chunk in chunks for latency in chunk["latencies"]]
+    correct = sum(chunk["correct"] for chunk in chunks)
+    # Los workers miden en paralelo: el tiempo de pared es el del más lento
+    measured = max(1e-9, max(chunk["elapsed_s"] for chunk in chunks))
+    throughput = len(latencies) / measured
+
+    return {
+        "stage": stage,
+        "samples": len(latencies),
+        "workers": max(1, workers),
+        "accuracy": round(correct / len(latencies), 4),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "throughput_per_s": round(throughput, 2),
+        "throughput_per_core": round(throughput / max(1, workers), 2),
+        "peak_rss_mb": round(max(chunk["peak_rss_mb"] for chunk in chunks), 1),
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lista de regresiones respecto a un informe anterior (vacía si no hay)."""
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        now = current.get("stages", {}).get(stage)
+        if not now or "skipped" in now or "skipped" in base:
+            continue
+        if now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {base['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_per_core"] < base["throughput_per_core"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: throughput/core {base['throughput_per_core']} -> {now['throughput_per_core']}"
+            )
+        if now["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{stage}: peak RSS {base['peak_rss_mb']}MB -> {now['peak_rss_mb']}MB")
+        if now["accuracy"] < base["accuracy"] - 0.02:
+            regressions.append(f"{stage}: accuracy {base['accuracy']} -> {now['accuracy']}")
+    return regressions
+
+
+def run_benchmark(
+    samples: int = 40,
+    seed: int = 0,
+    stages: Sequence[str] = STAGES,
+    workers: int = 1,
+    warmup: int = 2,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    generated = _in_subprocess(_generate, samples, seed)
+    generation_s = time.perf_counter() - t0
+
+    check_ocr = any(stage in ("ocr", "scan") for stage in stages)
+    ocr_error = _in_subprocess(_ocr_available) if check_ocr else None
+
+    report: Dict[str, Any] = {
+        "seed": seed,
+        "samples": len(generated),
+        "cpu_count": os.cpu_count(),
+        "generation_s": round(generation_s, 2),
+        "ocr_available": (ocr_error is None) if check_ocr else None,
+        "stages": {},
+    }
+    for stage in stages:
+        if stage == "ocr" and ocr_error:
+            report["stages"][stage] = {"stage": stage, "skipped": f"EasyOCR no disponible ({ocr_error})"}
+            continue
+        if stage == "scan" and ocr_error:
+            # Sin modelos cada portada intentaría descargarlos: solo medimos la ruta de códigos
+            row = run_stage(stage, generated, workers=workers, warmup=warmup, kinds=("barcode",))
+            row["note"] = "solo códigos de barras (EasyOCR no disponible)"
+            report["stages"][stage] = row
+            continue
+        report["stages"][stage] = run_stage(stage, generated, workers=workers, warmup=warmup)
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"samples={report['samples']} seed={report['seed']} cpus={report['cpu_count']} "
+          f"ocr_available={report['ocr_available']}")
+    header = f"{'stage':<8} {'n':>4} {'acc':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'ops/s/core':>11} {'rssMB':>7}"
+    print(header)
+    print("-" * len(header))
+    for stage, row in report["stages"].items():
+        if "skipped" in row:
+            print(f"{stage:<8} skipped: {row['skipped']}")
+            continue
+        print(
+            f"{stage:<8} {row['samples']:>4} {row['accuracy']:>6.2f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+            f"{row['p99_ms']:>8.1f} {row['throughput_per_core']:>11.2f} {row['peak_rss_mb']:>7.0f}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline del pipeline de escaneo")
+    parser.add_argument("--samples", type=int, default=40, help="Imágenes sintéticas a generar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(STAGES), help="Etapas separadas por comas")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--warmup", type=int, default=2, help="Muestras de calentamiento por worker")
+    parser.add_argument("--json", dest="json_path", help="Guardar el informe en este archivo")
+    parser.add_argument("--compare", help="Informe JSON anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Margen antes de marcar regresión")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"etapas desconocidas: {', '.join(sorted(unknown))}")
+
+    report = run_benchmark(args.samples, args.seed, stages, args.workers, args.warmup)
+    _print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare_reports(report, json.load(fh), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ Test configuration and fixtures
 import os
 import logging
 import pytest
+from typing import Any, Dict, List, Optional
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
@@ -11,9 +12,12 @@ from sqlalchemy.orm import sessionmaker
 # Set environment variables before importing app to ensure rate limiting is disabled
 os.environ["TESTING"] = "true"
 os.environ["DISABLE_RATE_LIMITING"] = "true"
+# Escanear en un hilo del propio proceso para que los mocks de los tests apliquen
+os.environ["SCAN_WORKER_PROCESSES"] = "0"
 
 from app.database import get_db, Base, SessionLocal
 from app.main import app
+from app.services.circuit_breaker import circuit_breakers
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -82,6 +86,13 @@ def clean_db():
     finally:
         db.close()
 
+@pytest.fixture(autouse=True)
+def reset_provider_breakers():
+    """Los fallos simulados de un test no deben dejar abierto el circuito para el siguiente"""
+    for breaker in circuit_breakers():
+        breaker.reset()
+    yield
+
 @pytest.fixture(autouse=True)
 def clean_logging():
     """Aislar logging entre tests: limpiar handlers antes de cada test"""
@@ -100,3 +111,142 @@ def clean_logging():
 
     # Restaurar configuración básica después del test
     logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class FakeRedis:
+    """
+    Redis en memoria para los tests de caché: strings, listas, ZSETs, el script
+    de liberación de cerrojos y pipelines que graban los comandos.
+
+    Como Redis, guarda los valores en bytes y los devuelve como ``str`` solo con
+    ``decode_responses=True``. ``gets`` cuenta las lecturas (GET/MGET),
+    ``pipelines`` los pipelines ejecutados y ``ttls`` el último TTL por clave.
+    """
+
+    def __init__(self, decode_responses: bool = True):
+        self.decode_responses = decode_responses
+        self.data: Dict[str, Any] = {}
+        self.ttls: Dict[str, float] = {}
+        self.gets = 0
+        self.pipelines = 0
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _decode(self, value: Any) -> Any:
+        if self.decode_responses and isinstance(value, bytes):
+            return value.decode()
+        return value
+
+    @staticmethod
+    def _range(items: List[Any], start: int, end: int) -> List[Any]:
+        # Rangos de Redis: extremos incluidos y negativos desde el final
+        end = len(items) + end if end < 0 else end
+        return items[start if start >= 0 else max(0, len(items) + start):end + 1]
+
+    # Strings
+    def get(self, key: str) -> Any:
+        self.gets += 1
+        return self._decode(self.data.get(key))
+
+    def mget(self, keys: List[str]) -> List[Any]:
+        self.gets += 1
+        return [self._decode(self.data.get(key)) for key in keys]
+
+    def set(self, key: str, value: Any, nx: bool = False, ex: Optional[int] = None, px: Optional[int] = None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = self._encode(value)
+        if ex is not None or px is not None:
+            self.ttls[key] = ex if ex is not None else px / 1000
+        return True
+
+    def setex(self, key: str, ttl: int, value: Any) -> bool:
+        self.data[key] = self._encode(value)
+        self.ttls[key] = ttl
+        return True
+
+    def exists(self, *keys: str) -> int:
+        return sum(key in self.data for key in keys)
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if key not in self.data:
+            return False
+        self.ttls[key] = seconds
+        return True
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> int:
+        # Solo el script de liberación de cerrojos: borrar la clave si es nuestra
+        key, token = keys_and_args[0], keys_and_args[numkeys]
+        if self.data.get(key) == self._encode(token):
+            del self.data[key]
+            return 1
+        return 0
+
+    # Listas
+    def lpush(self, key: str, *values: Any) -> int:
+        items = self.data.setdefault(key, [])
+        for value in values:
+            items.insert(0, self._encode(value))
+        return len(items)
+
+    def lrange(self, key: str, start: int, end: int) -> List[Any]:
+        return [self._decode(item) for item in self._range(self.data.get(key, []), start, end)]
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        if key in self.data:
+            self.data[key] = self._range(self.data[key], start, end)
+        return True
+
+    # ZSETs
+    def _ranked(self, key: str) -> List[Any]:
+        return sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    def zincrby(self, key: str, amount: float, member: Any) -> float:
+        zset = self.data.setdefault(key, {})
+        member = self._encode(member)
+        zset[member] = zset.get(member, 0) + amount
+        return zset[member]
+
+    def zrange(self, key: str, start: int, end: int, withscores: bool = False) -> List[Any]:
+        ranked = [(self._decode(member), score) for member, score in self._range(self._ranked(key), start, end)]
+        return ranked if withscores else [member for member, _ in ranked]
+
+    def zremrangebyrank(self, key: str, start: int, end: int) -> int:
+        removed = self._range(self._ranked(key), start, end)
+        for member, _ in removed:
+            del self.data[key][member]
+        return len(removed)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Graba cualquier comando y los aplica en orden al ejecutar."""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.calls: List[Any] = []
+
+    def __getattr__(self, name: str):
+        def _record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _record
+
+    def execute(self) -> List[Any]:
+        self.redis.pipelines += 1
+        calls, self.calls = self.calls, []
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis():
+    """Crea clientes ``FakeRedis``: ``fake_redis()`` o ``fake_redis(decode_responses=False)``."""
+    return FakeRedis
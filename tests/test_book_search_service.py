@@ -0,0 +1,353 @@
+"""
+Pruebas unitarias para BookSearchService
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+
+from app.services.book_search_service import BookSearchService, merge_results
+from app.services.circuit_breaker import ProviderError
+from app.services.openlibrary_client import OpenLibraryClient
+
+
+def _service(openlibrary=None, googlebooks=None, cache=None):
+    if cache is None:
+        cache = MagicMock()
+        cache.get_json.return_value = None
+    return BookSearchService(
+        openlibrary=openlibrary or MagicMock(),
+        googlebooks=googlebooks or MagicMock(),
+        cache=cache,
+    )
+
+
+class TestSearchMany:
+    def test_results_keep_query_order_and_dedupe(self):
+        """Test las consultas repetidas se resuelven una sola vez"""
+        openlibrary = MagicMock()
+        openlibrary.search_by_isbn.side_effect = lambda isbn: [{"title": f"Libro {isbn}", "isbn": isbn}]
+        service = _service(openlibrary=openlibrary)
+
+        results = service.search_many(
+            [{"isbn": "111"}, {"isbn": "222"}, {"isbn": "111"}, {}],
+            limit=3,
+        )
+
+        assert [r[0]["title"] if r else None for r in results] == ["Libro 111", "Libro 222", "Libro 111", None]
+        assert openlibrary.search_by_isbn.call_count == 2
+
+    def test_failed_query_returns_empty_list(self):
+        """Test un fallo en una consulta no afecta al resto"""
+        service = _service()
+        original = service.search
+
+        def flaky(**kwargs):
+            if kwargs.get("title") == "boom":
+                raise RuntimeError("provider down")
+            return original(**kwargs)
+
+        service.search = flaky
+        service.openlibrary.search_by_title.return_value = [{"title": "Ok"}]
+
+        results = service.search_many([{"title": "boom"}, {"title": "fine"}])
+
+        assert results[0] == []
+        assert results[1][0]["title"] == "Ok"
+
+
+class TestAsyncSearch:
+    def test_asearch_falls_back_to_googlebooks_and_caches(self):
+        """Test asearch usa Google Books si OpenLibrary no devuelve nada y guarda en caché"""
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_title = AsyncMock(return_value=[])
+        googlebooks = MagicMock()
+        googlebooks.asearch_by_title = AsyncMock(return_value=[{"title": "Dune", "source": "googlebooks"}])
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks)
+
+        results = asyncio.run(service.asearch(title="dune", limit=3))
+
+        assert results[0]["title"] == "Dune"
+        assert results[0]["authors"] == []
+        key, entry = service.cache.set_json.call_args.args
+        assert key == "search:v5:title:dune:3"
+        assert entry["results"] == results
+        openlibrary.search_by_title.assert_not_called()
+
+    def test_asearch_returns_cached_results(self):
+        """Test asearch no llama a los proveedores si hay caché"""
+        cache = MagicMock()
+        cache.get_json.return_value = {"results": [{"title": "Cached"}], "fresh_until": time.time() + 60}
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbn = AsyncMock()
+        service = _service(openlibrary=openlibrary, cache=cache)
+
+        assert asyncio.run(service.asearch(isbn="9780441013593")) == [{"title": "Cached"}]
+        openlibrary.asearch_by_isbn.assert_not_called()
+
+    def test_catalog_lookups_run_off_the_event_loop(self):
+        """Test las consultas al catálogo local no bloquean el event loop"""
+        loop_thread = []
+        lookup_threads = []
+        catalog = MagicMock()
+        catalog.lookup.side_effect = lambda isbn: lookup_threads.append(threading.get_ident()) or [{"title": "Dune"}]
+        catalog.lookup_many.side_effect = lambda isbns: lookup_threads.append(threading.get_ident()) or {}
+        service = _service()
+        service.catalog = catalog
+        service.cache.get_many_json.return_value = {}
+        service.openlibrary.asearch_by_isbns = AsyncMock(return_value={})
+        service.googlebooks.asearch_by_isbns = AsyncMock(return_value={})
+
+        async def _run():
+            loop_thread.append(threading.get_ident())
+            await service.asearch(isbn="9780441013593")
+            await service.asearch_isbns(["9780000000002"])
+
+        asyncio.run(_run())
+
+        assert len(lookup_threads) == 2
+        assert loop_thread[0] not in lookup_threads
+
+    def test_openlibrary_async_client_uses_shared_transport(self):
+        """Test el cliente asíncrono de OpenLibrary cae a search.json si /isbn no existe"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            if request.url.path.startswith("/isbn/"):
+                return httpx.Response(404)
+            return httpx.Response(200, json={"docs": [{"title": "Dune", "author_name": ["Frank Herbert"]}]})
+
+        async def _run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                client = OpenLibraryClient(base_url="https://ol.test", async_http_client=http, author_cache=MagicMock())
+                return await client.asearch_by_isbn("9780441013593")
+
+        results = asyncio.run(_run())
+
+        assert requests == ["/isbn/9780441013593.json", "/search.json"]
+        assert results[0]["authors"] == ["Frank Herbert"]
+
+
+class TestCacheKeys:
+    def test_title_variants_share_a_key(self):
+        """Test acentos, mayúsculas, espacios y puntuación no generan claves distintas"""
+        service = _service()
+        keys = {
+            service._make_cache_key(title=title, isbn=None, limit=5)
+            for title in ("Cien años de soledad", "  CIEN  AÑOS de soledad!", "cien anos, de soledad")
+        }
+
+        assert keys == {"search:v5:title:cien+anos+de+soledad:5"}
+
+    def test_symbols_after_a_word_change_the_key(self):
+        """Test "C++ Primer" y "C Primer" no comparten entrada"""
+        service = _service()
+
+        assert service._make_cache_key(title="C++ Primer", isbn=None, limit=5) != service._make_cache_key(
+            title="C Primer", isbn=None, limit=5
+        )
+
+    def test_punctuation_only_title_bypasses_cache(self):
+        """Test una consulta sin palabras va a los proveedores sin leer ni escribir caché"""
+        service = _service()
+        service.openlibrary.search_by_title.return_value = [{"title": "?!"}]
+
+        results = service.search(title="?!", limit=5)
+
+        assert service._make_cache_key(title="?!", isbn=None, limit=5) is None
+        assert results[0]["title"] == "?!"
+        service.cache.get_json.assert_not_called()
+        service.cache.set_json.assert_not_called()
+
+    def test_isbn10_and_isbn13_share_a_key(self):
+        """Test el ISBN-10 y el ISBN-13 de un libro usan la misma entrada"""
+        service = _service()
+
+        assert service._make_cache_key(title=None, isbn="0-441-01359-7", limit=5) == "search:v5:isbn:9780441013593:5"
+        assert service._make_cache_key(title=None, isbn="9780441013593", limit=5) == "search:v5:isbn:9780441013593:5"
+
+
+class TestParallelProviders:
+    def test_merge_dedupes_by_isbn_and_fills_missing_fields(self):
+        """Test el mismo libro en ambos proveedores se funde usando el ISBN normalizado"""
+        openlibrary = [{"title": "Dune", "isbn": "0441013597", "publisher": None, "source": "openlibrary"}]
+        googlebooks = [
+            {"title": "Dune (GB)", "isbn": "978-0-441-01359-3", "publisher": "Ace", "source": "googlebooks"},
+            {"title": "Otro", "isbn": None, "source": "googlebooks"},
+        ]
+
+        merged = merge_results(openlibrary, googlebooks)
+
+        assert len(merged) == 2
+        assert merged[0]["title"] == "Dune"
+        assert merged[0]["publisher"] == "Ace"
+        assert merged[0]["source"] == "openlibrary"
+        assert merged[1]["title"] == "Otro"
+
+    def test_parallel_search_returns_what_arrived_by_deadline(self):
+        """Test si un proveedor se pasa del presupuesto se devuelve lo que haya y no se cachea"""
+        async def _slow(isbn, limit=5):
+            await asyncio.sleep(1)
+            return [{"title": "Tarde"}]
+
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbn = AsyncMock(return_value=[{"title": "Dune", "isbn": "9780441013593"}])
+        googlebooks = MagicMock()
+        googlebooks.asearch_by_isbn = _slow
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks)
+        service.strategy, service.latency_budget = "parallel", 0.05
+
+        t0 = time.perf_counter()
+        results = asyncio.run(service.asearch(isbn="9780441013593"))
+
+        assert time.perf_counter() - t0 < 0.5
+        assert [r["title"] for r in results] == ["Dune"]
+        service.cache.set_json.assert_not_called()
+
+    def test_sync_parallel_search_merges_both_providers(self):
+        """Test en modo paralelo se consultan ambos proveedores aunque OpenLibrary responda"""
+        openlibrary = MagicMock()
+        openlibrary.search_by_title.return_value = [{"title": "Dune", "isbn": "9780441013593", "source": "openlibrary"}]
+        googlebooks = MagicMock()
+        googlebooks.search_by_title.return_value = [
+            {"title": "Dune", "isbn": "9780441013593", "page_count": 528, "source": "googlebooks"},
+            {"title": "Dune Messiah", "isbn": "9780593098233", "source": "googlebooks"},
+        ]
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks)
+        service.strategy = "parallel"
+
+        results = service.search(title="dune", limit=5)
+
+        assert [(r["title"], r["page_count"]) for r in results] == [("Dune", 528), ("Dune Messiah", None)]
+        service.cache.set_json.assert_called_once()
+
+
+class TestStaleWhileRevalidate:
+    def test_empty_results_use_negative_ttl(self):
+        """Test las búsquedas sin resultados caducan antes que las positivas"""
+        openlibrary = MagicMock()
+        openlibrary.search_by_title.return_value = []
+        googlebooks = MagicMock()
+        googlebooks.search_by_title.return_value = []
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks)
+        service.positive_ttl, service.negative_ttl, service.stale_ttl = 3600, 60, 600
+
+        assert service.search(title="nada") == []
+
+        _, entry = service.cache.set_json.call_args.args
+        assert entry["results"] == []
+        assert entry["fresh_until"] - time.time() <= 60
+        assert service.cache.set_json.call_args.kwargs["ttl_seconds"] == 660
+
+    def test_fresh_entry_is_served_without_refresh(self):
+        """Test una entrada fresca no dispara consultas a los proveedores"""
+        cache = MagicMock()
+        cache.get_json.return_value = {"results": [{"title": "Cached"}], "fresh_until": time.time() + 60}
+        service = _service(cache=cache)
+
+        assert service.search(isbn="9780441013593") == [{"title": "Cached"}]
+        service.openlibrary.search_by_isbn.assert_not_called()
+
+    def test_stale_entry_is_served_and_refreshed_once(self):
+        """Test una entrada caducada se sirve al momento y se refresca en segundo plano"""
+        cache = MagicMock()
+        cache.get_json.return_value = {"results": [{"title": "Old"}], "fresh_until": time.time() - 1}
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbn = AsyncMock(return_value=[{"title": "New", "isbn": "9780441013593"}])
+        service = _service(openlibrary=openlibrary, cache=cache)
+
+        async def _run():
+            first = await service.asearch(isbn="9780441013593")
+            second = await service.asearch(isbn="9780441013593")
+            await asyncio.gather(*service._refresh_tasks)
+            return first, second
+
+        first, second = asyncio.run(_run())
+
+        assert first == second == [{"title": "Old"}]
+        openlibrary.asearch_by_isbn.assert_awaited_once()
+        _, entry = cache.set_json.call_args.args
+        assert entry["results"][0]["title"] == "New"
+
+
+class _BatchCache:
+    """Caché en memoria con get_many_json / set_many_json."""
+
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.mgets = 0
+        self.pipelines = 0
+
+    def get_many_json(self, keys):
+        self.mgets += 1
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_many_json(self, items):
+        self.pipelines += 1
+        self.data.update({key: value for key, (value, _) in items.items()})
+
+
+class TestIsbnBatch:
+    def test_hits_come_from_one_read_and_misses_from_one_write(self):
+        """Test los aciertos salen de una lectura y los fallos se guardan con una escritura"""
+        cached = {"results": [{"title": "Cached"}], "fresh_until": time.time() + 60}
+        cache = _BatchCache({"search:v5:isbn:9780441013593:5": cached})
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbns = AsyncMock(
+            return_value={"9780593098233": [{"title": "Dune Messiah", "isbn": "9780593098233"}], "9780000000002": []}
+        )
+        googlebooks = MagicMock()
+        googlebooks.asearch_by_isbn = AsyncMock(return_value=[])
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks, cache=cache)
+
+        found = asyncio.run(service.asearch_isbns(["9780441013593", "9780593098233", "9780000000002"]))
+
+        assert found["9780441013593"] == [{"title": "Cached"}]
+        assert found["9780593098233"][0]["title"] == "Dune Messiah"
+        assert found["9780000000002"] == []
+        openlibrary.asearch_by_isbns.assert_awaited_once_with(["9780593098233", "9780000000002"])
+        googlebooks.asearch_by_isbn.assert_awaited_once_with("9780000000002", limit=5)
+        assert (cache.mgets, cache.pipelines) == (1, 1)
+        assert cache.data["search:v5:isbn:9780000000002:5"]["results"] == []
+
+    def test_isbn10_and_isbn13_of_a_book_are_fetched_once(self):
+        """Test dos formas del mismo ISBN en un lote se piden una sola vez"""
+        cache = _BatchCache()
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbns = AsyncMock(return_value={"0441013597": [{"title": "Dune", "isbn": "9780441013593"}]})
+        service = _service(openlibrary=openlibrary, cache=cache)
+
+        found = asyncio.run(service.asearch_isbns(["0441013597", "9780441013593"]))
+
+        assert found["0441013597"] == found["9780441013593"]
+        assert found["9780441013593"][0]["title"] == "Dune"
+        openlibrary.asearch_by_isbns.assert_awaited_once_with(["0441013597"])
+        assert list(cache.data) == ["search:v5:isbn:9780441013593:5"]
+
+    def test_empty_is_not_cached_when_googlebooks_fails(self):
+        """Test un vacío de OpenLibrary no se guarda si Google Books no llegó a responder"""
+        cache = _BatchCache()
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbns = AsyncMock(return_value={"9780441013593": []})
+        googlebooks = MagicMock()
+        googlebooks.asearch_by_isbn = AsyncMock(side_effect=ProviderError("googlebooks: 503"))
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks, cache=cache)
+
+        assert asyncio.run(service.asearch_isbns(["9780441013593"])) == {"9780441013593": []}
+        assert cache.data == {}
+
+    def test_unanswered_isbns_are_not_cached_empty(self):
+        """Test un ISBN que OpenLibrary no llegó a responder no se guarda vacío"""
+        cache = _BatchCache()
+        openlibrary = MagicMock()
+        openlibrary.asearch_by_isbns = AsyncMock(return_value={})
+        googlebooks = MagicMock()
+        googlebooks.asearch_by_isbn = AsyncMock(return_value=[])
+        service = _service(openlibrary=openlibrary, googlebooks=googlebooks, cache=cache)
+
+        assert asyncio.run(service.asearch_isbns(["9780441013593"])) == {"9780441013593": []}
+        assert cache.data == {}
+
@@ -0,0 +1,125 @@
+"""
+Tests para el recuento de búsquedas populares y el calentado de la caché de catálogo
+"""
+import time
+import uuid
+from unittest.mock import MagicMock
+
+from app.models.book import Book
+from app.models.user import User
+from app.services.book_search_service import BookSearchService
+from app.services.popular_queries import PopularQueries
+from app.tasks import cache_warming
+
+
+class TestPopularQueries:
+    def test_counts_are_buffered_and_merged_by_canonical_form(self, fake_redis):
+        """Test las variantes de una consulta cuentan juntas y solo se vuelca al pasar el intervalo"""
+        # Cliente binario: los miembros vuelven en bytes
+        redis = fake_redis(decode_responses=False)
+        popular = PopularQueries(redis_client=redis, flush_interval_seconds=3600, retention_days=7)
+        popular.record(title="Cien años de soledad", limit=5)
+        popular.record(title="  cien anos de SOLEDAD ", limit=5)
+        popular.record(isbn="0-441-01359-7", limit=5)
+        popular.record(title="Dune", limit=3)
+        popular.record(isbn="9780441013593", limit=5)
+        popular.record(title="Cien Años de Soledad!", limit=5)
+
+        assert redis.data == {}
+        popular.flush()
+
+        assert popular.top(2) == [
+            {"title": "cien anos de soledad", "limit": 5},
+            {"isbn": "9780441013593", "limit": 5},
+        ]
+
+    def test_without_redis_nothing_is_returned(self):
+        """Test sin Redis no hay recuentos compartidos"""
+        popular = PopularQueries(redis_client=None, flush_interval_seconds=0)
+        popular.record(title="Dune", limit=5)
+
+        assert popular.top(10) == []
+
+
+def _service(redis, cache_data=None):
+    cache = MagicMock()
+    cache.get_json.side_effect = lambda key: (cache_data or {}).get(key)
+    openlibrary = MagicMock()
+    openlibrary.search_by_isbn.side_effect = lambda isbn: [{"title": f"Libro {isbn}", "isbn": isbn}]
+    openlibrary.search_by_title.side_effect = lambda title, limit: [{"title": title}]
+    return BookSearchService(
+        openlibrary=openlibrary,
+        googlebooks=MagicMock(),
+        cache=cache,
+        catalog=MagicMock(lookup_many=MagicMock(return_value={})),
+        popular=PopularQueries(redis_client=redis(decode_responses=False), flush_interval_seconds=3600),
+    )
+
+
+class TestWarm:
+    def test_fresh_entries_do_not_reach_providers(self, fake_redis):
+        """Test una entrada fresca no se vuelve a pedir"""
+        fresh = {"results": [{"title": "Dune"}], "fresh_until": time.time() + 60}
+        service = _service(fake_redis, {"search:v5:title:dune:5": fresh})
+
+        assert service.warm(title="Dune", limit=5) is False
+        service.openlibrary.search_by_title.assert_not_called()
+
+    def test_missing_and_stale_entries_are_refreshed(self, fake_redis):
+        """Test las entradas caducadas o ausentes se piden y se guardan"""
+        stale = {"results": [{"title": "Old"}], "fresh_until": time.time() - 1}
+        service = _service(fake_redis, {"search:v5:title:dune:5": stale})
+
+        assert service.warm(title="Dune", limit=5) is True
+        assert service.warm(isbn="9780441013593", limit=5) is True
+        keys = [call.args[0] for call in service.cache.set_json.call_args_list]
+        assert keys == ["search:v5:title:dune:5", "search:v5:isbn:9780441013593:5"]
+
+
+class TestWarmCatalogCache:
+    def _library(self, db_session):
+        owner = User(id=uuid.uuid4(), username="warm", email="warm@example.com", password_hash="x")
+        db_session.add(owner)
+        for isbn, archived in (("0441013597", False), ("978-0-441-01359-3", False), ("9780593098233", True), ("nope", False)):
+            db_session.add(Book(title="Libro", isbn=isbn, owner_id=owner.id, is_archived=archived))
+        db_session.commit()
+
+    def test_popular_queries_then_library_isbns(self, db_session, monkeypatch, fake_redis):
+        """Test se calientan las búsquedas populares y los ISBN válidos de libros no archivados"""
+        self._library(db_session)
+        service = _service(fake_redis)
+        service.cache.client = fake_redis(decode_responses=False)
+        service.popular.record(title="Dune", limit=3)
+        monkeypatch.setattr(cache_warming, "get_book_search_service", lambda: service)
+        monkeypatch.setattr(cache_warming.time, "sleep", lambda seconds: None)
+
+        stats = cache_warming.warm_catalog_cache()
+
+        assert stats["fetched"] == 2 and stats["failed"] == 0
+        keys = [call.args[0] for call in service.cache.set_json.call_args_list]
+        assert keys == ["search:v5:title:dune:3", "search:v5:isbn:9780441013593:5"]
+        assert service.cache.client.data == {}
+
+    def test_only_one_worker_warms_at_a_time(self, monkeypatch, fake_redis):
+        """Test si otro worker tiene el cerrojo no se calienta"""
+        service = _service(fake_redis)
+        service.cache.client = fake_redis(decode_responses=False)
+        service.cache.client.set(cache_warming._LOCK_KEY, "other", nx=True)
+        monkeypatch.setattr(cache_warming, "get_book_search_service", lambda: service)
+
+        assert cache_warming.warm_catalog_cache()["queries"] == 0
+        service.openlibrary.search_by_isbn.assert_not_called()
+
+    def test_stops_when_the_time_budget_runs_out(self, monkeypatch, fake_redis):
+        """Test al agotar SEARCH_WARM_MAX_SECONDS el calentado se detiene"""
+        service = _service(fake_redis)
+        service.cache.client = fake_redis(decode_responses=False)
+        for title in ("a", "b", "c"):
+            service.popular.record(title=title, limit=5)
+        monkeypatch.setattr(cache_warming, "get_book_search_service", lambda: service)
+        monkeypatch.setattr(cache_warming.settings, "SEARCH_WARM_MAX_SECONDS", 0)
+
+        stats = cache_warming.warm_catalog_cache()
+
+        assert stats["stopped_early"] is True
+        assert stats["queries"] == 0
@@ -0,0 +1,131 @@
+"""
+Tests para la caché de catálogo en dos niveles (LRU en memoria + Redis)
+"""
+import json
+from unittest.mock import patch
+
+from app.services.cache import LocalLRUCache, TieredCache
+
+
+def _tiered(redis, local=None, compress_min_bytes=None):
+    cache = TieredCache(
+        url="redis://localhost:6379/0",
+        local=local or LocalLRUCache(100, 10_000, 60),
+        compress_min_bytes=compress_min_bytes,
+    )
+    # Con compresión el cliente real es binario (sin decode_responses)
+    cache.client = redis(decode_responses=compress_min_bytes is None)
+    return cache
+
+
+class TestLocalLRUCache:
+    def test_evicts_least_recently_used_by_entries(self):
+        """Test al superar el número de entradas sale la menos usada"""
+        lru = LocalLRUCache(max_entries=2, max_bytes=1000, ttl_seconds=60)
+        lru.set("a", 1, 10)
+        lru.set("b", 2, 10)
+        lru.get("a")
+        lru.set("c", 3, 10)
+
+        assert lru.get("b") is None
+        assert lru.get("a") == 1
+        assert lru.stats()["evictions"] == 1
+
+    def test_evicts_by_bytes_and_skips_oversized_values(self):
+        """Test el límite de bytes expulsa entradas y un valor enorme no se guarda"""
+        lru = LocalLRUCache(max_entries=10, max_bytes=100, ttl_seconds=60)
+        lru.set("a", "x", 60)
+        lru.set("b", "y", 60)
+        lru.set("huge", "z", 500)
+
+        assert lru.get("a") is None
+        assert lru.get("huge") is None
+        assert lru.stats()["bytes"] == 60
+
+    def test_entries_expire(self):
+        """Test una entrada caducada cuenta como fallo"""
+        lru = LocalLRUCache(max_entries=10, max_bytes=1000, ttl_seconds=60)
+        with patch("app.services.cache.time.monotonic", return_value=1000.0):
+            lru.set("a", 1, 10, ttl_seconds=5)
+        with patch("app.services.cache.time.monotonic", return_value=1006.0):
+            assert lru.get("a") is None
+
+        assert lru.stats()["expirations"] == 1
+
+
+class TestTieredCache:
+    def test_redis_hit_is_promoted_to_memory(self, fake_redis):
+        """Test un acierto en Redis se guarda en memoria y el siguiente no va a Redis"""
+        cache = _tiered(fake_redis)
+        cache.client.set("search:k", json.dumps([{"title": "Dune"}]))
+
+        first = cache.get_json("search:k")
+        second = cache.get_json("search:k")
+
+        assert first == second == [{"title": "Dune"}]
+        assert cache.client.gets == 1
+        stats = cache.stats()
+        assert stats["redis"]["hits"] == 1
+        assert stats["local"]["hits"] == 1
+
+    def test_writes_go_to_both_tiers(self, fake_redis):
+        """Test set_json escribe en memoria y en Redis"""
+        cache = _tiered(fake_redis)
+        cache.set_json("search:k", ["x"])
+
+        assert json.loads(cache.client.data["search:k"]) == ["x"]
+        assert cache.get_json("search:k") == ["x"]
+        assert cache.client.gets == 0
+
+    def test_get_many_reads_only_missing_keys_from_redis(self, fake_redis):
+        """Test get_many_json solo pide a Redis lo que no está en memoria"""
+        cache = _tiered(fake_redis)
+        cache.set_json("a", "A")
+        cache.client.set("b", json.dumps("B"))
+
+        assert cache.get_many_json(["a", "b", "c"]) == {"a": "A", "b": "B"}
+        assert cache.stats()["redis"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+    def test_set_many_uses_one_pipeline(self, fake_redis):
+        """Test set_many_json escribe todas las claves en un solo pipeline y en memoria"""
+        cache = _tiered(fake_redis)
+        cache.set_many_json({"a": ("A", 30), "b": ("B", None)})
+
+        assert cache.client.pipelines == 1
+        assert cache.client.ttls == {"a": 30, "b": cache.ttl}
+        assert cache.get_many_json(["a", "b"]) == {"a": "A", "b": "B"}
+        assert cache.client.gets == 0
+
+
+class TestCompression:
+    def test_large_values_are_compressed_and_round_trip(self, fake_redis):
+        """Test los valores grandes se guardan comprimidos y se leen igual"""
+        cache = _tiered(fake_redis, compress_min_bytes=64)
+        value = {"results": [{"title": "Cien años de soledad", "authors": ["Gabriel García Márquez"]}] * 20}
+        cache.set_json("big", value)
+        cache.set_json("small", {"results": []})
+
+        assert cache.client.data["big"].startswith(b"z:")
+        assert len(cache.client.data["big"]) < len(json.dumps(value, ensure_ascii=False).encode())
+        assert cache.client.data["small"] == b'{"results":[]}'
+        cache.local = LocalLRUCache(100, 10_000, 60)
+        assert cache.get_many_json(["big", "small"]) == {"big": value, "small": {"results": []}}
+
+    def test_plain_and_corrupt_values(self, fake_redis):
+        """Test se leen las entradas sin comprimir y una corrupta cuenta como fallo"""
+        cache = _tiered(fake_redis, compress_min_bytes=64)
+        cache.client.set("plain", json.dumps(["x"]))
+        cache.client.set("corrupt", b"z:not-zlib")
+
+        assert cache.get_json("plain") == ["x"]
+        assert cache.get_json("corrupt") is None
+
+
+def test_detailed_health_reports_catalog_cache(client):
+    """Test /health/detailed expone las métricas de la caché de catálogo"""
+    response = client.get("/health/detailed")
+
+    check = response.json()["checks"]["catalog_cache"]
+    assert check["status"] == "healthy"
+    assert "local" in check and "redis" in check
+    assert "coalesced" in check["single_flight"]
@@ -0,0 +1,172 @@
+"""
+Tests para el circuit breaker de los proveedores de catálogo
+"""
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from app.services.book_search_service import BookSearchService
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ProviderError
+from app.services.googlebooks_client import GoogleBooksClient
+
+
+def _breaker(**kwargs):
+    options = {"min_calls": 4, "failure_ratio": 0.5, "open_seconds": 30, "slow_call_seconds": 1.0}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+class TestCircuitBreaker:
+    def test_opens_when_failure_ratio_is_reached(self):
+        """Test el circuito se abre con suficientes fallos en la ventana"""
+        breaker = _breaker()
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure(0.1)
+        assert breaker.state == CLOSED
+
+        breaker.record_failure(0.1)
+
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_slow_calls_count_as_failures(self):
+        """Test una respuesta por encima del umbral de lentitud cuenta como fallo"""
+        breaker = _breaker(min_calls=2)
+        breaker.record_success(2.0)
+        breaker.record_success(2.0)
+
+        assert breaker.state == OPEN
+
+    def test_half_open_allows_a_single_probe(self):
+        """Test pasado el tiempo abierto solo pasa una llamada de prueba"""
+        breaker = _breaker(min_calls=1, open_seconds=0.01)
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+
+        asyncio.run(asyncio.sleep(0.02))
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        assert not breaker.is_available()
+
+    def test_probe_result_closes_or_reopens(self):
+        """Test la prueba correcta cierra el circuito y la fallida lo vuelve a abrir"""
+        breaker = _breaker(min_calls=1, open_seconds=0.01)
+        breaker.record_failure(0.1)
+        asyncio.run(asyncio.sleep(0.02))
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+
+        asyncio.run(asyncio.sleep(0.02))
+        assert breaker.allow_request()
+        breaker.record_success(0.1)
+
+        assert breaker.state == CLOSED
+        assert breaker.snapshot()["failures"] == 0
+
+    def test_timeout_follows_observed_p95(self):
+        """Test el timeout se deriva del p95 de las latencias correctas"""
+        breaker = _breaker(window_size=20)
+        default = breaker.timeout()
+        for _ in range(19):
+            breaker.record_success(0.2)
+        breaker.record_success(0.9)
+
+        assert breaker.p95_latency() == pytest.approx(0.2)
+        assert breaker.timeout() < default
+        assert breaker.timeout() >= 0.4
+
+
+class TestProviderClients:
+    def test_server_errors_open_the_circuit_and_skip_the_network(self):
+        """Test tras varios 5xx las llamadas se rechazan sin tocar la red"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(503)
+
+        breaker = _breaker(min_calls=2)
+        client = GoogleBooksClient(http_client=httpx.Client(transport=httpx.MockTransport(handler)), breaker=breaker)
+
+        for _ in range(3):
+            with pytest.raises(ProviderError):
+                client.search_by_title("dune")
+        assert breaker.state == OPEN
+        assert len(requests) == 2
+
+    def test_not_found_is_not_a_failure(self):
+        """Test un 404 es una respuesta normal del proveedor"""
+        breaker = _breaker(min_calls=1)
+        http = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+
+        breaker.get(http, "https://example.org/isbn/0.json")
+
+        assert breaker.state == CLOSED
+
+    def test_open_circuit_raises_before_the_request(self):
+        """Test con el circuito abierto la llamada falla al momento"""
+        breaker = _breaker(min_calls=1)
+        breaker.record_failure(0.1)
+        http = MagicMock()
+
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(breaker.aget(http, "https://example.org"))
+        http.get.assert_not_called()
+
+
+class TestHealthAwareRouting:
+    def _service(self, openlibrary_state):
+        openlibrary = MagicMock()
+        openlibrary.breaker = _breaker(min_calls=1)
+        if openlibrary_state == OPEN:
+            openlibrary.breaker.record_failure(0.1)
+        googlebooks = MagicMock()
+        googlebooks.breaker = _breaker()
+        googlebooks.search_by_title.return_value = []
+        cache = MagicMock()
+        cache.get_json.return_value = None
+        return BookSearchService(openlibrary=openlibrary, googlebooks=googlebooks, cache=cache)
+
+    def test_open_provider_is_skipped(self):
+        """Test con OpenLibrary abierto se va directo a Google Books"""
+        service = self._service(OPEN)
+        service.googlebooks.search_by_title.return_value = [{"title": "Dune", "source": "googlebooks"}]
+
+        results = service.search(title="dune")
+
+        assert results[0]["title"] == "Dune"
+        service.openlibrary.search_by_title.assert_not_called()
+        service.cache.set_json.assert_called_once()
+
+    def test_empty_result_with_failed_provider_is_not_cached(self):
+        """Test un vacío con un proveedor que ha fallado no se guarda en caché (fallback y paralelo)"""
+        for strategy in ("fallback", "parallel"):
+            service = self._service(CLOSED)
+            service.strategy = strategy
+            service.openlibrary.search_by_title.side_effect = ProviderError("openlibrary: 503")
+
+            assert service.search(title="dune") == []
+            service.cache.set_json.assert_not_called()
+
+    def test_empty_result_with_skipped_provider_is_not_cached(self):
+        """Test un vacío sin consultar a todos los proveedores no se guarda en caché"""
+        service = self._service(OPEN)
+
+        assert service.search(title="dune") == []
+        service.cache.set_json.assert_not_called()
+
+    def test_parallel_mode_only_queries_available_providers(self):
+        """Test en modo paralelo tampoco se consulta el proveedor abierto"""
+        service = self._service(OPEN)
+        service.strategy = "parallel"
+        service.googlebooks.search_by_title.return_value = [{"title": "Dune", "isbn": "9780441013593"}]
+
+        assert [r["title"] for r in service.search(title="dune")] == ["Dune"]
+        service.openlibrary.search_by_title.assert_not_called()
@@ -0,0 +1,164 @@
+"""
+Tests para la caché de portadas y GET /covers/{book_id}
+"""
+import asyncio
+import io
+import os
+from uuid import uuid4
+
+import httpx
+from PIL import Image
+
+from app.services.cover_cache import COVER_SIZES, CoverCache, CoverUnavailableError
+from tests.helpers import register_user, login_user, auth_headers
+
+COVER_URL = "https://covers.openlibrary.org/b/id/12345-L.jpg"
+
+
+def _jpeg(width=800, height=1200):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (120, 40, 40)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+def _covers(tmp_path, requests):
+    def handler(request):
+        requests.append(str(request.url))
+        # covers.openlibrary.org redirige a archive.org
+        if request.url.host == "covers.openlibrary.org":
+            return httpx.Response(302, headers={"location": "https://ia800100.us.archive.org/cover.jpg"})
+        return httpx.Response(200, content=_jpeg())
+
+    return CoverCache(root=str(tmp_path), http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+class TestCoverCache:
+    def test_downloads_once_and_writes_every_variant(self, tmp_path):
+        """Test la portada se descarga una vez y se guardan todas las variantes en WebP"""
+        requests = []
+        covers = _covers(tmp_path, requests)
+
+        async def _run():
+            return await asyncio.gather(covers.get(COVER_URL, "small"), covers.get(COVER_URL, "large"))
+
+        small, large = asyncio.run(_run())
+        asyncio.run(covers.get(COVER_URL, "medium"))
+
+        assert len(requests) == 2  # redirección + imagen
+        for size, width in COVER_SIZES.items():
+            with Image.open(covers.path_for(COVER_URL, size)) as image:
+                assert (image.format, image.width) == ("WEBP", width)
+        assert os.path.getsize(small) < os.path.getsize(large)
+
+    def test_disallowed_hosts_are_not_fetched(self, tmp_path):
+        """Test no se descargan URLs fuera de la lista de hosts permitidos"""
+        requests = []
+        covers = _covers(tmp_path, requests)
+
+        for url in ("http://169.254.169.254/latest/meta-data", "file:///etc/passwd", "https://evil-openlibrary.org/a.jpg"):
+            try:
+                asyncio.run(covers.get(url, "medium"))
+            except CoverUnavailableError:
+                pass
+            else:
+                raise AssertionError(f"{url} should be rejected")
+        assert requests == []
+
+    def test_placeholder_pixel_is_rejected(self, tmp_path):
+        """Test el GIF de 1x1 de OpenLibrary no se guarda como portada"""
+        out = io.BytesIO()
+        Image.new("RGB", (1, 1)).save(out, format="GIF")
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=out.getvalue()))
+        covers = CoverCache(root=str(tmp_path), http_client=httpx.AsyncClient(transport=transport))
+
+        try:
+            asyncio.run(covers.get(COVER_URL, "small"))
+        except CoverUnavailableError:
+            pass
+        else:
+            raise AssertionError("placeholder should be rejected")
+        assert not os.path.exists(covers.path_for(COVER_URL, "small"))
+
+    def test_failed_download_is_not_retried_until_ttl(self, tmp_path, monkeypatch):
+        """Test tras un fallo no se vuelve a descargar hasta COVER_FAILURE_TTL_SECONDS"""
+        requests = []
+
+        def handler(request):
+            requests.append(str(request.url))
+            return httpx.Response(404)
+
+        covers = CoverCache(root=str(tmp_path), http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+        for _ in range(2):
+            try:
+                asyncio.run(covers.get(COVER_URL, "small"))
+            except CoverUnavailableError:
+                pass
+        assert len(requests) == 1
+
+        monkeypatch.setattr("app.services.cover_cache.settings.COVER_FAILURE_TTL_SECONDS", 0)
+        try:
+            asyncio.run(covers.get(COVER_URL, "small"))
+        except CoverUnavailableError:
+            pass
+        assert len(requests) == 2
+
+
+class TestCoverEndpoint:
+    def _book(self, client, cover_url):
+        user = register_user(client)
+        token = login_user(client, username=user["username"])
+        payload = {"title": "Dune", "author": "Frank Herbert", "cover_url": cover_url, "genre": "fantasy", "condition": "good"}
+        response = client.post("/books/", json=payload, headers=auth_headers(token))
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    def test_serves_webp_with_etag_and_revalidates(self, client, tmp_path, monkeypatch):
+        """Test la portada se sirve en WebP con ETag y un If-None-Match válido da 304"""
+        covers = _covers(tmp_path, [])
+        monkeypatch.setattr("app.api.covers.get_cover_cache", lambda: covers)
+        book_id = self._book(client, COVER_URL)
+
+        response = client.get(f"/covers/{book_id}", params={"size": "small"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert response.headers["etag"] == covers.etag(COVER_URL, "small")
+        assert "max-age=" in response.headers["cache-control"]
+
+        cached = client.get(f"/covers/{book_id}", params={"size": "small"}, headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+    def test_unavailable_cover_redirects_to_original(self, client, tmp_path, monkeypatch):
+        """Test si una portada de un host permitido no se puede cachear se redirige a la original"""
+        requests = []
+
+        def handler(request):
+            requests.append(str(request.url))
+            return httpx.Response(503)
+
+        covers = CoverCache(root=str(tmp_path), http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr("app.api.covers.get_cover_cache", lambda: covers)
+        book_id = self._book(client, COVER_URL)
+
+        first = client.get(f"/covers/{book_id}", follow_redirects=False)
+        second = client.get(f"/covers/{book_id}", follow_redirects=False)
+
+        assert first.status_code == second.status_code == 307
+        assert first.headers["location"] == COVER_URL
+        assert len(requests) == 1  # el fallo se recuerda
+
+    def test_disallowed_host_is_404_not_redirect(self, client, tmp_path, monkeypatch):
+        """Test una portada de un host no permitido no se redirige (sería una redirección abierta)"""
+        monkeypatch.setattr("app.api.covers.get_cover_cache", lambda: _covers(tmp_path, []))
+        book_id = self._book(client, "https://evil.example.com/cover.jpg")
+
+        response = client.get(f"/covers/{book_id}", follow_redirects=False)
+
+        assert response.status_code == 404
+        assert "location" not in response.headers
+
+    def test_unknown_book_is_404(self, client):
+        """Test un libro inexistente devuelve 404"""
+        assert client.get(f"/covers/{uuid4()}").status_code == 404
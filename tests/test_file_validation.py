@@ -1,10 +1,13 @@
 """
 Pruebas unitarias para file_validation.py
 """
+import io
+
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 from fastapi import UploadFile, HTTPException
 from app.utils.file_validation import validate_image_file, validate_document_file, get_safe_filename
+from app.utils.uploads import read_upload_capped
 
 
 class TestFileValidation:
@@ -57,3 +60,49 @@ class TestFileValidation:
         long_name = "a" * 200 + ".jpg"
         safe = get_safe_filename(long_name)
         assert len(safe) <= 100
+
+
+class TestReadUploadCapped:
+    @staticmethod
+    def _upload(data, size=None):
+        return UploadFile(file=io.BytesIO(data), filename="test.jpg", size=size)
+
+    @pytest.mark.asyncio
+    async def test_returns_single_buffer_view(self):
+        """Test la subida se lee por bloques en una memoryview"""
+        data = bytes(range(256)) * 1000
+        view = await read_upload_capped(self._upload(data), max_size=len(data), chunk_size=4096)
+
+        assert isinstance(view, memoryview)
+        assert view == data
+
+    @pytest.mark.asyncio
+    async def test_rejects_declared_size_without_reading(self):
+        """Test un tamaño declarado mayor que el límite da 413 sin leer nada"""
+        upload = self._upload(b"x" * 10, size=5000)
+        upload.read = AsyncMock()
+
+        with pytest.raises(HTTPException) as exc:
+            await read_upload_capped(upload, max_size=1000)
+
+        assert exc.value.status_code == 413
+        upload.read.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_aborts_once_limit_is_exceeded(self):
+        """Test se corta en cuanto el total leído supera el límite"""
+        upload = self._upload(b"x" * 100_000)
+        reads = []
+        original_read = upload.read
+
+        async def _read(size=-1):
+            reads.append(size)
+            return await original_read(size)
+
+        upload.read = _read
+
+        with pytest.raises(HTTPException) as exc:
+            await read_upload_capped(upload, max_size=10_000, chunk_size=4096)
+
+        assert exc.value.status_code == 413
+        assert len(reads) == 3
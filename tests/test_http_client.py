@@ -0,0 +1,37 @@
+"""
+Tests para los clientes HTTP compartidos
+"""
+import asyncio
+
+from app.services import http_client
+
+
+class TestSharedHttpClients:
+    def test_async_client_is_reused_within_a_loop(self):
+        """Test el mismo event loop reutiliza el mismo AsyncClient"""
+        async def _get_twice():
+            return http_client.get_async_http_client(), http_client.get_async_http_client()
+
+        first, second = asyncio.run(_get_twice())
+
+        assert first is second
+        asyncio.run(http_client.close_http_clients())
+
+    def test_new_loop_gets_a_new_client(self):
+        """Test otro event loop no reutiliza conexiones del anterior"""
+        async def _get():
+            return http_client.get_async_http_client()
+
+        first = asyncio.run(_get())
+        second = asyncio.run(_get())
+
+        assert first is not second
+        asyncio.run(http_client.close_http_clients())
+
+    def test_sync_client_is_shared_and_closed(self):
+        """Test el cliente síncrono se comparte y se cierra al apagar"""
+        client = http_client.get_http_client()
+
+        assert http_client.get_http_client() is client
+        asyncio.run(http_client.close_http_clients())
+        assert client.is_closed
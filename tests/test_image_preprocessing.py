@@ -0,0 +1,92 @@
+"""
+Pruebas unitarias para el preprocesado de imágenes del escaneo
+"""
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+from unittest.mock import MagicMock, patch
+
+from app.services.barcode_scanner import BarcodeScanner
+from app.services.book_scan_service import BookScanService, _scale_region
+from app.services.image_preprocessing import PreprocessedImage, preprocess_image
+
+
+def _encode(width, height, ext=".jpg"):
+    image = np.full((height, width, 3), 200, dtype=np.uint8)
+    ok, encoded = cv2.imencode(ext, image)
+    return encoded.tobytes()
+
+
+class TestPreprocessImage:
+    def test_downscales_to_max_edge(self):
+        """Test la imagen se reduce para que el lado mayor no supere max_edge"""
+        image = preprocess_image(_encode(3000, 1500), max_edge=1000)
+
+        assert image.size == (1000, 500)
+        assert image.original_size == (3000, 1500)
+        assert image.scale == 1000 / 3000
+
+    def test_exif_rotation_is_applied_to_original_size(self):
+        """Test con orientación EXIF 6 el tamaño original y la escala siguen la imagen girada"""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        out = io.BytesIO()
+        Image.new("RGB", (4000, 3000), (200, 200, 200)).save(out, format="JPEG", exif=exif)
+
+        image = preprocess_image(out.getvalue(), max_edge=1600)
+
+        assert image.size == (1200, 1600)
+        assert image.original_size == (3000, 4000)
+        assert image.scale == 0.4
+        region = _scale_region({"x": 1000, "y": 1500, "w": 200, "h": 100}, image.scale)
+        assert region["x"] + region["w"] <= 3000 and region["y"] + region["h"] <= 4000
+
+    def test_small_image_is_not_upscaled(self):
+        """Test una imagen pequeña se mantiene en su tamaño"""
+        image = preprocess_image(_encode(400, 300, ".png"), max_edge=1000)
+
+        assert image.size == (400, 300)
+
+    def test_variants_are_cached(self):
+        """Test gris y contraste se calculan una sola vez"""
+        image = preprocess_image(_encode(200, 100), max_edge=1000)
+
+        assert image.gray.ndim == 2
+        assert image.gray is image.gray
+        assert image.contrast.shape == image.gray.shape
+
+    def test_invalid_data_returns_none(self):
+        """Test datos que no son imagen devuelven None"""
+        assert preprocess_image(b"not an image") is None
+
+
+class TestSharedDecode:
+    def test_barcode_scanner_uses_gray_variant(self):
+        """Test BarcodeScanner no vuelve a decodificar una imagen preprocesada"""
+        image = preprocess_image(_encode(200, 100))
+        scanner = BarcodeScanner()
+
+        with patch('app.services.barcode_scanner.pyzbar.decode', return_value=[]) as mock_decode, \
+             patch('app.services.barcode_scanner.cv2.imdecode') as mock_imdecode:
+            scanner.scan_barcodes(image)
+
+        mock_imdecode.assert_not_called()
+        assert mock_decode.call_args_list[0][0][0] is image.gray
+
+    def test_scan_book_decodes_once(self):
+        """Test scan_book pasa la misma imagen preprocesada a barcode y OCR"""
+        barcode_scanner = MagicMock()
+        barcode_scanner.extract_isbn.return_value = None
+        ocr_service = MagicMock()
+        ocr_service.extract_book_title.return_value = None
+        service = BookScanService(
+            barcode_scanner=barcode_scanner, ocr_service=ocr_service, search_service=MagicMock()
+        )
+
+        service.scan_book(_encode(300, 200))
+
+        shared = barcode_scanner.extract_isbn.call_args[0][0]
+        assert isinstance(shared, PreprocessedImage)
+        assert ocr_service.analyze_image.call_args[0][0] is shared
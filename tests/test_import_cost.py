@@ -0,0 +1,29 @@
+"""
+Tests de coste de importación: la API no debe cargar torch/EasyOCR/OpenCV al arrancar
+"""
+from benchmarks.import_report import parse_importtime, run_report
+
+
+class TestImportCost:
+    def test_api_startup_does_not_load_scan_dependencies(self):
+        """Test importar app.main no carga las dependencias pesadas del escaneo"""
+        report = run_report("app.main")
+
+        assert report["heavy_loaded"] == []
+        assert report["total_ms"] > 0
+        assert any(row["module"] == "app.main" for row in report["app_modules"])
+
+    def test_parse_importtime(self):
+        """Test la salida de -X importtime se convierte en filas con anidamiento"""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   app.config\n"
+            "import time:       300 |        420 | app.main\n"
+        )
+
+        rows = parse_importtime(stderr)
+
+        assert rows == [
+            {"module": "app.config", "self_us": 120, "cumulative_us": 120, "depth": 1},
+            {"module": "app.main", "self_us": 300, "cumulative_us": 420, "depth": 0},
+        ]
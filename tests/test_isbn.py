@@ -0,0 +1,37 @@
+"""
+Tests para las utilidades de ISBN
+"""
+import pytest
+
+from app.utils.isbn import canonical_isbn, clean_isbn, is_valid_isbn, is_valid_isbn10, is_valid_isbn13, to_isbn13
+
+
+class TestISBN:
+    def test_clean_isbn(self):
+        assert clean_isbn(" 978-0-261-10221-7 ") == "9780261102217"
+        assert clean_isbn("0-8044-2957-x") == "080442957X"
+
+    @pytest.mark.parametrize("code", ["9780261102217", "9791032305690", "978-0-261-10221-7"])
+    def test_valid_isbn13(self, code):
+        assert is_valid_isbn13(code)
+
+    @pytest.mark.parametrize("code", ["9780261102218", "4006381333931", "978026110221", "97802611022a7"])
+    def test_invalid_isbn13(self, code):
+        assert not is_valid_isbn13(code)
+
+    def test_isbn10_checksum(self):
+        assert is_valid_isbn10("0261102214")
+        assert is_valid_isbn10("080442957X")
+        assert not is_valid_isbn10("0261102217")
+        assert not is_valid_isbn10("X261102214")
+
+    def test_to_isbn13(self):
+        assert to_isbn13("0261102214") == "9780261102217"
+        assert to_isbn13("9780261102217") == "9780261102217"
+        assert to_isbn13("1234567890") is None
+        assert not is_valid_isbn("")
+
+    def test_canonical_isbn(self):
+        assert canonical_isbn("0-261-10221-4") == "9780261102217"
+        assert canonical_isbn("978-0-261-10221-7") == "9780261102217"
+        assert canonical_isbn(" 12345 ") == "12345"
@@ -0,0 +1,128 @@
+"""
+Tests para el catálogo local: importación de volcados de OpenLibrary y búsquedas
+"""
+import asyncio
+import gzip
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.book_search_service import BookSearchService
+from app.services.local_catalog import LocalCatalog
+from app.tasks.catalog_import import CatalogImporter
+
+EDITION = {
+    "type": {"key": "/type/edition"},
+    "key": "/books/OL1M",
+    "title": "Dune",
+    "isbn_10": ["0441013597"],
+    "isbn_13": ["9780441013593"],
+    "authors": [{"key": "/authors/OL79034A"}],
+    "works": [{"key": "/works/OL893415W"}],
+    "publishers": ["Ace"],
+    "publish_date": "2005",
+    "number_of_pages": 528,
+    "languages": [{"key": "/languages/eng"}],
+    "covers": [-1, 12345],
+}
+WORK = {"type": {"key": "/type/work"}, "key": "/works/OL893415W", "description": {"value": "Arrakis."}}
+AUTHOR = {"type": {"key": "/type/author"}, "key": "/authors/OL79034A", "name": "Frank Herbert"}
+
+
+def _dump(path, records):
+    # Formato oficial: tipo, key, revisión, fecha y el registro JSON
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(f"{record['type']['key']}\t{record['key']}\t1\t2024-01-01\t{json.dumps(record)}\n")
+    return str(path)
+
+
+class TestCatalogImport:
+    def test_import_and_lookup(self, tmp_path):
+        """Test ediciones, obras y autores se combinan en el formato de búsqueda"""
+        importer = CatalogImporter(chunk_size=2)
+        importer.run(_dump(tmp_path / "editions.txt.gz", [EDITION, {"type": {"key": "/type/edition"}, "key": "/books/OL2M"}]))
+        importer.run(_dump(tmp_path / "works.txt.gz", [WORK]))
+        stats = importer.run(_dump(tmp_path / "authors.txt.gz", [AUTHOR]))
+        assert stats.authors == 1
+
+        # ISBN-10 e ISBN-13 de la misma edición llevan al mismo registro
+        found = LocalCatalog(enabled=True).lookup_many(["0441013597", "9780441013593", "9780000000002"])
+
+        assert set(found) == {"0441013597", "9780441013593"}
+        result = found["0441013597"][0]
+        assert result["title"] == "Dune"
+        assert result["authors"] == ["Frank Herbert"]
+        assert result["isbn"] == "9780441013593"
+        assert result["description"] == "Arrakis."
+        assert result["cover_url"] == "https://covers.openlibrary.org/b/id/12345-L.jpg"
+        assert (result["page_count"], result["language"]) == (528, "eng")
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        """Test al relanzar la importación se saltan las líneas ya escritas"""
+        editions = [dict(EDITION, key=f"/books/OL{i}M", isbn_13=[isbn], isbn_10=[]) for i, isbn in
+                    enumerate(["9780441013593", "9780593098233", "9780441172719"])]
+        path = _dump(tmp_path / "editions.txt.gz", editions)
+        checkpoint = tmp_path / "editions.checkpoint"
+        importer = CatalogImporter(chunk_size=1)
+        first = importer.run(path, str(checkpoint))
+        assert first.editions == 3
+
+        state = json.loads(checkpoint.read_text())
+        assert state["completed"] is True
+        checkpoint.write_text(json.dumps(dict(state, lines=2, completed=False)))
+
+        resumed = importer.run(path, str(checkpoint))
+
+        assert (resumed.skipped_lines, resumed.editions) == (2, 1)
+        assert importer.run(path, str(checkpoint)).lines == 0
+
+    def test_jsonl_without_type(self, tmp_path):
+        """Test también acepta JSONL, deduciendo el tipo por la key"""
+        path = tmp_path / "editions.jsonl"
+        record = {k: v for k, v in EDITION.items() if k != "type"}
+        path.write_text(json.dumps(record) + "\nno es json\n", encoding="utf-8")
+
+        stats = CatalogImporter().run(str(path))
+
+        assert (stats.editions, stats.invalid) == (1, 1)
+        assert LocalCatalog(enabled=True).lookup("9780441013593")[0]["title"] == "Dune"
+
+
+class TestSearchUsesCatalog:
+    def _service(self, catalog_results):
+        catalog = MagicMock()
+        catalog.lookup.return_value = catalog_results
+        catalog.lookup_many.side_effect = lambda isbns: {i: catalog_results for i in isbns} if catalog_results else {}
+        cache = MagicMock()
+        cache.get_json.return_value = None
+        return BookSearchService(openlibrary=MagicMock(), googlebooks=MagicMock(), cache=cache, catalog=catalog)
+
+    def test_catalog_hit_skips_providers(self):
+        """Test un ISBN del catálogo local no llama a los proveedores y se guarda en caché"""
+        service = self._service([{"title": "Dune", "isbn": "9780441013593", "source": "openlibrary"}])
+
+        results = service.search(isbn="9780441013593")
+
+        assert results[0]["title"] == "Dune"
+        service.openlibrary.search_by_isbn.assert_not_called()
+        service.googlebooks.search_by_isbn.assert_not_called()
+        service.cache.set_json.assert_called_once()
+
+    def test_titles_do_not_use_catalog(self):
+        """Test las búsquedas por título siguen yendo a los proveedores"""
+        service = self._service([])
+        service.openlibrary.search_by_title.return_value = [{"title": "Dune"}]
+
+        assert service.search(title="dune")[0]["title"] == "Dune"
+        service.catalog.lookup.assert_not_called()
+
+    def test_batch_resolves_catalog_hits_locally(self):
+        """Test la búsqueda por lotes solo pide a los proveedores lo que no está en el catálogo"""
+        service = self._service([{"title": "Dune", "isbn": "9780441013593"}])
+        service.openlibrary.asearch_by_isbns = AsyncMock()
+        service.cache.get_many_json.return_value = {}
+
+        found = asyncio.run(service.asearch_isbns(["9780441013593"]))
+
+        assert found["9780441013593"][0]["title"] == "Dune"
+        service.openlibrary.asearch_by_isbns.assert_not_called()
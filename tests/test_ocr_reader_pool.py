@@ -0,0 +1,81 @@
+"""
+Pruebas unitarias para OCRReaderPool
+"""
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.ocr_reader_pool import OCRReaderPool, OCRReaderPoolExhausted
+from app.services.ocr_service import OCRService
+
+
+class TestOCRReaderPool:
+    def test_warmup_creates_all_readers_once(self):
+        """Test warmup crea exactamente `size` lectores"""
+        factory = MagicMock(side_effect=lambda langs: object())
+        pool = OCRReaderPool(size=3, reader_factory=factory)
+
+        assert pool.warmup() == 3
+        assert pool.warmup() == 3
+        assert factory.call_count == 3
+        assert pool.stats()["idle"] == 3
+
+    def test_checkout_reuses_reader(self):
+        """Test checkout devuelve el lector al pool y lo reutiliza"""
+        factory = MagicMock(side_effect=lambda langs: object())
+        pool = OCRReaderPool(size=2, reader_factory=factory)
+
+        with pool.checkout() as first:
+            pass
+        with pool.checkout() as second:
+            pass
+
+        assert first is second
+        assert factory.call_count == 1
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Test checkout lanza OCRReaderPoolExhausted si no hay lectores libres"""
+        pool = OCRReaderPool(size=1, reader_factory=lambda langs: object())
+
+        with pool.checkout():
+            with pytest.raises(OCRReaderPoolExhausted):
+                with pool.checkout(timeout=0.01):
+                    pass
+
+    def test_checkout_waits_for_release(self):
+        """Test un checkout bloqueado recibe el lector liberado por otro hilo"""
+        pool = OCRReaderPool(size=1, reader_factory=lambda langs: object())
+        reader = pool.acquire()
+        got = []
+
+        worker = threading.Thread(target=lambda: got.append(pool.acquire(timeout=2)))
+        worker.start()
+        pool.release(reader)
+        worker.join(timeout=2)
+
+        assert got == [reader]
+
+    def test_failed_factory_frees_slot(self):
+        """Test un fallo al crear el lector no consume hueco del pool"""
+        factory = MagicMock(side_effect=[RuntimeError("no weights"), object()])
+        pool = OCRReaderPool(size=1, reader_factory=factory)
+
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+        assert pool.created == 0
+        assert pool.acquire() is not None
+
+    def test_ocr_service_uses_pool(self):
+        """Test OCRService toma el lector del pool inyectado"""
+        reader = MagicMock()
+        reader.readtext.return_value = [((0, 0, 1, 1), "Hola", 0.9)]
+        pool = OCRReaderPool(size=1, reader_factory=lambda langs: reader)
+        service = OCRService(reader_pool=pool)
+
+        import cv2
+        import numpy as np
+        ok, encoded = cv2.imencode(".png", np.zeros((20, 20, 3), dtype=np.uint8))
+
+        assert service.extract_text_from_image(encoded.tobytes()) == "Hola"
+        assert pool.stats()["idle"] == 1
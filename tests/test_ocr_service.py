@@ -3,13 +3,13 @@ Pruebas unitarias para OCRService
 """
 import pytest
 from unittest.mock import MagicMock, patch
-from app.services.ocr_service import OCRService
+from app.services.ocr_service import OCRResult, OCRService
 
 
 class TestOCRService:
     def test_extract_text_from_image_valid(self):
         """Test extract_text_from_image with valid image"""
-        service = OCRService()
+        service = OCRService(reader=MagicMock())
 
         # Mock the entire OCR process
         with patch.object(service.reader, 'readtext', return_value=[((0, 0, 10, 10), "Hello World", 0.9)]), \
@@ -81,3 +81,79 @@ class TestOCRService:
             # Should find first match
             result = service.extract_author(b'data')
             assert result == "John Doe"  # 'by' comes first
+
+
+def _box(text, top, height, left=0, confidence=0.9):
+    bbox = [[left, top], [left + 100, top], [left + 100, top + height], [left, top + height]]
+    return (bbox, text, confidence)
+
+
+class TestOCRResult:
+    def test_analyze_image_runs_readtext_once(self):
+        """Test título y autor reutilizan una única pasada de OCR"""
+        reader = MagicMock()
+        reader.readtext.return_value = [
+            _box("EL NOMBRE", 10, 60),
+            _box("DEL VIENTO", 80, 60),
+            _box("Patrick Rothfuss", 300, 25),
+        ]
+        service = OCRService(reader=reader)
+
+        with patch('app.services.ocr_service.cv2.imdecode', return_value=MagicMock()), \
+             patch('app.services.ocr_service.np.frombuffer'):
+            result = service.analyze_image(b'img')
+
+        assert service.extract_book_title(result) == "EL NOMBRE DEL VIENTO"
+        assert service.extract_author(result) == "Patrick Rothfuss"
+        reader.readtext.assert_called_once()
+
+    def test_lines_group_boxes_left_to_right(self):
+        """Test las cajas a la misma altura forman una línea ordenada"""
+        result = OCRResult.from_readtext([
+            _box("World", 10, 20, left=200),
+            _box("Hello", 12, 20, left=0),
+            _box("Below", 100, 20),
+        ])
+
+        assert [line.text for line in result.lines()] == ["Hello World", "Below"]
+
+    def test_low_confidence_boxes_are_ignored(self):
+        """Test los fragmentos con baja confianza no forman parte del texto"""
+        result = OCRResult.from_readtext([
+            _box("Legible", 0, 20, confidence=0.9),
+            _box("ruido", 40, 20, confidence=0.2),
+        ])
+
+        assert result.text == "Legible"
+        assert result.confidence == pytest.approx(0.9)
+
+    def test_author_keyword_takes_precedence(self):
+        """Test el patrón 'por' gana a la heurística de tamaño"""
+        service = OCRService(reader=MagicMock())
+        result = OCRResult.from_readtext([
+            _box("Cien años de soledad", 0, 50),
+            _box("Novela Ejemplar", 100, 30),
+            _box("por Gabriel García Márquez", 200, 20),
+        ])
+
+        assert service.extract_author(result) == "Gabriel García Márquez"
+        assert service.extract_book_title(result) == "Cien años de soledad"
+
+
+class TestSpineRegions:
+    def test_vertical_boxes_group_by_column(self):
+        """Test los lomos verticales se agrupan por columna y las filas horizontales por línea"""
+        def vertical(text, left, top):
+            return ([[left, top], [left + 30, top], [left + 30, top + 150], [left, top + 150]], text, 0.9)
+
+        result = OCRResult.from_readtext([
+            vertical("Autor Uno", 105, 200),
+            vertical("Primer Libro", 100, 0),
+            vertical("Segundo Libro", 400, 0),
+            _box("Libro Tumbado", 500, 20),
+        ])
+
+        regions = result.spine_regions()
+
+        assert [r.text for r in regions] == ["Primer Libro Autor Uno", "Segundo Libro", "Libro Tumbado"]
+        assert regions[0].region == {"x": 100, "y": 0, "width": 35, "height": 350}
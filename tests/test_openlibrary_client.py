@@ -0,0 +1,194 @@
+"""
+Pruebas unitarias para OpenLibraryClient
+"""
+import asyncio
+
+import httpx
+
+from app.services.openlibrary_client import OpenLibraryClient
+
+SEARCH_DOCS = {
+    "docs": [
+        {"title": "Dune", "author_name": ["Frank Herbert"], "isbn": ["9780441013593", "0441013597"]},
+        {"title": "Dune Messiah", "author_name": ["Frank Herbert"], "isbn": ["9780593098233"]},
+        {"title": "Sin ISBN", "author_name": ["Anónimo"]},
+    ]
+}
+
+EDITIONS = {
+    "ISBN:9780441013593": {
+        "bib_key": "ISBN:9780441013593",
+        "details": {
+            "title": "Dune",
+            "authors": [{"key": "/authors/OL79034A", "name": "Frank Herbert"}],
+            "publishers": ["Ace"],
+            "isbn_13": ["9780441013593"],
+            "number_of_pages": 528,
+        },
+    },
+}
+
+
+class _DictCache:
+    """Caché en memoria con la interfaz de RedisCache."""
+
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+
+    def get_many_json(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_json(self, key, value, ttl_seconds=None):
+        self.data[key] = value
+
+
+def _client(**kwargs):
+    kwargs.setdefault("author_cache", _DictCache())
+    return OpenLibraryClient(base_url="https://ol.test", **kwargs)
+
+
+def _handler(requests):
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/search.json":
+            return httpx.Response(200, json=SEARCH_DOCS)
+        if request.url.path == "/api/books":
+            return httpx.Response(200, json=EDITIONS)
+        return httpx.Response(404)
+    return handler
+
+
+class TestTitleSearchEnrichment:
+    def test_editions_fetched_in_one_request(self):
+        """Test las ediciones de toda la página se piden en una sola llamada"""
+        requests = []
+        with httpx.Client(transport=httpx.MockTransport(_handler(requests))) as http:
+            results = _client(http_client=http).search_by_title("dune")
+
+        assert [r.url.path for r in requests] == ["/search.json", "/api/books"]
+        assert requests[1].url.params["bibkeys"] == "ISBN:9780441013593,ISBN:0441013597,ISBN:9780593098233"
+        assert requests[1].url.params["jscmd"] == "details"
+        assert results[0]["publisher"] == "Ace"
+        assert results[0]["authors"] == ["Frank Herbert"]
+        # Sin edición disponible se usan los datos de la búsqueda
+        assert results[1]["title"] == "Dune Messiah"
+        assert results[2]["authors"] == ["Anónimo"]
+
+    def test_async_search_matches_sync(self):
+        """Test asearch_by_title hace las mismas dos peticiones"""
+        requests = []
+
+        async def _run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(_handler(requests))) as http:
+                client = _client(async_http_client=http)
+                return await client.asearch_by_title("dune")
+
+        results = asyncio.run(_run())
+
+        assert [r.url.path for r in requests] == ["/search.json", "/api/books"]
+        assert results[0]["publisher"] == "Ace"
+
+    def test_editions_failure_falls_back_to_search_docs(self):
+        """Test si falla la petición de ediciones se devuelven los datos básicos"""
+        def handler(request):
+            if request.url.path == "/search.json":
+                return httpx.Response(200, json=SEARCH_DOCS)
+            return httpx.Response(503)
+
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            results = _client(http_client=http).search_by_title("dune")
+
+        assert [r["title"] for r in results] == ["Dune", "Dune Messiah", "Sin ISBN"]
+        assert results[0]["source"] == "openlibrary"
+
+
+EDITION_WITH_KEYS = {
+    "title": "Good Omens",
+    "authors": [{"key": "/authors/OL1A"}, {"key": "/authors/OL2A"}, {"key": "/authors/OL1A"}],
+    "isbn_13": ["9780060853983"],
+}
+
+
+class TestAuthorResolution:
+    def test_author_keys_resolved_once_and_cached(self):
+        """Test las keys de autor se resuelven a nombres, sin repetir, y se guardan en caché"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            if request.url.path.startswith("/isbn/"):
+                return httpx.Response(200, json=EDITION_WITH_KEYS)
+            names = {"/authors/OL1A.json": "Terry Pratchett", "/authors/OL2A.json": "Neil Gaiman"}
+            return httpx.Response(200, json={"name": names[request.url.path]})
+
+        cache = _DictCache()
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            results = _client(http_client=http, author_cache=cache).search_by_isbn("9780060853983")
+
+        assert results[0]["authors"] == ["Terry Pratchett", "Neil Gaiman", "Terry Pratchett"]
+        assert sorted(requests[1:]) == ["/authors/OL1A.json", "/authors/OL2A.json"]
+        assert cache.data["openlibrary:author:v1:OL2A"] == "Neil Gaiman"
+
+    def test_cached_authors_skip_requests(self):
+        """Test con los autores en caché no se consulta /authors"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            return httpx.Response(200, json=EDITION_WITH_KEYS)
+
+        cache = _DictCache({"openlibrary:author:v1:OL1A": "Terry Pratchett", "openlibrary:author:v1:OL2A": "Neil Gaiman"})
+
+        async def _run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                return await _client(async_http_client=http, author_cache=cache).asearch_by_isbn("9780060853983")
+
+        results = asyncio.run(_run())
+
+        assert requests == ["/isbn/9780060853983.json"]
+        assert results[0]["authors"][:2] == ["Terry Pratchett", "Neil Gaiman"]
+
+    def test_unresolved_authors_are_left_out(self):
+        """Test una key que no se puede resolver no se convierte en un nombre inventado"""
+        def handler(request):
+            if request.url.path.startswith("/isbn/"):
+                return httpx.Response(200, json=EDITION_WITH_KEYS)
+            return httpx.Response(500)
+
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            results = _client(http_client=http).search_by_isbn("9780060853983")
+
+        assert results[0]["authors"] == []
+
+
+class TestIsbnBatch:
+    def test_many_isbns_use_chunked_bibkeys_requests(self, monkeypatch):
+        """Test asearch_by_isbns agrupa los ISBN en peticiones /api/books"""
+        monkeypatch.setattr("app.services.openlibrary_client.settings.OPENLIBRARY_BIBKEYS_BATCH_SIZE", 2)
+        requests = []
+
+        async def _run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(_handler(requests))) as http:
+                return await _client(async_http_client=http).asearch_by_isbns(
+                    ["9780441013593", "9780593098233", "9780000000002"]
+                )
+
+        found = asyncio.run(_run())
+
+        assert [r.url.params["bibkeys"] for r in requests] == [
+            "ISBN:9780441013593,ISBN:9780593098233",
+            "ISBN:9780000000002",
+        ]
+        assert found["9780441013593"][0]["publisher"] == "Ace"
+        assert found["9780593098233"] == []
+        assert found["9780000000002"] == []
+
+    def test_failed_chunk_is_left_out(self):
+        """Test los ISBN de un bloque que falla no se dan por inexistentes"""
+        async def _run():
+            transport = httpx.MockTransport(lambda request: httpx.Response(503))
+            async with httpx.AsyncClient(transport=transport) as http:
+                return await _client(async_http_client=http).asearch_by_isbns(["9780441013593"])
+
+        assert asyncio.run(_run()) == {}
+
@@ -27,7 +27,7 @@ class TestBarcodeScanner:
         """Test validación de ISBN."""
         scanner = BarcodeScanner()
         assert scanner.is_isbn("9780261102217") is True
-        assert scanner.is_isbn("0261102217") is True
+        assert scanner.is_isbn("0261102214") is True
         assert scanner.is_isbn("123") is False
         assert scanner.is_isbn("abc123") is False
 
@@ -115,6 +115,7 @@ class TestBookScanService:
         
         # Configurar el mock de OCR para devolver un título y autor
         mock_ocr = Mock()
+        mock_ocr.analyze_image.return_value = ocr_result = Mock()
         mock_ocr.extract_book_title.return_value = "Sample Book Title"
         mock_ocr.extract_author.return_value = "Sample Author"
         
@@ -143,8 +144,10 @@ class TestBookScanService:
         
         # Verificar llamadas a los mocks
         mock_barcode_scanner.extract_isbn.assert_called_once_with(b"fake_image")
-        mock_ocr.extract_book_title.assert_called_once_with(b"fake_image")
-        mock_ocr.extract_author.assert_called_once_with(b"fake_image")
+        # Una única pasada de OCR compartida por título y autor
+        mock_ocr.analyze_image.assert_called_once_with(b"fake_image")
+        mock_ocr.extract_book_title.assert_called_once_with(ocr_result)
+        mock_ocr.extract_author.assert_called_once_with(ocr_result)
         mock_search.search.assert_called_once_with(title="Sample Book Title", limit=5)
 
     @patch('app.services.book_scan_service.BookSearchService')
@@ -186,8 +189,61 @@ class TestBookScanService:
         mock_barcode_scanner.extract_isbn.assert_called_once_with(b"fake_image")
         
         # Verificar que los métodos de OCR NO se llamaron (ya que el código de barras tuvo éxito)
+        mock_ocr.analyze_image.assert_not_called()
         mock_ocr.extract_book_title.assert_not_called()
         mock_ocr.extract_author.assert_not_called()
         
         # Verificar que se llamó a la búsqueda con el ISBN
         mock_search.search.assert_called_once_with(isbn="9780261102217", limit=5)
+
+
+class TestShelfScan:
+    def _image(self):
+        import cv2
+        import numpy as np
+        ok, encoded = cv2.imencode(".png", np.full((400, 600, 3), 255, dtype=np.uint8))
+        return encoded.tobytes()
+
+    def test_scan_shelf_returns_one_candidate_per_book(self):
+        """Test cada código y cada lomo generan un candidato con una sola búsqueda por lotes."""
+        from app.services.ocr_service import OCRResult
+
+        barcode_scanner = Mock()
+        barcode_scanner.extract_isbns.return_value = [
+            {"isbn": "9780261102217", "rect": {"x": 10, "y": 10, "width": 50, "height": 20}},
+        ]
+        spine = lambda text, left: ([[left, 0], [left + 30, 0], [left + 30, 200], [left, 200]], text, 0.9)
+        ocr = OCRService(reader=Mock())
+        ocr.analyze_image = Mock(return_value=OCRResult.from_readtext([
+            spine("Dune", 100),
+            spine("Frank Herbert", 105),
+            spine("Rayuela", 300),
+        ]))
+        search = Mock()
+        search.search_many.return_value = [
+            [{"title": "The Hobbit", "authors": ["J.R.R. Tolkien"]}],
+            [{"title": "Dune"}],
+            [],
+        ]
+
+        service = BookScanService(barcode_scanner=barcode_scanner, ocr_service=ocr, search_service=search)
+        result = service.scan_shelf(self._image())
+
+        assert result["success"] is True
+        assert result["count"] == 3
+        assert [c["method"] for c in result["candidates"]] == ["barcode", "ocr", "ocr"]
+        assert result["candidates"][0]["title"] == "The Hobbit"
+        assert result["candidates"][1]["title"] == "Dune Frank Herbert"
+        search.search_many.assert_called_once_with(
+            [{"isbn": "9780261102217"}, {"title": "Dune Frank Herbert"}, {"title": "Rayuela"}],
+            limit=3,
+        )
+
+    def test_scan_shelf_invalid_image(self):
+        """Test una imagen no decodificable devuelve error sin candidatos."""
+        service = BookScanService(barcode_scanner=Mock(), ocr_service=Mock(), search_service=Mock())
+        result = service.scan_shelf(b"not an image")
+
+        assert result["success"] is False
+        assert result["candidates"] == []
+        assert result["error"]
@@ -0,0 +1,107 @@
+"""
+Tests para el escaneo por lotes (/scan/batch)
+"""
+import asyncio
+import io
+import json
+
+from unittest.mock import MagicMock, patch
+
+from app.main import app
+from app.services.auth_service import get_current_user
+from app.services.scan_batch_service import stream_scan_batch
+from app.services.scan_executor import ScanQueueFullError
+
+
+class _User:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.username = f"user-{user_id}"
+
+
+def _executor(run, workers=4):
+    executor = MagicMock()
+    executor.max_workers = workers
+    executor.run.side_effect = run
+    return executor
+
+
+async def _collect(generator):
+    return [json.loads(line) async for line in generator]
+
+
+class TestStreamScanBatch:
+    def test_results_stream_in_completion_order(self):
+        """Test cada línea sale al terminar su imagen, etiquetada con su índice"""
+        async def _run(method, data):
+            await asyncio.sleep({b"slow": 0.05, b"fast": 0.0}[data])
+            return {"success": True, "data": data.decode()}
+
+        items = [(0, "a.jpg", b"slow", None), (1, "b.jpg", b"fast", None)]
+        lines = asyncio.run(_collect(stream_scan_batch(items, "scan_book", executor=_executor(_run))))
+
+        assert [line["index"] for line in lines] == [1, 0]
+        assert lines[1]["result"]["data"] == "slow"
+
+    def test_invalid_items_and_failures_become_error_lines(self):
+        """Test un archivo inválido o un escaneo fallido no cortan el lote"""
+        async def _run(method, data):
+            raise RuntimeError("boom")
+
+        items = [(0, "a.txt", None, {"msg": "no es imagen", "type": "validation_error"}), (1, "b.jpg", b"x", None)]
+        lines = asyncio.run(_collect(stream_scan_batch(items, "scan_book", executor=_executor(_run))))
+
+        assert {line["index"]: line["error"]["type"] for line in lines} == {0: "validation_error", 1: "server_error"}
+
+    def test_waits_when_scan_queue_is_full(self):
+        """Test con la cola llena se reintenta en lugar de fallar"""
+        attempts = []
+
+        async def _run(method, data):
+            attempts.append(data)
+            if len(attempts) == 1:
+                raise ScanQueueFullError(retry_after=0)
+            return {"success": True}
+
+        lines = asyncio.run(_collect(stream_scan_batch([(0, "a.jpg", b"x", None)], "scan_book", executor=_executor(_run))))
+
+        assert len(attempts) == 2
+        assert lines[0]["result"] == {"success": True}
+
+
+class TestScanBatchEndpoint:
+    def test_batch_streams_ndjson(self, client):
+        """Test POST /scan/batch devuelve una línea NDJSON por imagen"""
+        async def _run(method, data):
+            return {"success": True, "method": method}
+
+        app.dependency_overrides[get_current_user] = lambda: _User("owner")
+        try:
+            with patch("app.services.scan_batch_service.get_scan_executor", return_value=_executor(_run)):
+                files = [
+                    ("files", ("a.jpg", io.BytesIO(b"img-a"), "image/jpeg")),
+                    ("files", ("b.txt", io.BytesIO(b"text"), "text/plain")),
+                    ("files", ("c.jpg", io.BytesIO(b"img-c"), "image/jpeg")),
+                ]
+                response = client.post("/scan/batch", files=files)
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = {line["index"]: line for line in map(json.loads, response.text.strip().splitlines())}
+        assert sorted(lines) == [0, 1, 2]
+        assert lines[0]["result"]["method"] == "scan_book"
+        assert lines[1]["error"]["type"] == "validation_error"
+
+    def test_batch_rejects_too_many_files(self, client):
+        """Test más imágenes que SCAN_BATCH_MAX_FILES devuelve 400"""
+        app.dependency_overrides[get_current_user] = lambda: _User("owner")
+        try:
+            with patch("app.api.scan.settings.SCAN_BATCH_MAX_FILES", 1):
+                files = [("files", (f"{i}.jpg", io.BytesIO(b"img"), "image/jpeg")) for i in range(2)]
+                response = client.post("/scan/batch", files=files)
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 400
@@ -0,0 +1,27 @@
+"""
+Tests de humo para el benchmark offline del escaneo
+"""
+from benchmarks.scan_benchmark import compare_reports, run_stage
+from benchmarks.synthetic import generate_samples
+
+
+class TestScanBenchmark:
+    def test_barcode_stage_reports_latency_and_accuracy(self):
+        """Test la etapa de códigos lee los ISBN generados e informa de percentiles"""
+        samples = list(generate_samples(4, seed=1, kinds=("barcode",), sizes=((600, 800),), angles=(0, 8)))
+
+        report = run_stage("barcode", samples, warmup=0)
+
+        assert report["samples"] == 4
+        assert report["accuracy"] == 1.0
+        assert 0 < report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+        assert report["throughput_per_core"] > 0
+
+    def test_compare_reports_flags_regressions(self):
+        """Test una p95 peor que la tolerancia se marca como regresión"""
+        row = {"p95_ms": 100.0, "throughput_per_core": 10.0, "peak_rss_mb": 200.0, "accuracy": 1.0}
+        baseline = {"stages": {"barcode": row}}
+        current = {"stages": {"barcode": {**row, "p95_ms": 130.0}}}
+
+        assert compare_reports(current, baseline, tolerance=0.15) == ["barcode: p95 100.0ms -> 130.0ms"]
+        assert compare_reports(baseline, baseline, tolerance=0.15) == []
@@ -0,0 +1,104 @@
+"""
+Pruebas para ScanExecutor (pool de escaneo con cola acotada)
+"""
+import asyncio
+import io
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from app.services import scan_executor
+from app.services.scan_executor import ScanExecutor, ScanQueueFullError
+
+
+class _BlockingScanService:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def scan_book(self, image_data):
+        self.calls.append(bytes(image_data))
+        self.release.wait(timeout=5)
+        return {"success": True, "size": len(image_data)}
+
+
+class TestScanExecutor:
+    def test_run_inline_returns_service_result(self):
+        """Test en modo hilo el resultado del servicio llega al caller"""
+        service = _BlockingScanService()
+        service.release.set()
+        executor = ScanExecutor(max_workers=0, max_pending=0)
+
+        with patch.object(scan_executor, "_worker_scan_service", service):
+            result = asyncio.run(executor.run("scan_book", b"abc"))
+
+        executor.shutdown()
+        assert result == {"success": True, "size": 3}
+        assert executor.stats()["completed"] == 1
+
+    def test_queue_full_rejects_immediately(self):
+        """Test cuando la cola está llena se lanza ScanQueueFullError"""
+        service = _BlockingScanService()
+        executor = ScanExecutor(max_workers=0, max_pending=1, min_retry_after=7)
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run("scan_book", b"1"))
+            second = asyncio.ensure_future(executor.run("scan_book", b"2"))
+            await asyncio.sleep(0.05)
+            with pytest.raises(ScanQueueFullError) as exc_info:
+                await executor.run("scan_book", b"3")
+            service.release.set()
+            await asyncio.gather(first, second)
+            return exc_info.value
+
+        with patch.object(scan_executor, "_worker_scan_service", service):
+            error = asyncio.run(scenario())
+
+        executor.shutdown()
+        assert error.retry_after == 7
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["in_flight"] == 0
+
+    def test_unknown_method_is_rejected(self):
+        """Test solo se despachan métodos conocidos de BookScanService"""
+        executor = ScanExecutor(max_workers=0)
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run("__init__", b"x"))
+
+    def test_process_pool_reads_image_from_shared_memory(self):
+        """Test en modo proceso la imagen llega al worker por memoria compartida"""
+        executor = ScanExecutor(max_workers=1, max_pending=0)
+        try:
+            result = asyncio.run(executor.run("scan_book", b"not an image"))
+        finally:
+            executor.shutdown()
+
+        assert result["success"] is False
+        assert result["error"]
+
+
+class TestScanEndpointBackpressure:
+    def test_scan_returns_503_with_retry_after(self, client):
+        """Test el endpoint responde 503 + Retry-After si la cola está llena"""
+        from app.main import app
+        from app.services.auth_service import get_current_user
+
+        class _User:
+            id = "u1"
+            username = "tester"
+
+        async def _full(*_args, **_kwargs):
+            raise ScanQueueFullError(retry_after=12)
+
+        app.dependency_overrides[get_current_user] = lambda: _User()
+        try:
+            with patch.object(ScanExecutor, "run", _full):
+                files = {"file": ("cover.jpg", io.BytesIO(b"fake_image_data"), "image/jpeg")}
+                response = client.post("/scan/book", files=files)
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "12"
@@ -0,0 +1,106 @@
+"""
+Tests para la API de trabajos de escaneo asíncronos (/scan/jobs)
+"""
+import asyncio
+import io
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.main import app
+from app.services.auth_service import get_current_user
+from app.services.scan_executor import ScanExecutor, ScanQueueFullError
+from app.services.scan_job_service import (
+    JOB_COMPLETED, JOB_FAILED, ScanJobService, ScanJobStore,
+)
+
+
+class _User:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.username = f"user-{user_id}"
+
+
+@pytest.fixture
+def offline_store():
+    """Store de trabajos sin Redis (solo copia local)"""
+    cache = MagicMock()
+    cache.get_json.return_value = None
+    return ScanJobStore(cache=cache, ttl_seconds=60)
+
+
+class TestScanJobService:
+    def test_run_job_stores_result(self, offline_store):
+        """Test el resultado del escaneo queda guardado en el trabajo"""
+        executor = MagicMock()
+
+        async def _run(method, data):
+            return {"success": True, "method": "barcode"}
+
+        executor.run.side_effect = _run
+        service = ScanJobService(store=offline_store, executor=executor)
+        job = service.create_job(method="scan_book", user_id="u1")
+
+        asyncio.run(service.run_job(job, b"img"))
+
+        stored = service.get_job(job["id"], user_id="u1")
+        assert stored["status"] == JOB_COMPLETED
+        assert stored["result"] == {"success": True, "method": "barcode"}
+
+    def test_job_is_private_to_its_owner(self, offline_store):
+        """Test otro usuario no puede consultar el trabajo"""
+        service = ScanJobService(store=offline_store, executor=MagicMock())
+        job = service.create_job(method="scan_book", user_id="u1")
+
+        assert service.get_job(job["id"], user_id="u2") is None
+
+    def test_run_job_fails_after_queue_timeout(self, offline_store):
+        """Test si la cola sigue llena hasta el límite el trabajo falla"""
+        executor = MagicMock()
+
+        async def _full(method, data):
+            raise ScanQueueFullError(retry_after=10_000)
+
+        executor.run.side_effect = _full
+        service = ScanJobService(store=offline_store, executor=executor)
+        job = service.create_job(method="scan_book", user_id="u1")
+
+        result = asyncio.run(service.run_job(job, b"img"))
+
+        assert result["status"] == JOB_FAILED
+        assert result["error"]
+
+
+class TestScanJobEndpoints:
+    def test_create_and_poll_job(self, client):
+        """Test POST /scan/jobs devuelve 202 y el GET posterior trae el resultado"""
+        async def _run(self, method, image_data):
+            return {"success": True, "isbn": "9780261102217", "method": "barcode"}
+
+        app.dependency_overrides[get_current_user] = lambda: _User("owner")
+        try:
+            with patch.object(ScanExecutor, "run", _run):
+                files = {"file": ("cover.jpg", io.BytesIO(b"fake_image_data"), "image/jpeg")}
+                created = client.post("/scan/jobs", files=files)
+                assert created.status_code == 202
+                body = created.json()
+                assert body["status"] == "queued"
+                assert created.headers["Location"] == body["status_url"]
+
+                polled = client.get(body["status_url"])
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert polled.status_code == 200
+        assert polled.json()["status"] == "completed"
+        assert polled.json()["result"]["isbn"] == "9780261102217"
+
+    def test_unknown_job_returns_404(self, client):
+        """Test un id desconocido devuelve 404"""
+        app.dependency_overrides[get_current_user] = lambda: _User("owner")
+        try:
+            response = client.get("/scan/jobs/does-not-exist")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 404
@@ -0,0 +1,119 @@
+"""
+Tests para la caché de escaneos por hash perceptual
+"""
+import json
+
+import cv2
+import numpy as np
+from unittest.mock import MagicMock
+
+from app.services.book_scan_service import BookScanService
+from app.services.image_preprocessing import preprocess_image
+from app.services.scan_result_cache import ScanResultCache, compute_dhash, hamming_distance
+
+
+def _cache(redis, **kwargs):
+    cache = MagicMock()
+    fake = redis()
+    cache.client = fake
+    cache.get_json.side_effect = lambda key: json.loads(fake.get(key)) if fake.get(key) else None
+    cache.set_json.side_effect = lambda key, value, ttl_seconds=None: fake.setex(key, ttl_seconds, json.dumps(value))
+    return ScanResultCache(cache=cache, ttl_seconds=60, **kwargs)
+
+
+def _cover(seed=0, noise=0):
+    rng = np.random.default_rng(seed)
+    image = (rng.random((120, 80, 3)) * 255).astype(np.uint8)
+    image = cv2.resize(image, (400, 600), interpolation=cv2.INTER_CUBIC)
+    if noise:
+        jitter = np.random.default_rng(seed + 1000).integers(-noise, noise, image.shape)
+        image = np.clip(image.astype(int) + jitter, 0, 255).astype(np.uint8)
+    ok, buf = cv2.imencode(".jpg", image)
+    return buf.tobytes()
+
+
+class TestPerceptualHash:
+    def test_near_duplicate_photos_are_close(self):
+        """Test la misma portada con ruido queda a poca distancia"""
+        a = compute_dhash(preprocess_image(_cover()).gray)
+        b = compute_dhash(preprocess_image(_cover(noise=8)).gray)
+        c = compute_dhash(preprocess_image(_cover(seed=1)).gray)
+
+        assert hamming_distance(a, b) <= 12
+        assert hamming_distance(a, c) > 40
+
+
+class TestScanResultCache:
+    def test_exact_and_near_hits(self, fake_redis):
+        """Test se encuentra el resultado por hash exacto y por vecino cercano"""
+        cache = _cache(fake_redis, max_distance=12)
+        stored = {"success": True, "method": "ocr", "title": "Dune"}
+        cache.set(0b1011 << 100, "scan_book", stored)
+
+        exact = cache.get(0b1011 << 100, "scan_book")
+        near = cache.get((0b1011 << 100) ^ 0b111, "scan_book")
+
+        assert exact["distance"] == 0 and exact["result"] == stored
+        assert near["distance"] == 3 and near["result"] == stored
+
+    def test_far_hash_misses(self, fake_redis):
+        """Test hashes lejanos no reutilizan el resultado"""
+        cache = _cache(fake_redis, max_distance=4)
+        cache.set(0, "scan_book", {"success": True})
+
+        assert cache.get((1 << 10) - 1, "scan_book") is None
+
+
+class TestScanBookCache:
+    def _service(self, redis, isbn="9780441013593"):
+        barcode_scanner = MagicMock()
+        barcode_scanner.extract_isbn.return_value = isbn
+        search = MagicMock()
+        search.search.return_value = [{"title": "Dune", "authors": ["Frank Herbert"]}]
+        service = BookScanService(
+            barcode_scanner=barcode_scanner,
+            ocr_service=MagicMock(),
+            search_service=search,
+            result_cache=_cache(redis),
+        )
+        return service, search
+
+    def test_rescan_of_same_photo_reuses_extraction_and_searches_again(self, fake_redis):
+        """Test volver a subir la misma foto no repite la lectura de la imagen, pero sí la búsqueda"""
+        service, search = self._service(fake_redis)
+
+        first = service.scan_book(_cover())
+        second = service.scan_book(_cover(noise=8))
+
+        assert service.barcode_scanner.extract_isbn.call_count == 2  # 1 lectura + 1 confirmación del vecino
+        assert search.search.call_count == 2
+        assert second["cached"] is True
+        assert second["isbn"] == first["isbn"]
+        assert second["title"] == "Dune" and second["author"] == "Frank Herbert"
+
+    def test_catalog_results_are_not_cached_with_the_scan(self, fake_redis):
+        """Test un escaneo con los proveedores caídos no deja resultados vacíos en la caché"""
+        service, search = self._service(fake_redis)
+        search.search.return_value = []
+        service.scan_book(_cover())
+
+        stored = service.result_cache.get(compute_dhash(preprocess_image(_cover()).gray), "scan_book")["result"]
+        assert stored == {"method": "barcode", "isbn": "9780441013593", "title": None, "author": None}
+
+        search.search.return_value = [{"title": "Dune", "authors": ["Frank Herbert"]}]
+        retry = service.scan_book(_cover())
+
+        assert retry["cached"] is True
+        assert retry["search_results"][0]["title"] == "Dune"
+
+    def test_near_match_with_different_barcode_is_not_reused(self, fake_redis):
+        """Test un vecino cercano con otro ISBN no devuelve el resultado guardado"""
+        service, search = self._service(fake_redis)
+        service.scan_book(_cover())
+
+        service.barcode_scanner.extract_isbn.return_value = "9780261102217"
+        result = service.scan_book(_cover(noise=8))
+
+        assert search.search.call_count == 2
+        assert result["isbn"] == "9780261102217"
+        assert "cached" not in result
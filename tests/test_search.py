@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -21,7 +21,7 @@ MOCK_BOOK_RESPONSE = [
 # Create test client
 client = TestClient(app)
 
-@patch('app.services.book_search_service.BookSearchService.search')
+@patch('app.services.book_search_service.BookSearchService.asearch', new_callable=AsyncMock)
 def test_search_by_title_returns_results_or_empty(mock_search):
     # Setup mock
     mock_search.return_value = MOCK_BOOK_RESPONSE
@@ -38,7 +38,7 @@ def test_search_by_title_returns_results_or_empty(mock_search):
         assert "authors" in data[0]
         assert "isbn_13" in data[0]
 
-@patch('app.services.book_search_service.BookSearchService.search')
+@patch('app.services.book_search_service.BookSearchService.asearch', new_callable=AsyncMock)
 def test_search_by_isbn_returns_results_or_empty(mock_search):
     # Setup mock
     mock_search.return_value = MOCK_BOOK_RESPONSE
@@ -55,7 +55,7 @@ def test_search_by_isbn_returns_results_or_empty(mock_search):
         assert "isbn_13" in data[0]
         assert data[0]["isbn_13"] == "9780547928227"
 
-@patch('app.services.book_search_service.BookSearchService.search')
+@patch('app.services.book_search_service.BookSearchService.asearch', new_callable=AsyncMock)
 def test_search_handles_api_failure(mock_search):
     # Setup mock to raise an exception
     mock_search.side_effect = Exception("API Error")
@@ -73,3 +73,23 @@ def test_search_handles_api_failure(mock_search):
         assert "500" in str(e) or "Internal Server Error" in str(e)
 
 
+@patch('app.services.book_search_service.BookSearchService.asearch_isbns', new_callable=AsyncMock)
+def test_isbn_batch_maps_each_isbn_to_results(mock_batch):
+    mock_batch.return_value = {"9780547928227": MOCK_BOOK_RESPONSE}
+
+    response = client.post(
+        "/search/isbn/batch",
+        json={"isbns": ["978-0-547-92822-7", "9780547928227", "not-an-isbn"], "limit": 3},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["978-0-547-92822-7"] == data["9780547928227"] == MOCK_BOOK_RESPONSE
+    assert data["not-an-isbn"] == []
+    mock_batch.assert_awaited_once_with(["9780547928227"], limit=3)
+
+
+def test_isbn_batch_rejects_empty_list():
+    response = client.post("/search/isbn/batch", json={"isbns": []})
+    assert response.status_code == 422
+
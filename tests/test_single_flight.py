@@ -0,0 +1,105 @@
+"""
+Tests para la coalescencia de búsquedas (SingleFlight)
+"""
+import asyncio
+import threading
+import time
+
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_async_calls_share_one_upstream_call(self, fake_redis):
+        """Test varias búsquedas simultáneas de la misma clave hacen una sola llamada"""
+        calls = []
+        flight = SingleFlight(redis_client=fake_redis())
+
+        async def _fetch():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return ["resultado"]
+
+        async def _run():
+            return await asyncio.gather(*(flight.arun("search:k", _fetch, lambda: None) for _ in range(5)))
+
+        results = asyncio.run(_run())
+
+        assert calls == [1]
+        assert results == [["resultado"]] * 5
+        assert flight.stats()["coalesced"] == 4
+
+    def test_concurrent_threads_share_one_upstream_call(self, fake_redis):
+        """Test lo mismo desde varios hilos (búsquedas síncronas de los escaneos)"""
+        calls = []
+        started = threading.Event()
+        flight = SingleFlight(redis_client=fake_redis())
+
+        def _fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return ["resultado"]
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.run("search:k", _fetch, lambda: None)))
+        leader.start()
+        started.wait(1)
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.run("search:k", _fetch, lambda: None)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        for thread in [leader, *followers]:
+            thread.join(1)
+
+        assert calls == [1]
+        assert results == [["resultado"]] * 4
+
+    def test_waits_for_other_worker_through_cache(self, fake_redis):
+        """Test si otro proceso tiene el lock se espera a que el resultado aparezca en caché"""
+        redis = fake_redis()
+        redis.set("lock:search:k", "otro-worker", nx=True)
+        lookups = []
+
+        def _lookup():
+            lookups.append(1)
+            return ["de otro worker"] if len(lookups) >= 2 else None
+
+        flight = SingleFlight(redis_client=redis, poll_interval_seconds=0.01)
+        result = flight.run("search:k", lambda: ["propio"], _lookup)
+
+        assert result == ["de otro worker"]
+        assert flight.stats()["leaders"] == 0
+
+    def test_calls_upstream_when_other_worker_releases_without_result(self, fake_redis):
+        """Test si el otro proceso suelta el lock sin dejar resultado se consulta aquí"""
+        redis = fake_redis()
+        redis.set("lock:search:k", "otro-worker", nx=True)
+
+        def _lookup():
+            redis.data.pop("lock:search:k", None)
+            return None
+
+        flight = SingleFlight(redis_client=redis, poll_interval_seconds=0.01)
+        result = asyncio.run(flight.arun("search:k", lambda: asyncio.sleep(0, result=["propio"]), _lookup))
+
+        assert result == ["propio"]
+        assert redis.data == {}
+
+    def test_failure_propagates_to_waiters(self):
+        """Test un error de la llamada compartida llega a todos los que esperan"""
+        flight = SingleFlight(redis_client=None)
+
+        async def _fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("proveedor caído")
+
+        async def _run():
+            return await asyncio.gather(
+                *(flight.arun("search:k", _fail, lambda: None) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(_run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,41 @@
+"""
+Tests para la normalización de consultas de texto
+"""
+import pytest
+
+from app.utils.text import canonical_query, fold, query_words
+
+
+class TestCanonicalQuery:
+    @pytest.mark.parametrize(
+        "text",
+        ["Cien años de soledad", "  CIEN AÑOS   de soledad! ", "cien-anos_de.soledad", "ＣＩＥＮ años de soledad"],
+    )
+    def test_variants_collapse(self, text):
+        assert canonical_query(text) == "cien+anos+de+soledad"
+
+    def test_apostrophes_do_not_split_words(self):
+        assert canonical_query("Ender's Game") == canonical_query("Ender’s game") == "enders+game"
+
+    def test_non_latin_marks_are_kept(self):
+        assert fold("ブック") == "ブック"
+        assert canonical_query("Straße") == "strasse"
+
+    @pytest.mark.parametrize(
+        ("a", "b"),
+        [("C++ Primer", "C Primer"), ("C# in depth", "C in depth"), ("F# for fun", "F for fun")],
+    )
+    def test_language_symbols_keep_titles_apart(self, a, b):
+        assert canonical_query(a) != canonical_query(b)
+
+    def test_language_symbols_are_normalized(self):
+        assert canonical_query("C++ Primer") == canonical_query("c++  primer!") == "c+++primer"
+        assert canonical_query("C# in Depth") == "c#+in+depth"
+        assert query_words("C++ Primer") == ["c++", "primer"]
+
+    def test_loose_symbols_still_separate_words(self):
+        assert canonical_query("Dune + Mesías") == canonical_query("# dune mesias") == "dune+mesias"
+
+    @pytest.mark.parametrize("text", ["", " ?! ", "+++", "#", "¡¿...?!"])
+    def test_punctuation_only_is_empty(self, text):
+        assert canonical_query(text) == ""
@@ -0,0 +1,80 @@
+"""
+Tests para el límite de tamaño de las subidas (UploadSizeLimitMiddleware)
+"""
+import io
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.middleware.error_handler import http_exception_handler
+from app.middleware.upload_limit import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+
+def _limited_app(received):
+    limited = FastAPI()
+    limited.add_exception_handler(HTTPException, http_exception_handler)
+    limited.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": 1000, "/upload/big": 5000})
+
+    @limited.post("/upload")
+    @limited.post("/upload/big")
+    @limited.post("/other")
+    async def _upload(request: Request):
+        async for chunk in request.stream():
+            received.append(len(chunk))
+        return {"size": sum(received)}
+
+    return limited
+
+
+def _chunks(count, size=16 * 1024):
+    for _ in range(count):
+        yield b"x" * size
+
+
+class TestUploadSizeLimitMiddleware:
+    def test_longest_prefix_wins(self):
+        """Test cada ruta usa el límite de su prefijo más largo"""
+        middleware = UploadSizeLimitMiddleware(app=None, limits={"/scan": 10, "/scan/batch": 100})
+
+        assert middleware.limit_for("/scan/book") == 10
+        assert middleware.limit_for("/scan/batch") == 100
+        assert middleware.limit_for("/scanner") is None
+        assert middleware.limit_for("/books") is None
+
+    def test_rejects_declared_content_length(self):
+        """Test un Content-Length mayor que el límite da 413 sin leer el cuerpo"""
+        received = []
+        client = TestClient(_limited_app(received))
+
+        response = client.post("/upload", content=b"x" * (1000 + MULTIPART_OVERHEAD + 1))
+
+        assert response.status_code == 413
+        assert response.json()["message"]["type"] == "payload_too_large"
+        assert received == []
+
+    def test_aborts_streamed_body_over_limit(self):
+        """Test sin Content-Length se corta al superar el límite mientras llega"""
+        received = []
+        client = TestClient(_limited_app(received))
+
+        response = client.post("/upload", content=_chunks(20))
+
+        assert response.status_code == 413
+        assert sum(received) <= 1000 + MULTIPART_OVERHEAD
+
+    def test_allows_bodies_within_limit_and_unlimited_paths(self):
+        """Test los cuerpos dentro del límite y las rutas sin límite pasan"""
+        client = TestClient(_limited_app([]))
+
+        assert client.post("/upload/big", content=b"x" * 3000).status_code == 200
+        assert client.post("/other", content=_chunks(20)).status_code == 200
+
+
+def test_scan_upload_over_limit_returns_413(client):
+    """Test una imagen mayor que SCAN_MAX_FILE_SIZE se rechaza con 413 en /scan/book"""
+    files = {"file": ("large.jpg", io.BytesIO(b"x" * (11 * 1024 * 1024)), "image/jpeg")}
+
+    response = client.post("/scan/book", files=files)
+
+    assert response.status_code == 413
+    assert response.json()["message"]["max_size_mb"] == 10